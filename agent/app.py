@@ -1,225 +1,629 @@
 """Live Cultural Context Agent - Point your camera at a landmark and have a conversation about it."""
 
 import asyncio
-import base64
+import collections
+import functools
+import hmac
 import json
-import logging
-from datetime import datetime
 import os
+import socket
 import threading
+import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-import google.auth
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, jsonify, request, send_from_directory
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
-from google import genai
-from google.genai import types
-from google.oauth2.credentials import Credentials
+
+from assets import StaticAssets
+from audio_codec import OPUS, PCM, OpusCodec, negotiate
+from audio_out import AudioCoalescer
+from client_pool import ClientPool, token_expires_at
+from frame_gate import FrameGate
+from frame_normalize import TARGETS, FrameNormalizer
+from grounding import GroundingIndex, format_snippets
+from history import HistoryStore, parse_time
+from log_config import configure_logging, forget_session, get_logger, sampled_debug
+from metrics import BYTE_BUCKETS, DURATION_BUCKETS, Metrics
+from reconnect import Backoff
+from registry import create_registry
+from session_engine import EngineFull, SessionEngine
+from session_store import MemoryStore, SqliteStore, TieredStore
+from startup import BACKGROUND, EAGER, MODES, LazyModule, Warmup
+from supervisor import FULL, QUEUED, RESTARTING, SessionSupervisor
+from transcripts import TranscriptSink
+from voice_gate import KEEPALIVE, VoiceGate
+
+# The GenAI SDK is imported on first use or by the warm-up, not while the server is starting
+genai = LazyModule("google.genai")
+types = LazyModule("google.genai.types")
+oauth2_credentials = LazyModule("google.oauth2.credentials")
 
 app = Flask(__name__, static_folder="src", static_url_path="")
 CORS(app)
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+configure_logging()
+session_log = get_logger("session")
+audio_log = get_logger("audio")
+video_log = get_logger("video")
+transcript_log = get_logger("transcript")
+auth_log = get_logger("auth")
 
 socketio = SocketIO(
     app,
+    # Set to e.g. redis://host:6379/0 when running several workers so any worker can emit to any client
+    message_queue=os.getenv("SOCKETIO_MESSAGE_QUEUE") or None,
     cors_allowed_origins="*",
     async_mode="threading",
     ping_timeout=300,
     ping_interval=60,
     max_http_buffer_size=50000000,
-    transports=["polling"],
+    # WebSocket first so media travels as binary frames; long-polling stays
+    # available for clients behind proxies that cannot upgrade.
+    transports=["websocket", "polling"],
 )
 
-DEFAULT_PROJECT_ID = os.getenv("GOOGLE_CLOUD_PROJECT")
 DEFAULT_LOCATION_ID = "us-central1"
 
-if not DEFAULT_PROJECT_ID:
+# background: bind first and warm up SDK imports, credentials and indexes on a thread;
+# lazy: do each on first use; eager: do everything before the server starts
+STARTUP_MODE = os.getenv("STARTUP_MODE", BACKGROUND)
+if STARTUP_MODE not in MODES:
+    raise ValueError(f"STARTUP_MODE must be one of {', '.join(MODES)}")
+
+@functools.lru_cache(maxsize=None)
+def default_project_id():
+    """GOOGLE_CLOUD_PROJECT, or the project of the default credentials. Discovered once, on first use."""
+    project = os.getenv("GOOGLE_CLOUD_PROJECT")
+    if project:
+        return project
     try:
+        import google.auth
         _, project = google.auth.default()
-        if project:
-            DEFAULT_PROJECT_ID = project
+        return project or None
     except Exception:
-        pass
+        return None
+
+# Every live session runs on a small fixed pool of shared event loops.
+SESSION_LOOPS = int(os.getenv("SESSION_LOOPS", "1"))
+MAX_SESSIONS_PER_LOOP = int(os.getenv("MAX_SESSIONS_PER_LOOP", "100"))
+session_engine = SessionEngine(num_loops=SESSION_LOOPS, max_sessions_per_loop=MAX_SESSIONS_PER_LOOP)
+
+# Admission control and reaping of idle or abandoned sessions
+SUPERVISOR_INTERVAL = 5.0
+session_supervisor = SessionSupervisor(
+    max_sessions=int(os.getenv("MAX_LIVE_SESSIONS", str(SESSION_LOOPS * MAX_SESSIONS_PER_LOOP))),
+    max_waiting=int(os.getenv("SESSION_WAIT_QUEUE", "50")),
+    wait_timeout=float(os.getenv("SESSION_WAIT_TIMEOUT", "30")),
+    idle_timeout=float(os.getenv("SESSION_IDLE_TIMEOUT", "300")),
+    orphan_timeout=float(os.getenv("SESSION_ORPHAN_TIMEOUT", "30")),
+)
+
+# Multi-worker mode: each live session is leased to one worker in a shared registry, and
+# events that reach another worker are relayed to the owner. See "Scaling" in README.md.
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+SESSION_LEASE_TTL = float(os.getenv("SESSION_LEASE_TTL", "30"))
+session_registry = create_registry(os.getenv("REGISTRY_URL"))
+# Each browser's credentials, name and instructions live in the registry under its client id
+PROFILE_TTL = float(os.getenv("PROFILE_TTL", str(24 * 3600)))
+
+# Camera frame gate: drop frames within FRAME_DIFF_THRESHOLD bits (of 64) of the last forwarded one
+FRAME_DIFF_THRESHOLD = int(os.getenv("FRAME_DIFF_THRESHOLD", "5"))
+FRAME_MIN_INTERVAL = float(os.getenv("FRAME_MIN_INTERVAL", "1.0"))
+FRAME_MAX_INTERVAL = float(os.getenv("FRAME_MAX_INTERVAL", "8.0"))
+
+# Forwarded frames are cropped, downsized and re-encoded to suit MEDIA_RESOLUTION on a process pool
+MEDIA_RESOLUTION = os.getenv("MEDIA_RESOLUTION", "MEDIUM").upper()
+_frame_side, _frame_bytes = TARGETS[MEDIA_RESOLUTION]
+FRAME_WORKERS = int(os.getenv("FRAME_WORKERS", "2"))
+frame_normalizer = FrameNormalizer(
+    max_side=int(os.getenv("FRAME_MAX_SIDE", str(_frame_side))),
+    max_bytes=int(os.getenv("FRAME_MAX_BYTES", str(_frame_bytes))),
+    quality=int(os.getenv("FRAME_QUALITY", "80")),
+    workers=FRAME_WORKERS,
+) if FRAME_WORKERS > 0 else None
+
+# Voice gate: PCM chunks with no speech are not sent upstream, apart from a pre-roll and hangover
+VOICE_GATE = os.getenv("VOICE_GATE", "1") == "1"
+VOICE_GATE_MARGIN_DB = float(os.getenv("VOICE_GATE_MARGIN_DB", "10"))
+VOICE_GATE_HANGOVER_MS = int(os.getenv("VOICE_GATE_HANGOVER_MS", "600"))
+VOICE_GATE_PREROLL_MS = int(os.getenv("VOICE_GATE_PREROLL_MS", "300"))
+VOICE_GATE_KEEPALIVE = float(os.getenv("VOICE_GATE_KEEPALIVE", "0"))
+
+# Reconnects after an upstream drop back off exponentially with jitter, within a time budget
+RECONNECT_BASE_DELAY = float(os.getenv("RECONNECT_BASE_DELAY", "0.05"))
+RECONNECT_MAX_DELAY = float(os.getenv("RECONNECT_MAX_DELAY", "5.0"))
+RECONNECT_BUDGET = float(os.getenv("RECONNECT_BUDGET", "60"))
+RECONNECT_STABLE_SECONDS = 30.0  # a connection that lasted this long resets the backoff
+# Audio captured while reconnecting is replayed after resumption if it is at most this old
+RECONNECT_REPLAY_SECONDS = float(os.getenv("RECONNECT_REPLAY_SECONDS", "5"))
+
+# Consecutive queued audio chunks are merged into one upstream send of at most this many bytes
+UPSTREAM_AUDIO_BATCH_BYTES = int(os.getenv("UPSTREAM_AUDIO_BATCH_BYTES", "32000"))
+# An item whose send fails this many times is dropped rather than replayed on every reconnect
+UPSTREAM_SEND_ATTEMPTS = 2
+
+# Outbound audio is coalesced into frames of this many milliseconds before emitting
+AUDIO_FRAME_MS = int(os.getenv("AUDIO_FRAME_MS", "200"))
+AUDIO_MAX_HOLD = float(os.getenv("AUDIO_MAX_HOLD_MS", "100")) / 1000
+
+# Opus encode/decode for clients that negotiate it runs on this pool, off the session loops
+OPUS_BITRATE = int(os.getenv("OPUS_BITRATE", "24000"))
+OPUS_FRAME_MS = 20
+codec_pool = ThreadPoolExecutor(max_workers=int(os.getenv("CODEC_WORKERS", "4")), thread_name_prefix="codec")
 
 GEMINI_LIVE_MODEL = "gemini-live-2.5-flash-native-audio"
 GEMINI_VALIDATE_MODEL = "gemini-2.0-flash"  # Standard model for token validation via generateContent
 
-session_credentials = {}
 bridges = {}
 live_sessions = {}
 starting_sessions = set()
 starting_session_sids = {}
-session_states = {}
-session_resumption_handles = {}  # session_id -> handle string
-user_name = "User"
-custom_system_instructions = "You are a live cultural context agent — a passionate and knowledgeable guide who identifies landmarks through the user's camera and shares rich historical and cultural stories about them."
+session_codecs = {}  # session_id -> codec used for audio sent to the client
+session_clients = {}  # session_id -> client id of the browser that started it
+remote_attachments = {}  # sid -> session_ids hosted by other workers that this socket attached to
+DEFAULT_CLIENT_ID = "default"
+DEFAULT_USER_NAME = "User"
+DEFAULT_SYSTEM_INSTRUCTIONS = "You are a live cultural context agent — a passionate and knowledgeable guide who identifies landmarks through the user's camera and shares rich historical and cultural stories about them."
 
 # Data directory for session persistence
 DATA_DIR = Path("data")
 DATA_DIR.mkdir(exist_ok=True)
 
-def save_transcript(session_id, role, text):
-    """Append a transcript line to a session's transcript file in the data folder."""
-    transcript_file = DATA_DIR / f"transcript_{session_id}.txt"
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    try:
-        with open(transcript_file, "a", encoding="utf-8") as f:
-            f.write(f"[{timestamp}] {role}: {text}\n")
-    except Exception as e:
-        logging.error(f"[TRANSCRIPT] Failed to save: {e}")
+# Transcripts are coalesced into turns and written as JSONL by a background thread,
+# which also indexes them into the searchable history store
+history_store = HistoryStore(DATA_DIR / "history.db")
+HISTORY_SUMMARY = os.getenv("HISTORY_SUMMARY", "1") == "1"
+# The history API returns users' conversations, so it is off unless an admin token is configured
+HISTORY_API_TOKEN = os.getenv("HISTORY_API_TOKEN", "")
+transcript_sink = TranscriptSink(
+    DATA_DIR / "transcripts",
+    max_bytes=int(os.getenv("TRANSCRIPT_MAX_BYTES", str(10 * 1024 * 1024))),
+    max_age=float(os.getenv("TRANSCRIPT_MAX_AGE", "3600")),
+    history=history_store,
+)
+
+# Pages and their CSS/JS are fingerprinted, precompressed and served from memory.
+# STATIC_BUILD_DIR holds a bundle prebuilt by `python assets.py`; without a current one it is built on first use.
+STATIC_ASSETS = os.getenv("STATIC_ASSETS", "1") == "1"
+static_assets = StaticAssets(".", os.getenv("STATIC_BUILD_DIR", "build/static"))
+
+def backfill_history(jsonl_logs):
+    """Index transcripts written before the history store existed.
+
+    Legacy `data/transcript_<session_id>.txt` files are imported and moved to
+    `data/transcripts/imported/`. `jsonl_logs` lists (path, size) of the
+    JSONL logs at startup; only those bytes are read, since anything written
+    later is indexed as it is written.
+    """
+    imported_dir = DATA_DIR / "transcripts" / "imported"
+    for legacy_file in DATA_DIR.glob("transcript_*.txt"):
+        try:
+            history_store.import_legacy_transcript(legacy_file)
+            imported_dir.mkdir(exist_ok=True)
+            legacy_file.rename(imported_dir / legacy_file.name)
+        except Exception as e:
+            transcript_log.error("[HISTORY] Failed to import %s: %s", legacy_file.name, e)
+    for log_file, size in jsonl_logs:
+        try:
+            transcript_log.info("[HISTORY] Indexed %d turn(s) from %s",
+                                history_store.import_jsonl(log_file, max_bytes=size), log_file.name)
+        except Exception as e:
+            transcript_log.error("[HISTORY] Failed to import %s: %s", log_file.name, e)
+
+# JSONL logs are only backfilled into an empty store, so they are never indexed twice
+_jsonl_logs = [
+    (path, path.stat().st_size) for path in sorted((DATA_DIR / "transcripts").glob("transcripts*.jsonl"))
+] if history_store.is_empty() else []
+threading.Thread(target=backfill_history, args=(_jsonl_logs,), name="history-backfill", daemon=True).start()
+
+# Session state: resumption handles live in one SQLite file behind an LRU; per-session
+# runtime state (frame gates) is memory-only. Both expire idle entries.
+SESSION_STATE_MAX_ENTRIES = int(os.getenv("SESSION_STATE_MAX_ENTRIES", "10000"))
+SESSION_STATE_TTL = float(os.getenv("SESSION_STATE_TTL", "3600"))
+SESSION_HANDLE_TTL = float(os.getenv("SESSION_HANDLE_TTL", "7200"))
+session_resumption_handles = TieredStore(
+    MemoryStore(max_entries=SESSION_STATE_MAX_ENTRIES, ttl=SESSION_HANDLE_TTL),
+    SqliteStore(DATA_DIR / "sessions.db", ttl=SESSION_HANDLE_TTL),
+)
+session_states = MemoryStore(max_entries=SESSION_STATE_MAX_ENTRIES, ttl=SESSION_STATE_TTL)
+
+def migrate_handle_files():
+    """Move resumption handles from legacy per-session JSON files into the store."""
+    for handle_file in DATA_DIR.glob("*_handle.json"):
+        try:
+            data = json.loads(handle_file.read_text())
+            if data.get("session_id") and data.get("handle"):
+                session_resumption_handles.set(data["session_id"], data["handle"])
+            handle_file.unlink()
+        except Exception as e:
+            session_log.error("[SESSION] Failed to migrate %s: %s", handle_file.name, e)
+
+migrate_handle_files()
 
 def save_session_handle(session_id, handle):
-    """Save a session resumption handle to disk."""
-    session_resumption_handles[session_id] = handle
-    handle_file = DATA_DIR / f"{session_id}_handle.json"
+    """Save a session resumption handle to the session store."""
     try:
-        handle_file.write_text(json.dumps({"session_id": session_id, "handle": handle}))
-        logging.info(f"[SESSION] Saved resumption handle for {session_id}")
+        session_resumption_handles.set(session_id, handle)
+        session_log.debug("[SESSION] Saved resumption handle", extra={"session_id": session_id})
     except Exception as e:
-        logging.error(f"[SESSION] Failed to save handle: {e}")
+        session_log.error("[SESSION] Failed to save handle: %s", e, extra={"session_id": session_id})
 
 def load_session_handle(session_id):
-    """Load a session resumption handle from disk."""
-    if session_id in session_resumption_handles:
-        return session_resumption_handles[session_id]
-    handle_file = DATA_DIR / f"{session_id}_handle.json"
-    if handle_file.exists():
-        try:
-            data = json.loads(handle_file.read_text())
-            handle = data.get("handle")
-            if handle:
-                session_resumption_handles[session_id] = handle
-                logging.info(f"[SESSION] Loaded resumption handle for {session_id}")
-                return handle
-        except Exception as e:
-            logging.error(f"[SESSION] Failed to load handle: {e}")
+    """Load a session resumption handle, falling through to disk on a memory miss."""
+    try:
+        return session_resumption_handles.get(session_id)
+    except Exception as e:
+        session_log.error("[SESSION] Failed to load handle: %s", e, extra={"session_id": session_id})
     return None
 
 def clear_session_handle(session_id):
     """Remove a stored session handle."""
-    session_resumption_handles.pop(session_id, None)
-    handle_file = DATA_DIR / f"{session_id}_handle.json"
-    if handle_file.exists():
-        try:
-            handle_file.unlink()
-        except Exception:
-            pass
+    try:
+        session_resumption_handles.delete(session_id)
+    except Exception:
+        pass
+
+# Hot-path instrumentation, exposed at /metrics (Prometheus) and /api/metrics (JSON)
+metrics = Metrics(max_sessions=int(os.getenv("METRICS_MAX_SESSIONS", "1000")))
+metrics.histogram("audio_upstream_latency_seconds", "Time from an audio chunk reaching the server to its upstream send.")
+metrics.histogram("response_latency_seconds", "Time from the latest user input transcription to the first audio_response emit.")
+metrics.histogram("reconnect_duration_seconds", "Time from an upstream drop to the Live session being re-established.", DURATION_BUCKETS)
+metrics.counter("bytes_total", "Media bytes received from clients (in) and sent to clients (out).", ("direction", "media"))
+metrics.counter("frames_total", "Camera frames by frame gate decision.", ("result",))
+metrics.histogram("frame_bytes_saved", "Bytes removed from each forwarded frame by normalization.", BYTE_BUCKETS)
+metrics.counter("frame_bytes_saved_total", "Bytes removed from forwarded frames by normalization.")
+metrics.counter("voice_gate_chunks_total", "Client PCM chunks by voice gate decision.", ("decision",))
+metrics.counter("voice_gate_bytes_saved_total", "Client audio bytes the voice gate kept from going upstream.")
+metrics.counter("static_responses_total", "Page and asset responses by content encoding and status.", ("encoding", "status"))
+metrics.counter("bridge_dropped_total", "Items dropped from a full SessionBridge lane.", ("lane",))
+metrics.counter("send_failed_dropped_total", "Items dropped after repeatedly failing to send upstream.", ("lane",))
+metrics.counter("reconnects_total", "Upstream reconnects performed by run_live_session.")
+metrics.counter("reconnect_failures_total", "Reconnect attempts that failed to connect.")
+metrics.counter("reconnect_replayed_total", "Audio chunks captured during a reconnect and replayed after it.")
+metrics.counter("upstream_audio_sends_total", "send_realtime_input calls carrying audio.")
+metrics.counter("upstream_audio_chunks_total", "Client audio chunks sent upstream, before batching.")
+metrics.counter("reconnect_expired_total", "Audio chunks captured during a reconnect that were too old to replay.")
+metrics.counter("audio_out_parts_total", "Model audio parts received from the Live API.")
+metrics.counter("audio_out_frames_total", "Coalesced audio_response frames emitted to clients.")
+metrics.counter("audio_out_discarded_bytes_total", "Buffered model audio discarded on barge-in.")
+metrics.counter("interruptions_total", "Model turns interrupted by the user.")
+metrics.counter("grounding_snippets_total", "Retrieved context passages pushed into live sessions.")
+
+def as_bytes(payload):
+    """Return a binary Socket.IO attachment as bytes, or None if it is not binary.
+
+    Media arrives as raw bytes on both transports: WebSocket carries it in
+    binary frames and the polling fallback has Engine.IO encode it for us.
+    """
+    if isinstance(payload, (bytes, bytearray, memoryview)):
+        return bytes(payload)
+    return None
 
 def get_session_state(session_id):
-    if session_id not in session_states:
-        session_states[session_id] = {"last_seen_frame": None}
-    return session_states[session_id]
-
-def get_active_client():
-    if "oauth" in session_credentials:
-        creds_data = session_credentials["oauth"]
-        creds = Credentials(token=creds_data["access_token"])
+    state = session_states.get(session_id)
+    if state is None:
+        state = {
+            "frame_gate": FrameGate(
+                threshold=FRAME_DIFF_THRESHOLD,
+                min_interval=FRAME_MIN_INTERVAL,
+                max_interval=FRAME_MAX_INTERVAL,
+            ),
+            "voice_gate": VoiceGate(
+                margin_db=VOICE_GATE_MARGIN_DB,
+                hangover_ms=VOICE_GATE_HANGOVER_MS,
+                preroll_ms=VOICE_GATE_PREROLL_MS,
+                keepalive=VOICE_GATE_KEEPALIVE,
+            ),
+        }
+        session_states.set(session_id, state)
+    return state
+
+# LIVE_BACKEND=fake swaps in the local Live API stand-in from bench/ for load testing
+LIVE_BACKEND = os.getenv("LIVE_BACKEND", "vertex")
+
+def build_client(project, location, access_token=None):
+    if LIVE_BACKEND == "fake":
+        from bench.fake_live import FakeLiveClient
+        return FakeLiveClient()
+    if access_token:
         return genai.Client(
             vertexai=True,
-            project=creds_data["project_id"],
-            location=creds_data["location"],
-            credentials=creds,
+            project=project,
+            location=location,
+            credentials=oauth2_credentials.Credentials(token=access_token),
+        )
+    return genai.Client(vertexai=True, project=project, location=location)
+
+# Clients are reused across reconnects and requests, keyed by project, location and token
+client_pool = ClientPool(build_client)
+
+def client_id_from_request():
+    """The browser's client id from X-Client-Id; callers that send none share one default profile."""
+    return request.headers.get("X-Client-Id") or DEFAULT_CLIENT_ID
+
+def load_profile(client_id):
+    """A browser's profile from the shared registry, with defaults for anything it never set."""
+    profile = {"name": DEFAULT_USER_NAME, "instructions": DEFAULT_SYSTEM_INSTRUCTIONS, "oauth": None}
+    profile.update(session_registry.load_profile(client_id) or {})
+    return profile
+
+def update_profile(client_id, **changes):
+    profile = load_profile(client_id)
+    profile.update(changes)
+    session_registry.save_profile(client_id, profile, PROFILE_TTL)
+    return profile
+
+def session_user_name(session_id):
+    return load_profile(session_clients.get(session_id, DEFAULT_CLIENT_ID))["name"]
+
+def get_active_client(profile):
+    if profile["oauth"]:
+        creds_data = profile["oauth"]
+        return client_pool.get(
+            creds_data["project_id"],
+            creds_data["location"],
+            creds_data["access_token"],
+            expires_at=creds_data.get("expires_at"),
         )
     else:
         try:
-            return genai.Client(vertexai=True, project=DEFAULT_PROJECT_ID, location=DEFAULT_LOCATION_ID)
+            return client_pool.get(default_project_id(), DEFAULT_LOCATION_ID)
         except Exception as e:
-            logging.error(f"Failed to use default credentials: {e}")
+            auth_log.error("[AUTH] Failed to use default credentials: %s", e)
             return None
 
-# Load grounding context from context.txt
+# context.txt holds the guide's persona and stays in the system prompt while it is small.
+# Reference material lives in CONTEXT_DIR and is retrieved per question instead.
+GROUNDING_PROMPT_MAX_CHARS = int(os.getenv("GROUNDING_PROMPT_MAX_CHARS", "4000"))
+GROUNDING_TOP_K = int(os.getenv("GROUNDING_TOP_K", "3"))
+GROUNDING_MIN_SCORE = float(os.getenv("GROUNDING_MIN_SCORE", "1.0"))
+GROUNDING_MIN_INTERVAL = float(os.getenv("GROUNDING_MIN_INTERVAL", "2.0"))
+GROUNDING_QUERY_WORDS = 40  # recent user words used as the retrieval query
+
 GROUNDING_CONTEXT = ""
+_indexed_context_files = []
 _context_file = Path("context.txt")
 if _context_file.exists():
-    GROUNDING_CONTEXT = _context_file.read_text().strip()
-    logging.info(f"[CONTEXT] Loaded grounding context ({len(GROUNDING_CONTEXT)} chars)")
+    # A file with more bytes than 4x the limit has more characters than the limit, so it is not read here
+    _context_text = _context_file.read_text().strip() if _context_file.stat().st_size <= 4 * GROUNDING_PROMPT_MAX_CHARS else None
+    if _context_text is not None and len(_context_text) <= GROUNDING_PROMPT_MAX_CHARS:
+        GROUNDING_CONTEXT = _context_text
+        session_log.info("[CONTEXT] Loaded grounding context (%d chars)", len(GROUNDING_CONTEXT))
+    else:
+        _indexed_context_files.append(_context_file)
+        session_log.info("[CONTEXT] context.txt is over %d chars, indexing it for retrieval instead", GROUNDING_PROMPT_MAX_CHARS)
 else:
-    logging.warning("[CONTEXT] context.txt not found, no grounding context loaded")
+    session_log.warning("[CONTEXT] context.txt not found, no grounding context loaded")
 
-def get_live_system_prompt():
-    custom = f"\n{custom_system_instructions}\n" if custom_system_instructions else ""
-    name_section = f"\nUser's name: {user_name}\n" if user_name and user_name != "User" else ""
+grounding_index = GroundingIndex(
+    os.getenv("CONTEXT_DIR", "context"),
+    extra_files=_indexed_context_files,
+    reload_interval=float(os.getenv("GROUNDING_RELOAD_INTERVAL", "5")),
+    background=STARTUP_MODE != EAGER,
+)
+
+def get_live_system_prompt(history_summary=None, profile=None):
+    instructions = profile["instructions"] if profile else DEFAULT_SYSTEM_INSTRUCTIONS
+    name = profile["name"] if profile else DEFAULT_USER_NAME
+    custom = f"\n{instructions}\n" if instructions else ""
+    name_section = f"\nUser's name: {name}\n" if name and name != DEFAULT_USER_NAME else ""
+    history_section = (
+        f"\n--- EARLIER CONVERSATION ---\n{history_summary}\n--- END EARLIER CONVERSATION ---\n"
+        "The user is returning to this conversation. Pick up from it naturally if they refer to it.\n"
+    ) if history_summary else ""
     context_section = f"\n--- GROUNDING CONTEXT ---\n{GROUNDING_CONTEXT}\n--- END CONTEXT ---\n" if GROUNDING_CONTEXT else ""
+    if len(grounding_index):
+        context_section += "\nReference notes relevant to the conversation may be added as it goes. Prefer them over general knowledge when they apply.\n"
     return f"""You are a Real-Time AI Voice Agent.
 
-{custom}{name_section}{context_section}
+{custom}{name_section}{context_section}{history_section}
 You support real-time voice interaction and can be interrupted naturally.
 If the user uploads an image or shares their camera, use that visual context to help them (e.g., explain what you see, answer questions about it, translate text in images, tutor based on homework shown, etc.).
 Keep responses concise, natural, and conversational.
 """
 
+def build_live_config(system_prompt):
+    """LiveConnectConfig for a session, without a resumption handle; see `with_resumption`."""
+    return types.LiveConnectConfig(
+        response_modalities=["AUDIO"],
+        system_instruction=system_prompt,
+        media_resolution=types.MediaResolution[f"MEDIA_RESOLUTION_{MEDIA_RESOLUTION}"],
+        speech_config=types.SpeechConfig(
+            voice_config=types.VoiceConfig(
+                prebuilt_voice_config=types.PrebuiltVoiceConfig(voice_name="Aoede")
+            )
+        ),
+        realtime_input_config=types.RealtimeInputConfig(
+            automatic_activity_detection=types.AutomaticActivityDetection(
+                disabled=False,
+                start_of_speech_sensitivity=types.StartSensitivity.START_SENSITIVITY_LOW,
+                end_of_speech_sensitivity=types.EndSensitivity.END_SENSITIVITY_LOW,
+                prefix_padding_ms=20,
+                silence_duration_ms=100,
+            )
+        ),
+        input_audio_transcription=types.AudioTranscriptionConfig(),
+        output_audio_transcription=types.AudioTranscriptionConfig(),
+    )
+
+def with_resumption(config, handle):
+    return config.model_copy(update={
+        "session_resumption": types.SessionResumptionConfig(handle=handle, transparent=True),
+    })
+
 class SessionBridge:
-    def __init__(self, loop):
-        self.loop = loop
-        self.queue = asyncio.Queue(maxsize=100)
+    """Hands media from socket handlers to a session's event loop.
 
-    def put_nowait(self, item):
-        if not self.loop.is_closed():
-            try:
-                self.loop.call_soon_threadsafe(self.queue.put_nowait, item)
-            except RuntimeError:
-                pass
-            except asyncio.QueueFull:
-                try:
-                    self.queue.get_nowait()
-                    self.queue.put_nowait(item)
-                except Exception:
-                    pass
+    Audio, text and video each get their own bounded lane. The sender always
+    drains audio and text before video, and the video lane only keeps the
+    latest frame, so the user's voice never waits behind stale frames.
+    """
 
+    LANE_SIZES = {"audio": 50, "text": 20, "video": 1}
+    PRIORITY = ("audio", "text", "video")
+
+    def __init__(self, engine, session_id):
+        self.engine = engine
+        self.session_id = session_id
+        self.lanes = {lane: collections.deque() for lane in self.PRIORITY}
+        self.enqueued = dict.fromkeys(self.PRIORITY, 0)
+        self.dropped = dict.fromkeys(self.PRIORITY, 0)
+        self._ready = asyncio.Event()
+        self.stopped = asyncio.Event()
+
+    def put_nowait(self, item):
+        """Queue an item from any thread; runs the actual enqueue on the session loop."""
+        self.engine.call_soon(self.session_id, self._enqueue, item)
+
+    def stop(self):
+        """Wake the session loop to end the session; safe to call from any thread."""
+        self.engine.call_soon(self.session_id, self.stopped.set)
+
+    def _enqueue(self, item):
+        lane = item["type"]
+        queue = self.lanes[lane]
+        if len(queue) >= self.LANE_SIZES[lane]:
+            # Drop-oldest: for video this makes the lane latest-wins
+            queue.popleft()
+            self.dropped[lane] += 1
+            metrics.inc("bridge_dropped_total", session_id=self.session_id, lane=lane)
+        queue.append(item)
+        self.enqueued[lane] += 1
+        self._ready.set()
+
+    async def get(self):
+        """Return the next item, strictly preferring audio and text over video."""
+        while True:
+            for lane in self.PRIORITY:
+                if self.lanes[lane]:
+                    return self.lanes[lane].popleft()
+            self._ready.clear()
+            await self._ready.wait()
+
+    def take_audio(self, codec, max_bytes):
+        """Pop audio items already queued behind the current one, while they share `codec` and fit in `max_bytes`."""
+        lane = self.lanes["audio"]
+        taken = []
+        while lane and lane[0]["codec"] == codec and len(lane[0]["data"]) <= max_bytes:
+            max_bytes -= len(lane[0]["data"])
+            taken.append(lane.popleft())
+        return taken
+
+    def requeue(self, items):
+        """Put back items that could not be sent, ahead of everything else in their lanes."""
+        for item in reversed(items):
+            self.lanes[item["type"]].appendleft(item)
+        self._ready.set()
+
+    def requeue_failed(self, items, max_attempts):
+        """Requeue items whose send raised, except those that have now failed `max_attempts` times.
+
+        Returns the items given up on.
+        """
+        retry, dropped = [], []
+        for item in items:
+            item["attempts"] = item.get("attempts", 0) + 1
+            (dropped if item["attempts"] >= max_attempts else retry).append(item)
+        self.requeue(retry)
+        return dropped
+
+    def expire(self, lane, max_age):
+        """Drop items in `lane` older than `max_age` seconds; returns how many were dropped."""
+        queue = self.lanes[lane]
+        cutoff = time.perf_counter() - max_age
+        dropped = 0
+        while queue and queue[0]["t"] < cutoff:
+            queue.popleft()
+            dropped += 1
+        return dropped
+
+    def stats(self):
+        return {
+            lane: {
+                "depth": len(self.lanes[lane]),
+                "capacity": self.LANE_SIZES[lane],
+                "enqueued": self.enqueued[lane],
+                "dropped": self.dropped[lane],
+            }
+            for lane in self.PRIORITY
+        }
 
 
 async def run_live_session(session_id, sid):
     if session_id in live_sessions and live_sessions[session_id].get("active"):
         live_sessions[session_id]["sid"] = sid
-        socketio.emit("live_session_started", {"status": "reconnected", "user_name": user_name}, room=sid)
+        socketio.emit("live_session_started", {
+            "status": "reconnected", "user_name": session_user_name(session_id), "codec": session_codecs.get(session_id, PCM),
+        }, room=sid)
         return
 
-    max_reconnects = 5
     reconnect_count = 0
-
-    while reconnect_count < max_reconnects:
-        input_queue = asyncio.Queue(maxsize=100)
-        loop = asyncio.get_event_loop()
-        bridge = SessionBridge(loop)
-        bridge.queue = input_queue
-        bridges[session_id] = bridge
-
+    disconnected_at = None
+    opus = None
+
+    def get_opus():
+        # Created on first use and kept across reconnects, since Opus state spans packets
+        nonlocal opus
+        if opus is None:
+            opus = OpusCodec(frame_ms=OPUS_FRAME_MS, bitrate=OPUS_BITRATE)
+        return opus
+
+    # Grounding state outlives reconnects: a resumed session still has the passages already sent
+    recent_input = collections.deque(maxlen=GROUNDING_QUERY_WORDS)
+    sent_passages = set()
+    last_grounding_at = 0.0
+
+    async def push_grounding(transcript):
+        """Queue the top passages for what the user has just said, skipping ones already sent."""
+        nonlocal last_grounding_at
+        recent_input.extend(transcript.split())
+        now = time.monotonic()
+        if not len(grounding_index) or now - last_grounding_at < GROUNDING_MIN_INTERVAL:
+            return
+        last_grounding_at = now
+        # Scoring a large corpus can take milliseconds; keep it off the session loop
+        results = await asyncio.to_thread(grounding_index.search, " ".join(recent_input), GROUNDING_TOP_K, GROUNDING_MIN_SCORE)
+        snippets = [snippet for snippet in results if snippet["id"] not in sent_passages]
+        bridge = bridges.get(session_id)
+        if not snippets or bridge is None:
+            return
+        sent_passages.update(snippet["id"] for snippet in snippets)
+        bridge.put_nowait({"type": "text", "data": format_snippets(snippets), "turn_complete": False, "t": time.perf_counter()})
+        metrics.inc("grounding_snippets_total", len(snippets), session_id)
+        session_log.debug("[GROUNDING] Pushed %d passage(s): %s", len(snippets),
+                          ", ".join(f"{s['source']}@{s['score']}" for s in snippets), extra={"session_id": session_id})
+
+    loop = asyncio.get_running_loop()
+    # One bridge for the whole session: audio captured while reconnecting waits here and is replayed
+    bridge = SessionBridge(session_engine, session_id)
+    bridges[session_id] = bridge
+    backoff = Backoff(RECONNECT_BASE_DELAY, RECONNECT_MAX_DELAY, RECONNECT_BUDGET)
+    system_prompt = None
+    base_config = None
+    client = None
+    connected_once = False
+
+    while True:
         try:
-            # Check for a stored resumption handle
-            stored_handle = load_session_handle(session_id)
+            # Both stores are SQLite behind locks shared with other threads; keep them off the session loop
+            stored_handle = await asyncio.to_thread(load_session_handle, session_id)
+            # Without a handle the model starts blank, so seed it with what the history store remembers
+            summary = await asyncio.to_thread(history_store.summary, session_id) if HISTORY_SUMMARY and not stored_handle else None
+            # Read on every connection, so a name or instructions saved on any worker apply after a reconnect
+            profile = await asyncio.to_thread(load_profile, session_clients.get(session_id, DEFAULT_CLIENT_ID))
+            # The config is rebuilt only when the prompt changed; a reconnect just swaps in the handle
+            prompt = get_live_system_prompt(summary, profile)
+            if prompt != system_prompt:
+                system_prompt, base_config = prompt, build_live_config(prompt)
             if stored_handle:
-                logging.info(f"[SESSION] Using resumption handle for {session_id} (reconnect #{reconnect_count})")
-            resumption_config = types.SessionResumptionConfig(
-                handle=stored_handle,
-                transparent=True,
-            )
+                session_log.info("[SESSION] Using resumption handle (reconnect #%d)", reconnect_count, extra={"session_id": session_id})
+            config = with_resumption(base_config, stored_handle)
 
-            config = types.LiveConnectConfig(
-                response_modalities=["AUDIO"],
-                system_instruction=get_live_system_prompt(),
-                media_resolution=types.MediaResolution.MEDIA_RESOLUTION_MEDIUM,
-                speech_config=types.SpeechConfig(
-                    voice_config=types.VoiceConfig(
-                        prebuilt_voice_config=types.PrebuiltVoiceConfig(voice_name="Aoede")
-                    )
-                ),
-                realtime_input_config=types.RealtimeInputConfig(
-                    automatic_activity_detection=types.AutomaticActivityDetection(
-                        disabled=False,
-                        start_of_speech_sensitivity=types.StartSensitivity.START_SENSITIVITY_LOW,
-                        end_of_speech_sensitivity=types.EndSensitivity.END_SENSITIVITY_LOW,
-                        prefix_padding_ms=20,
-                        silence_duration_ms=100,
-                    )
-                ),
-                input_audio_transcription=types.AudioTranscriptionConfig(),
-                output_audio_transcription=types.AudioTranscriptionConfig(),
-                session_resumption=resumption_config,
-            )
-
-            client = get_active_client()
+            if client is None:
+                # The first call may discover default credentials; keep it off the session loop
+                client = await asyncio.to_thread(get_active_client, profile)
             if client is None:
                 current_sid = starting_session_sids.get(session_id, sid)
                 socketio.emit("live_session_error", {
@@ -229,70 +633,184 @@ async def run_live_session(session_id, sid):
                 break
 
             # Connect directly to the configured model
-            logging.info(f"[LIVE] Connecting to model: {GEMINI_LIVE_MODEL}")
+            session_log.info("[LIVE] Connecting to model: %s", GEMINI_LIVE_MODEL, extra={"session_id": session_id})
             try:
               async with client.aio.live.connect(model=GEMINI_LIVE_MODEL, config=config) as session:
-                logging.info(f"[LIVE] ✅ Connected to {GEMINI_LIVE_MODEL}")
-                current_sid = starting_session_sids.get(session_id, sid)
+                session_log.info("[LIVE] ✅ Connected to %s", GEMINI_LIVE_MODEL, extra={"session_id": session_id})
+                connected_once = True
+                connected_at = time.perf_counter()
+                if disconnected_at is not None:
+                    resume_seconds = connected_at - disconnected_at
+                    expired = bridge.expire("audio", RECONNECT_REPLAY_SECONDS)
+                    replayed = len(bridge.lanes["audio"])
+                    metrics.observe("reconnect_duration_seconds", resume_seconds, session_id)
+                    metrics.inc("reconnects_total", session_id=session_id)
+                    metrics.inc("reconnect_replayed_total", replayed, session_id)
+                    metrics.inc("reconnect_expired_total", expired, session_id)
+                    session_log.info("[LIVE] Resumed after %.2fs (attempt %d), replaying %d audio chunk(s), %d expired",
+                                     resume_seconds, backoff.attempt, replayed, expired, extra={"session_id": session_id})
+                    disconnected_at = None
+                # After a reconnect, keep whichever socket the client attached most recently
+                current_sid = starting_session_sids.get(session_id) or live_sessions.get(session_id, {}).get("sid", sid)
                 live_sessions[session_id] = {"active": True, "sid": current_sid}
                 starting_sessions.discard(session_id)
                 starting_session_sids.pop(session_id, None)
-                socketio.emit("live_session_started", {"status": "connected", "user_name": user_name}, room=current_sid)
+                socketio.emit("live_session_started", {
+                    "status": "resumed" if reconnect_count else "connected", "user_name": profile["name"], "codec": session_codecs.get(session_id, PCM),
+                }, room=current_sid)
+
+                speech_ended_at = None
+
+                pending_encodes = []
+
+                def send_audio_frame(data, mime_type, codec=PCM):
+                    nonlocal speech_ended_at
+                    state = live_sessions.get(session_id)
+                    if state is None:
+                        return
+                    if speech_ended_at is not None:
+                        metrics.observe("response_latency_seconds", time.perf_counter() - speech_ended_at, session_id)
+                        speech_ended_at = None
+                    metrics.inc("bytes_total", len(data), session_id, direction="out", media="audio")
+                    metrics.inc("audio_out_frames_total", session_id=session_id)
+                    payload = {"audio": data, "mime_type": mime_type}
+                    if codec == OPUS:
+                        payload.update(codec=OPUS, frame_ms=OPUS_FRAME_MS)
+                    socketio.emit("audio_response", payload, room=state["sid"])
+
+                async def encode_audio(pcm, previous):
+                    # Frames are encoded one after another so they reach the client in order
+                    if previous is not None:
+                        await asyncio.wait([previous])
+                    codec = get_opus()
+                    encoded = await loop.run_in_executor(codec_pool, codec.encode, pcm)
+                    send_audio_frame(encoded, f"audio/opus;rate={codec.out_rate}", OPUS)
+
+                def emit_audio(data, mime_type):
+                    if session_codecs.get(session_id) != OPUS:
+                        send_audio_frame(data, mime_type)
+                        return
+                    previous = pending_encodes[-1] if pending_encodes else None
+                    task = loop.create_task(encode_audio(data, previous))
+                    pending_encodes.append(task)
+                    task.add_done_callback(pending_encodes.remove)
+
+                def flush_client_audio():
+                    for task in list(pending_encodes):
+                        task.cancel()
+                    state = live_sessions.get(session_id)
+                    if state is not None:
+                        socketio.emit("audio_flush", room=state["sid"])
+
+                # Aligned to Opus frames even for PCM clients, which may reconnect offering Opus mid-turn
+                outbound_audio = AudioCoalescer(loop, emit_audio, flush_client_audio, frame_ms=AUDIO_FRAME_MS,
+                                                max_hold=AUDIO_MAX_HOLD, align_ms=OPUS_FRAME_MS)
+
+                def decode_opus(codec, items):
+                    """Decode each Opus item on its own; runs on the codec pool. Returns (decoded, failed)."""
+                    decoded, failed = [], []
+                    for queued in items:
+                        try:
+                            decoded.append({**queued, "data": codec.decode(queued["data"]), "codec": PCM})
+                        except Exception as e:
+                            failed.append((queued, e))
+                    return decoded, failed
 
                 async def sender_loop():
-                    while live_sessions.get(session_id, {}).get("active"):
+                    while True:
+                        items = [await bridge.get()]
+                        item = items[0]
+                        if item["type"] == "audio":
+                            # Merge audio that queued up behind this chunk into a single send
+                            items += bridge.take_audio(item["codec"], UPSTREAM_AUDIO_BATCH_BYTES - len(item["data"]))
+                            if item["codec"] == OPUS:
+                                # Decoded before the send, so a payload the client garbled is dropped on its own
+                                # instead of failing the send and costing the connection a reconnect
+                                try:
+                                    items, failed = await loop.run_in_executor(codec_pool, decode_opus, get_opus(), items)
+                                except asyncio.CancelledError:
+                                    bridge.requeue(items)
+                                    raise
+                                if failed:
+                                    metrics.inc("audio_decode_failed_total", len(failed), session_id)
+                                    audio_log.warning("[AUDIO] Dropped %d undecodable Opus chunk(s): %s: %s", len(failed),
+                                                      type(failed[0][1]).__name__, failed[0][1], extra={"session_id": session_id})
+                                if not items:
+                                    continue
                         try:
-                            item = await asyncio.wait_for(input_queue.get(), timeout=0.5)
                             if item["type"] == "audio":
-                                await session.send_realtime_input(audio=item["data"])
+                                audio = b"".join(queued["data"] for queued in items)
+                                await session.send_realtime_input(audio=types.Blob(mime_type="audio/pcm;rate=16000", data=audio))
+                                sent_at = time.perf_counter()
+                                for queued in items:
+                                    metrics.observe("audio_upstream_latency_seconds", sent_at - queued["t"], session_id)
+                                metrics.inc("upstream_audio_sends_total", session_id=session_id)
+                                metrics.inc("upstream_audio_chunks_total", len(items), session_id)
                             elif item["type"] == "video":
                                 await session.send_realtime_input(video=item["data"])
                             elif item["type"] == "text":
                                 await session.send_client_content(
                                     turns=types.Content(role="user", parts=[types.Part(text=item["data"])]),
-                                    turn_complete=True,
+                                    turn_complete=item.get("turn_complete", True),
                                 )
-                            input_queue.task_done()
-                        except asyncio.TimeoutError:
-                            continue
+                        except asyncio.CancelledError:
+                            # The connection is going away mid-send; keep the items for the next one
+                            bridge.requeue(items)
+                            raise
                         except Exception as e:
-                            logging.error(f"Send error: {e}")
+                            # Keep the items for the next connection and let the session reconnect, but give up
+                            # on any that already failed once: a malformed item would fail on every connection
+                            dropped = bridge.requeue_failed(items, UPSTREAM_SEND_ATTEMPTS)
+                            for lane in {queued["type"] for queued in dropped}:
+                                metrics.inc("send_failed_dropped_total", sum(q["type"] == lane for q in dropped),
+                                            session_id, lane=lane)
+                            session_log.error("[LIVE] Send error: %s: %s (%d item(s) dropped)", type(e).__name__, e,
+                                              len(dropped), extra={"session_id": session_id})
+                            return "error"
 
                 async def receiver_loop():
+                    nonlocal speech_ended_at
                     try:
-                        while live_sessions.get(session_id, {}).get("active"):
+                        while True:
                             async for response in session.receive():
-                                if not live_sessions.get(session_id, {}).get("active"):
-                                    return "ended"
                                 current_sid = live_sessions[session_id]["sid"]
 
                                 # Handle session resumption updates
                                 if hasattr(response, 'session_resumption_update') and response.session_resumption_update:
                                     update = response.session_resumption_update
                                     if update.resumable and update.new_handle:
-                                        save_session_handle(session_id, update.new_handle)
-                                        logging.info(f"[SESSION] ✅ Resumption handle updated for {session_id}")
+                                        await asyncio.to_thread(save_session_handle, session_id, update.new_handle)
+                                        session_log.info("[SESSION] ✅ Resumption handle updated", extra={"session_id": session_id})
+
+                                # Barge-in: drop model audio the user has talked over and stop client playback
+                                if response.server_content and response.server_content.interrupted:
+                                    discarded = outbound_audio.stats()["buffered_bytes"]
+                                    outbound_audio.interrupt()
+                                    metrics.inc("interruptions_total", session_id=session_id)
+                                    metrics.inc("audio_out_discarded_bytes_total", discarded, session_id)
+                                    audio_log.info("[AUDIO] Interrupted, discarded %d buffered bytes", discarded,
+                                                   extra={"session_id": session_id})
 
                                 if response.server_content and response.server_content.model_turn:
                                     for part in response.server_content.model_turn.parts:
                                         if part.text:
-                                            logging.info(f"[TRANSCRIPTION] Output: {part.text}")
+                                            transcript_log.debug("[TRANSCRIPTION] Output: %s", part.text, extra={"session_id": session_id})
                                             socketio.emit("text_response", {"text": part.text}, room=current_sid)
                                         if part.inline_data:
-                                            logging.info(f"[AUDIO] Sending audio chunk ({len(part.inline_data.data)} bytes)")
-                                            audio_b64 = base64.b64encode(part.inline_data.data).decode("utf-8")
-                                            socketio.emit("audio_response", {
-                                                "audio": audio_b64,
-                                                "mime_type": part.inline_data.mime_type,
-                                            }, room=current_sid)
+                                            sampled_debug(audio_log, "audio_out", "[AUDIO] Buffering audio part (%d bytes)",
+                                                          len(part.inline_data.data), session_id=session_id)
+                                            metrics.inc("audio_out_parts_total", session_id=session_id)
+                                            outbound_audio.push(part.inline_data.data, part.inline_data.mime_type)
 
                                 # Handle input audio transcription (what the user said)
                                 if response.server_content and response.server_content.input_transcription:
                                     transcript = response.server_content.input_transcription.text
-                                    logging.info(f"[TRANSCRIPTION] Input: {transcript}")
+                                    transcript_log.debug("[TRANSCRIPTION] Input: %s", transcript, extra={"session_id": session_id})
                                     if transcript:
+                                        speech_ended_at = time.perf_counter()
                                         socketio.emit("input_transcription", {"text": transcript}, room=current_sid)
-                                        save_transcript(session_id, "User", transcript)
+                                        transcript_sink.add(session_id, "User", transcript)
+                                        loop.create_task(push_grounding(transcript))
 
                                 # Log the raw server_content keys for debugging
                                 if response.server_content:
@@ -302,54 +820,96 @@ async def run_live_session(session_id, sid):
                                     has_output_transcription = hasattr(sc, 'output_transcription') and sc.output_transcription is not None
                                     has_turn_complete = sc.turn_complete
                                     if has_model_turn or has_input_transcription or has_output_transcription or has_turn_complete:
-                                        logging.info(f"[SERVER_CONTENT] model_turn={has_model_turn}, input_transcription={has_input_transcription}, output_transcription={has_output_transcription}, turn_complete={has_turn_complete}")
+                                        sampled_debug(session_log, "server_content",
+                                                      "[SERVER_CONTENT] model_turn=%s, input_transcription=%s, output_transcription=%s, turn_complete=%s",
+                                                      has_model_turn, has_input_transcription, has_output_transcription, has_turn_complete,
+                                                      session_id=session_id)
 
                                     # Clear transcript on turn completion so old text disappears
+                                    if has_turn_complete or sc.generation_complete:
+                                        outbound_audio.flush()
                                     if has_turn_complete:
                                         socketio.emit("clear_transcript", room=current_sid)
+                                        transcript_sink.end_turn(session_id)
 
                                     # Also check output_transcription if it exists separately
                                     if has_output_transcription:
-                                        logging.info(f"[TRANSCRIPTION] Output (via output_transcription): {sc.output_transcription.text}")
+                                        transcript_log.debug("[TRANSCRIPTION] Output (via output_transcription): %s", sc.output_transcription.text,
+                                                             extra={"session_id": session_id})
                                         if sc.output_transcription.text:
                                             socketio.emit("text_response", {"text": sc.output_transcription.text}, room=current_sid)
-                                            save_transcript(session_id, "Assistant", sc.output_transcription.text)
+                                            transcript_sink.add(session_id, "Assistant", sc.output_transcription.text)
                     except asyncio.CancelledError:
                         return "cancelled"
                     except Exception as e:
+                        session_log.error("[LIVE] Receive error: %s: %s", type(e).__name__, e, exc_info=True,
+                                          extra={"session_id": session_id})
                         return "error"
-                    return "ended"
 
+                # Runs until the upstream fails on either side or the client stops the session
                 sender_task = asyncio.create_task(sender_loop())
                 receiver_task = asyncio.create_task(receiver_loop())
-                done, pending = await asyncio.wait([sender_task, receiver_task], return_when=asyncio.FIRST_COMPLETED)
-                
+                stop_task = asyncio.create_task(bridge.stopped.wait())
+                done, pending = await asyncio.wait([sender_task, receiver_task, stop_task], return_when=asyncio.FIRST_COMPLETED)
+
                 for task in pending:
                     task.cancel()
+                # Deliver the tail of the last turn if only the upstream connection dropped
+                outbound_audio.flush()
+                outbound_audio.close()
 
-              session_active = live_sessions.get(session_id, {}).get("active", False)
-              if session_active:
-                  reconnect_count += 1
-                  await asyncio.sleep(1)
-                  continue
-              else:
+              if bridge.stopped.is_set():
                   break
+              if time.perf_counter() - connected_at >= RECONNECT_STABLE_SECONDS:
+                  backoff.reset()
+              disconnected_at = time.perf_counter()
+              session_log.warning("[LIVE] Upstream connection dropped", extra={"session_id": session_id})
             except Exception as e:
-                logging.error(f"[LIVE] ❌ Failed to connect to {GEMINI_LIVE_MODEL}: {type(e).__name__}: {e}")
-                current_sid = starting_session_sids.get(session_id, sid)
-                socketio.emit("live_session_error", {
-                    "error": f"Failed to connect to {GEMINI_LIVE_MODEL}. Check server logs.",
-                    "code": 500
-                }, room=current_sid)
-                break
+                if not connected_once:
+                    session_log.error("[LIVE] ❌ Failed to connect to %s: %s: %s", GEMINI_LIVE_MODEL, type(e).__name__, e,
+                                      extra={"session_id": session_id})
+                    current_sid = starting_session_sids.get(session_id, sid)
+                    socketio.emit("live_session_error", {
+                        "error": f"Failed to connect to {GEMINI_LIVE_MODEL}. Check server logs.",
+                        "code": 500
+                    }, room=current_sid)
+                    break
+                session_log.warning("[LIVE] Reconnect attempt %d failed: %s: %s", backoff.attempt, type(e).__name__, e,
+                                    extra={"session_id": session_id})
+                metrics.inc("reconnect_failures_total", session_id=session_id)
+                # Fetch the client again in case its credentials or transport went bad
+                client = None
+                if disconnected_at is None:
+                    disconnected_at = time.perf_counter()
 
         except Exception as e:
-            logging.error(f"Session error: {e}")
+            session_log.error("[SESSION] Session error: %s", e, extra={"session_id": session_id})
             break
 
+        delay = backoff.next_delay()
+        if delay is None:
+            session_log.error("[LIVE] Gave up reconnecting after %.0fs", RECONNECT_BUDGET, extra={"session_id": session_id})
+            break
+        reconnect_count += 1
+        # Prepare the client while waiting out the delay, so the attempt itself is only the handshake
+        if client is None:
+            client = await asyncio.to_thread(get_active_client, profile)
+        try:
+            await asyncio.wait_for(bridge.stopped.wait(), delay)
+            break
+        except asyncio.TimeoutError:
+            pass
+
     if session_id in bridges:
         del bridges[session_id]
-    has_handle = load_session_handle(session_id) is not None
+    transcript_sink.end_turn(session_id)
+    metrics.drop_session(session_id)
+    forget_session(session_id)
+    starting_session_sids.pop(session_id, None)
+    session_codecs.pop(session_id, None)
+    session_clients.pop(session_id, None)
+    session_registry.release(session_id, WORKER_ID)
+    has_handle = await asyncio.to_thread(load_session_handle, session_id) is not None
     if session_id in live_sessions:
         final_sid = live_sessions[session_id]["sid"]
         del live_sessions[session_id]
@@ -360,103 +920,304 @@ async def run_live_session(session_id, sid):
     starting_sessions.discard(session_id)
 
 
-def start_background_loop(session_id, sid):
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        loop.run_until_complete(run_live_session(session_id, sid))
-    finally:
-        loop.close()
-
-
 @socketio.on("connect")
 def handle_connect():
     pass
 
 @socketio.on("disconnect")
 def handle_disconnect():
-    pass
+    sid = request.sid
+    # Sessions this socket started or attached to here become orphans; queued starts are dropped
+    for session_id in session_supervisor.detach(sid):
+        abandon_start(session_id)
+    for session_id in remote_attachments.pop(sid, ()):
+        owner = session_registry.owner(session_id)
+        if owner and owner != WORKER_ID:
+            session_registry.relay(owner, {"type": "detach", "session_id": session_id, "sid": sid})
+
+def stop_session(session_id):
+    """End a live session hosted on this worker; its loop wakes up immediately."""
+    live_sessions[session_id]["active"] = False
+    bridge = bridges.get(session_id)
+    if bridge is not None:
+        bridge.stop()
+
+def media_item(kind, data, codec=PCM):
+    """Build a SessionBridge item from a raw payload received from a client."""
+    received_at = time.perf_counter()
+    if kind == "audio":
+        # Kept as raw bytes so the sender can merge chunks; Opus is decoded there, chunk by chunk, on the codec pool
+        return {"type": "audio", "data": data, "codec": codec, "t": received_at}
+    if kind == "video":
+        return {"type": "video", "data": types.Blob(mime_type="image/jpeg", data=data), "t": received_at}
+    return {"type": "text", "data": data, "t": received_at}
+
+def deliver(session_id, kind, data, codec=PCM):
+    """Queue media for a session on this worker, or relay it to the worker that owns it."""
+    if kind != "text":
+        sampled_debug(audio_log if kind == "audio" else video_log, f"{kind}_in",
+                      "[%s] Received %s chunk (%d bytes)", kind.upper(), kind, len(data), session_id=session_id)
+    bridge = bridges.get(session_id)
+    # Only sessions hosted here get a per-session series; it is dropped when the session ends
+    metrics.inc("bytes_total", len(data), session_id if bridge is not None else None, direction="in", media=kind)
+    if bridge is not None:
+        session_supervisor.touch(session_id)
+        bridge.put_nowait(media_item(kind, data, codec))
+        return
+    owner = session_registry.owner(session_id)
+    if owner and owner != WORKER_ID:
+        session_registry.relay(owner, {"type": kind, "session_id": session_id, "data": data, "codec": codec})
+
+def session_is_live(session_id):
+    """True if this worker or another registered worker currently hosts the session."""
+    return session_id in bridges or session_registry.owner(session_id) not in (None, WORKER_ID)
+
+def handle_relay(message):
+    """Apply an event that another worker received for a session owned by this worker."""
+    session_id = message["session_id"]
+    kind = message["type"]
+    if kind == "attach":
+        if session_id in live_sessions:
+            live_sessions[session_id]["sid"] = message["sid"]
+            session_supervisor.attach(session_id, message["sid"])
+            if message.get("codecs") is not None:
+                session_codecs[session_id] = negotiate(message["codecs"])
+            socketio.emit("live_session_started", {
+                "status": "reconnected", "user_name": session_user_name(session_id), "codec": session_codecs.get(session_id, PCM),
+            }, room=message["sid"])
+    elif kind == "stop":
+        if session_id in live_sessions:
+            stop_session(session_id)
+    elif kind == "detach":
+        session_supervisor.detach(message["sid"], session_id)
+    elif session_id in bridges:
+        session_supervisor.touch(session_id)
+        bridges[session_id].put_nowait(media_item(kind, message["data"], message.get("codec", PCM)))
+
+def renew_session_leases():
+    while True:
+        socketio.sleep(SESSION_LEASE_TTL / 3)
+        owned = set(live_sessions) | set(starting_sessions)
+        if owned:
+            try:
+                session_registry.renew(owned, WORKER_ID, SESSION_LEASE_TTL)
+            except Exception as e:
+                session_log.error("[REGISTRY] Lease renewal failed: %s", e)
+
+def supervise_sessions():
+    while True:
+        socketio.sleep(SUPERVISOR_INTERVAL)
+        expired, waiters = session_supervisor.reap()
+        for session_id, sid, reason in expired:
+            if session_id not in live_sessions:
+                continue
+            session_log.info("[SUPERVISOR] Stopping %s session", reason, extra={"session_id": session_id})
+            if reason == "idle":
+                socketio.emit("live_session_error", {
+                    "error": "Session closed after receiving no audio or video for a while.",
+                    "code": 408
+                }, room=sid)
+            stop_session(session_id)
+        for session_id, sid in waiters:
+            abandon_start(session_id)
+            socketio.emit("live_session_error", {
+                "error": "Timed out waiting for a free session slot. Please try again shortly.",
+                "code": 503
+            }, room=sid)
+
+session_registry.subscribe(WORKER_ID, handle_relay)
+socketio.start_background_task(renew_session_leases)
+socketio.start_background_task(supervise_sessions)
+
+def abandon_start(session_id):
+    """Forget a session that was being started on this worker and give up its lease."""
+    starting_sessions.discard(session_id)
+    starting_session_sids.pop(session_id, None)
+    session_codecs.pop(session_id, None)
+    session_clients.pop(session_id, None)
+    session_registry.release(session_id, WORKER_ID)
+
+def launch_session(session_id):
+    """Start an admitted session on the engine; called by the supervisor once it has a slot."""
+    sid = starting_session_sids.get(session_id)
+    if sid is None:
+        # Stopped or disconnected while it was queued
+        session_supervisor.release(session_id)
+        return
+    try:
+        future = session_engine.submit(session_id, lambda: run_live_session(session_id, sid))
+    except EngineFull:
+        abandon_start(session_id)
+        session_supervisor.release(session_id)
+        socketio.emit("live_session_error", {
+            "error": "Server is at capacity. Please try again shortly.",
+            "code": 503
+        }, room=sid)
+        return
+    future.add_done_callback(lambda _: session_supervisor.release(session_id))
 
 @socketio.on("start_live_session")
 def handle_start(data):
     session_id = data.get("session_id", "default")
     sid = request.sid
-    if session_id in bridges and session_id in live_sessions:
+    # A run that is stopping is not reattached; the start waits for it to end instead
+    if session_id in bridges and live_sessions.get(session_id, {}).get("active"):
         live_sessions[session_id]["sid"] = sid
-        emit("live_session_started", {"status": "reconnected", "user_name": user_name})
+        session_supervisor.attach(session_id, sid)
+        session_codecs[session_id] = negotiate(data.get("codecs"))
+        emit("live_session_started", {"status": "reconnected", "user_name": session_user_name(session_id),
+                                      "codec": session_codecs[session_id]})
         return
+    start_session(session_id, sid, data.get("codecs"), data.get("client_id") or DEFAULT_CLIENT_ID)
+
+def start_session(session_id, sid, codecs, client_id):
+    """Claim, admit and launch a session for the socket `sid`.
+
+    Runs from `start_live_session`, and again from the supervisor when the
+    start arrived while the session's previous run still held its slot.
+    """
     if session_id in starting_sessions:
         return
+    owner = session_registry.claim(session_id, WORKER_ID, SESSION_LEASE_TTL)
+    if owner != WORKER_ID:
+        # Another worker hosts this Live session; let it adopt the new socket
+        session_registry.relay(owner, {"type": "attach", "session_id": session_id, "sid": sid, "codecs": codecs})
+        remote_attachments.setdefault(sid, set()).add(session_id)
+        return
+    session_codecs[session_id] = negotiate(codecs)
+    session_clients[session_id] = client_id
     starting_sessions.add(session_id)
     starting_session_sids[session_id] = sid
-    t = threading.Thread(target=start_background_loop, args=(session_id, sid), daemon=True)
-    t.start()
+    outcome, position = session_supervisor.admit(session_id, sid, lambda: launch_session(session_id),
+                                                 retry=lambda: start_session(session_id, sid, codecs, client_id))
+    if outcome == QUEUED:
+        socketio.emit("live_session_queued", {"position": position}, room=sid)
+    elif outcome == RESTARTING:
+        # The previous run is still ending and clears this state as it goes; start over once it has released the slot
+        abandon_start(session_id)
+    elif outcome == FULL:
+        abandon_start(session_id)
+        socketio.emit("live_session_error", {
+            "error": "Server is at capacity. Please try again shortly.",
+            "code": 503
+        }, room=sid)
 
 @socketio.on("stop_live_session")
 def handle_stop(data):
     session_id = data.get("session_id")
     if session_id in live_sessions:
-        live_sessions[session_id]["active"] = False
+        stop_session(session_id)
+        emit("live_session_stopped")
+        return
+    if session_id and session_supervisor.cancel(session_id):
+        abandon_start(session_id)
+        emit("live_session_stopped")
+        return
+    owner = session_registry.owner(session_id) if session_id else None
+    if owner and owner != WORKER_ID:
+        session_registry.relay(owner, {"type": "stop", "session_id": session_id})
         emit("live_session_stopped")
 
 @socketio.on("check_session_status")
 def handle_check_session(data):
     session_id = data.get("session_id")
     if session_id in live_sessions:
+        # The client asks this after its socket reconnects; move the session to the new socket
+        live_sessions[session_id]["sid"] = request.sid
+        session_supervisor.attach(session_id, request.sid)
+        return {"active": True}
+    if session_id and session_is_live(session_id):
+        owner = session_registry.owner(session_id)
+        if owner and owner != WORKER_ID:
+            session_registry.relay(owner, {"type": "attach", "session_id": session_id, "sid": request.sid})
+            remote_attachments.setdefault(request.sid, set()).add(session_id)
         return {"active": True}
     return {"active": False}
 
 @socketio.on("send_audio")
 def handle_audio(data):
     session_id = data.get("session_id")
-    audio = data.get("audio")
-    if session_id in bridges and audio:
+    audio = as_bytes(data.get("audio"))
+    codec = data.get("codec", PCM)
+    # Audio for a session no worker hosts would only create gate state and metrics nobody frees
+    if session_id and audio and session_is_live(session_id):
+        if VOICE_GATE and codec == PCM:
+            # Opus chunks are not gated; judging them would mean decoding on the socket thread
+            decision, gated = get_session_state(session_id)["voice_gate"].process(audio)
+            metrics.inc("voice_gate_chunks_total", session_id=session_id, decision=decision)
+            if gated is None or decision == KEEPALIVE:
+                metrics.inc("voice_gate_bytes_saved_total", len(audio) - len(gated or b""), session_id)
+            if gated is None:
+                # Still streaming, just silent: that is not an idle session
+                session_supervisor.touch(session_id)
+                return
+            audio = gated
         try:
-            b = base64.b64decode(audio)
-            audio_blob = types.Blob(mime_type="audio/pcm;rate=16000", data=b)
-            bridges[session_id].put_nowait({"type": "audio", "data": audio_blob})
+            deliver(session_id, "audio", audio, codec)
         except Exception as e:
-            logging.error(f"Audio decode/send error: {e}")
+            audio_log.error("[AUDIO] Send error: %s", e, extra={"session_id": session_id})
 
 @socketio.on("send_camera_frame")
 def handle_video(data):
     session_id = data.get("session_id")
-    frame = data.get("frame")
-    if session_id in bridges and frame:
-        try:
-            frame_bytes = base64.b64decode(frame)
-            video_blob = types.Blob(mime_type="image/jpeg", data=frame_bytes)
-            bridges[session_id].put_nowait({"type": "video", "data": video_blob})
-        except Exception:
-            pass
+    frame = as_bytes(data.get("frame"))
+    if session_id and frame and session_is_live(session_id):
+        gate = get_session_state(session_id)["frame_gate"]
+        if not gate.admit(frame):
+            metrics.inc("frames_total", session_id=session_id, result="dropped")
+            sampled_debug(video_log, "frame_dropped", "[VIDEO] Frame dropped by gate", session_id=session_id)
+            return
+        if frame_normalizer is None:
+            forward_frame(session_id, gate, frame, 0)
+        else:
+            frame_normalizer.submit(session_id, frame, lambda data, saved: forward_frame(session_id, gate, data, saved))
+
+def forward_frame(session_id, gate, frame, saved):
+    """Deliver a frame that passed the gate; called from the normalizer's result thread.
+
+    `frame` is None when a newer frame from the same session replaced this
+    one while it waited for the normalizer.
+    """
+    if frame is None:
+        gate.discard()
+        metrics.inc("frames_total", session_id=session_id, result="superseded")
+        return
+    metrics.inc("frames_total", session_id=session_id, result="forwarded")
+    if frame_normalizer is not None:
+        metrics.observe("frame_bytes_saved", saved, session_id)
+        metrics.inc("frame_bytes_saved_total", saved, session_id)
+    try:
+        deliver(session_id, "video", frame)
+    except Exception:
+        pass
 
 @socketio.on("send_text_message")
 def handle_text(data):
     session_id = data.get("session_id")
     text = data.get("text")
-    if session_id in bridges and text:
-        bridges[session_id].put_nowait({"type": "text", "data": text})
+    if session_id and text:
+        deliver(session_id, "text", text)
 
 
 @app.route("/api/probe-models", methods=["POST"])
 def probe_models():
     """Test the configured model with generateContent."""
-    client = get_active_client()
+    client = get_active_client(load_profile(client_id_from_request()))
     if client is None:
         return jsonify({"error": "Not authenticated. Validate token first."}), 401
 
     try:
         client.models.generate_content(model=GEMINI_LIVE_MODEL, contents="say hi")
         result = {"model": GEMINI_LIVE_MODEL, "status": "ok", "api": "generateContent"}
-        logging.info(f"[PROBE] ✅ {GEMINI_LIVE_MODEL} works with generateContent")
+        auth_log.info("[PROBE] ✅ %s works with generateContent", GEMINI_LIVE_MODEL)
     except Exception as e:
         err_msg = str(e)
         if "not supported" in err_msg.lower():
             result = {"model": GEMINI_LIVE_MODEL, "status": "live_only", "message": "Not supported in generateContent (expected for live-only model)", "api": "generateContent"}
-            logging.info(f"[PROBE] ⚡ {GEMINI_LIVE_MODEL} is live-only")
+            auth_log.info("[PROBE] ⚡ %s is live-only", GEMINI_LIVE_MODEL)
         else:
             result = {"model": GEMINI_LIVE_MODEL, "status": "error", "message": err_msg, "api": "generateContent"}
-            logging.warning(f"[PROBE] ❌ {GEMINI_LIVE_MODEL} failed: {err_msg}")
+            auth_log.warning("[PROBE] ❌ %s failed: %s", GEMINI_LIVE_MODEL, err_msg)
 
     return jsonify({
         "current_live_model": GEMINI_LIVE_MODEL,
@@ -469,53 +1230,253 @@ def current_model():
 
 @app.route("/api/validate-token", methods=["POST"])
 def validate_token():
-    global session_credentials
+    client_id = client_id_from_request()
     data = request.json
     project_id = data.get("projectId")
     location = data.get("location", "us-central1")
     access_token = data.get("accessToken")
+    previous = load_profile(client_id)["oauth"]
     try:
-        creds = Credentials(token=access_token)
-        test_client = genai.Client(vertexai=True, project=project_id, location=location, credentials=creds)
-        test_client.models.generate_content(model=GEMINI_VALIDATE_MODEL, contents="ok")
-        session_credentials["oauth"] = {
-            "credentials": creds,
+        # A token that already passed validation is trusted for the rest of its lifetime
+        expires_at = client_pool.validated_until(project_id, location, access_token) if access_token else None
+        cached = expires_at is not None
+        if not cached:
+            expires_at = token_expires_at(access_token)
+            test_client = client_pool.get(project_id, location, access_token, expires_at=expires_at)
+            test_client.models.generate_content(model=GEMINI_VALIDATE_MODEL, contents="ok")
+            client_pool.remember_validation(project_id, location, access_token, expires_at)
+        if previous and previous["access_token"] != access_token:
+            client_pool.evict(previous["access_token"])
+        update_profile(client_id, oauth={
             "project_id": project_id,
             "location": location,
             "access_token": access_token,
-        }
-        return jsonify({"valid": True, "project": project_id})
+            "expires_at": expires_at,
+        })
+        return jsonify({"valid": True, "project": project_id, "cached": cached})
     except Exception as e:
+        if access_token:
+            client_pool.evict(access_token)
         return jsonify({"valid": False, "message": str(e)})
 
+@app.route("/api/client-pool", methods=["GET"])
+def client_pool_status():
+    return jsonify(client_pool.stats())
+
 @app.route("/api/auth-status", methods=["GET"])
 def auth_status():
-    if "oauth" in session_credentials:
-        return jsonify({"authenticated": True, "project": session_credentials["oauth"]["project_id"]})
-    return jsonify({"authenticated": False, "project": DEFAULT_PROJECT_ID, "using": "default"})
+    oauth = load_profile(client_id_from_request())["oauth"]
+    if oauth:
+        return jsonify({"authenticated": True, "project": oauth["project_id"]})
+    return jsonify({"authenticated": False, "project": default_project_id(), "using": "default"})
 
 @app.route("/api/logout", methods=["POST"])
 def logout():
-    global session_credentials
-    if "oauth" in session_credentials:
-        del session_credentials["oauth"]
+    client_id = client_id_from_request()
+    oauth = load_profile(client_id)["oauth"]
+    if oauth:
+        client_pool.evict(oauth["access_token"])
+        update_profile(client_id, oauth=None)
     return jsonify({"success": True})
 
 @app.route("/api/set-user-name", methods=["POST"])
 def set_user_name_route():
-    global user_name
-    user_name = request.json.get("name", "User")
-    return jsonify({"success": True, "name": user_name})
+    profile = update_profile(client_id_from_request(), name=request.json.get("name", DEFAULT_USER_NAME))
+    return jsonify({"success": True, "name": profile["name"]})
+
+@app.route("/api/get-user-name", methods=["GET"])
+def get_user_name_route():
+    return jsonify({"name": load_profile(client_id_from_request())["name"]})
 
 @app.route("/api/get-system-instructions", methods=["GET"])
 def get_system_instructions():
-    return jsonify({"instructions": custom_system_instructions})
+    return jsonify({"instructions": load_profile(client_id_from_request())["instructions"]})
 
 @app.route("/api/set-system-instructions", methods=["POST"])
 def set_system_instructions():
-    global custom_system_instructions
-    custom_system_instructions = request.json.get("instructions", "").strip()
-    return jsonify({"success": True, "instructions": custom_system_instructions})
+    profile = update_profile(client_id_from_request(), instructions=request.json.get("instructions", "").strip())
+    return jsonify({"success": True, "instructions": profile["instructions"]})
+
+@app.route("/api/engine-status", methods=["GET"])
+def engine_status():
+    return jsonify(session_engine.stats())
+
+@app.route("/api/session-slots", methods=["GET"])
+def session_slots():
+    return jsonify(session_supervisor.stats())
+
+@app.route("/api/frame-stats", methods=["GET"])
+def frame_stats():
+    session_id = request.args.get("session_id")
+    if session_id:
+        state = session_states.get(session_id)
+        if state is None:
+            return jsonify({"error": "Unknown session_id"}), 404
+        return jsonify({"session_id": session_id, **state["frame_gate"].stats()})
+    totals = {"sessions": 0, "forwarded": 0, "dropped_duplicate": 0, "dropped_rate": 0}
+    for _, state in session_states.items():
+        stats = state["frame_gate"].stats()
+        totals["sessions"] += 1
+        for key in ("forwarded", "dropped_duplicate", "dropped_rate"):
+            totals[key] += stats[key]
+    if frame_normalizer is not None:
+        totals["normalizer"] = frame_normalizer.stats()
+    return jsonify(totals)
+
+@app.route("/api/voice-stats", methods=["GET"])
+def voice_stats():
+    session_id = request.args.get("session_id")
+    if session_id:
+        state = session_states.get(session_id)
+        if state is None:
+            return jsonify({"error": "Unknown session_id"}), 404
+        return jsonify({"session_id": session_id, **state["voice_gate"].stats()})
+    totals = {"sessions": 0, "bytes_in": 0, "bytes_forwarded": 0, "bytes_saved": 0, "decisions": {}}
+    for _, state in session_states.items():
+        stats = state["voice_gate"].stats()
+        totals["sessions"] += 1
+        for key in ("bytes_in", "bytes_forwarded", "bytes_saved"):
+            totals[key] += stats[key]
+        for decision, count in stats["decisions"].items():
+            totals["decisions"][decision] = totals["decisions"].get(decision, 0) + count
+    return jsonify(totals)
+
+@app.route("/api/queue-stats", methods=["GET"])
+def queue_stats():
+    session_id = request.args.get("session_id")
+    if session_id:
+        bridge = bridges.get(session_id)
+        if bridge is None:
+            return jsonify({"error": "No active session for session_id"}), 404
+        return jsonify({"session_id": session_id, "lanes": bridge.stats()})
+    return jsonify({"sessions": {sid_key: bridge.stats() for sid_key, bridge in list(bridges.items())}})
+
+@app.route("/api/grounding", methods=["GET"])
+def grounding_status():
+    query = request.args.get("q")
+    data = grounding_index.stats()
+    if query:
+        data["results"] = grounding_index.search(query, GROUNDING_TOP_K)
+    return jsonify(data)
+
+@app.route("/api/grounding/reload", methods=["POST"])
+def grounding_reload():
+    return jsonify({"reloaded": grounding_index.reload(force=True), **grounding_index.stats()})
+
+def page_args():
+    return {
+        "since": parse_time(request.args.get("since")),
+        "until": parse_time(request.args.get("until")),
+        "limit": request.args.get("limit", 20, type=int),
+        "offset": request.args.get("offset", 0, type=int),
+    }
+
+def paginated(key, items, args):
+    next_offset = args["offset"] + len(items) if len(items) >= args["limit"] else None
+    return {key: items, "offset": args["offset"], "next_offset": next_offset}
+
+def history_api(view):
+    """Serve `view` only to callers presenting HISTORY_API_TOKEN as a bearer token; 404 while it is unset."""
+    @functools.wraps(view)
+    def guarded(*args, **kwargs):
+        if not HISTORY_API_TOKEN:
+            return jsonify({"error": "History API is disabled"}), 404
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip().encode(), HISTORY_API_TOKEN.encode()):
+            return jsonify({"error": "Unauthorized"}), 401
+        return view(*args, **kwargs)
+    return guarded
+
+@app.route("/api/history/sessions", methods=["GET"])
+@history_api
+def history_sessions():
+    try:
+        args = page_args()
+    except ValueError:
+        return jsonify({"error": "since and until must be epoch seconds or ISO 8601"}), 400
+    return jsonify(paginated("sessions", history_store.sessions(**args), args))
+
+@app.route("/api/history/sessions/<session_id>", methods=["GET"])
+@history_api
+def history_session(session_id):
+    try:
+        args = page_args()
+    except ValueError:
+        return jsonify({"error": "since and until must be epoch seconds or ISO 8601"}), 400
+    summary = history_store.summary(session_id)
+    if summary is None:
+        return jsonify({"error": "Unknown session_id"}), 404
+    return jsonify({"session_id": session_id, "summary": summary,
+                    **paginated("turns", history_store.turns(session_id, **args), args)})
+
+@app.route("/api/history/search", methods=["GET"])
+@history_api
+def history_search():
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "q is required"}), 400
+    try:
+        args = page_args()
+    except ValueError:
+        return jsonify({"error": "since and until must be epoch seconds or ISO 8601"}), 400
+    order = "recent" if request.args.get("order") == "recent" else "relevance"
+    results = history_store.search(query, session_id=request.args.get("session_id"), order=order, **args)
+    return jsonify(paginated("results", results, args))
+
+@app.route("/api/history", methods=["GET"])
+def history_status():
+    return jsonify(history_store.stats())
+
+@app.route("/api/session-store", methods=["GET"])
+def session_store_status():
+    return jsonify({
+        "resumption_handles": session_resumption_handles.stats(),
+        "session_states": session_states.stats(),
+        "live_sessions": len(live_sessions),
+        "starting_sessions": len(starting_sessions),
+    })
+
+def bridge_depths():
+    depths = dict.fromkeys(SessionBridge.PRIORITY, 0)
+    for bridge in list(bridges.values()):
+        for lane, queue in bridge.lanes.items():
+            depths[lane] += len(queue)
+    return {(lane,): depth for lane, depth in depths.items()}
+
+metrics.gauge("bridge_queue_depth", "Items waiting in SessionBridge lanes across all sessions.", bridge_depths, ("lane",))
+metrics.gauge("live_sessions", "Live sessions hosted by this worker.", lambda: {(): len(live_sessions)})
+metrics.gauge("session_slots_used", "Session slots taken on this worker.",
+              lambda: {(): session_supervisor.stats()["slots_used"]})
+metrics.gauge("session_wait_queue_depth", "Sessions waiting for a free slot.",
+              lambda: {(): session_supervisor.stats()["waiting"]})
+
+def warm_default_client():
+    if default_project_id() or LIVE_BACKEND == "fake":
+        client_pool.get(default_project_id(), DEFAULT_LOCATION_ID)
+
+warmup = Warmup()
+warmup.add("genai_sdk", lambda: [module.load() for module in (genai, types, oauth2_credentials)])
+warmup.add("numpy", LazyModule("numpy").load)
+warmup.add("credentials", default_project_id)
+warmup.add("default_client", warm_default_client)
+warmup.add("live_config", lambda: build_live_config(get_live_system_prompt()))
+warmup.add("grounding_index", lambda: grounding_index.loaded.wait(60))
+if STATIC_ASSETS:
+    warmup.add("static_assets", static_assets.load)
+
+@app.route("/readyz", methods=["GET"])
+def readiness():
+    """200 once the warm-up has finished; 503 while it is still running."""
+    status = {"mode": STARTUP_MODE, **warmup.status()}
+    return jsonify(status), 200 if status["ready"] else 503
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    return Response(metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/api/metrics", methods=["GET"])
+def metrics_snapshot():
+    return jsonify(metrics.snapshot())
 
 @app.route("/api/list-files", methods=["GET"])
 def api_list_files():
@@ -527,18 +1488,40 @@ def api_clear_session_handle():
     session_id = data.get("session_id")
     if session_id:
         clear_session_handle(session_id)
-        logging.info(f"[SESSION] Cleared handle for {session_id} (new session requested)")
+        session_log.info("[SESSION] Cleared handle (new session requested)", extra={"session_id": session_id})
         return jsonify({"success": True})
     return jsonify({"success": False, "error": "No session_id provided"})
 
+def static_response(asset):
+    status, headers, body = asset.respond(request.headers.get("Accept-Encoding"), request.headers.get("If-None-Match"))
+    metrics.inc("static_responses_total", encoding=headers.get("Content-Encoding", "identity"), status=str(status))
+    return Response(body, status=status, headers=headers)
+
 @app.route("/")
 def serve_home():
+    if STATIC_ASSETS:
+        return static_response(static_assets.page("index.html"))
     return send_from_directory(".", "index.html")
 
 @app.route("/home")
 def serve_home_preview():
+    if STATIC_ASSETS:
+        return static_response(static_assets.page("home.html"))
     return send_from_directory(".", "home.html")
 
+@app.route("/assets/<path:name>")
+def serve_asset(name):
+    asset = static_assets.asset(name) if STATIC_ASSETS else None
+    if asset is None:
+        return "", 404
+    return static_response(asset)
+
+@app.route("/api/static-assets", methods=["GET"])
+def api_static_assets():
+    if not STATIC_ASSETS:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **static_assets.stats()})
+
 @app.route("/src/<path:filename>")
 def serve_src_files(filename):
     return send_from_directory("src", filename)
@@ -549,5 +1532,14 @@ def serve_style():
         return send_from_directory(".", "style.css")
     return "", 200
 
-if __name__ == "__main__":
-    socketio.run(app, host="0.0.0.0", port=8080, debug=False)
\ No newline at end of file
+if STARTUP_MODE == EAGER:
+    warmup.run()
+elif STARTUP_MODE == BACKGROUND:
+    # Under gunicorn the port is already bound; under `python serve.py` this runs alongside the bind
+    warmup.start()
+else:
+    warmup.skip()
+
+def main():
+    """Serve with the development server; `python serve.py` calls this."""
+    socketio.run(app, host="0.0.0.0", port=int(os.getenv("PORT", "8080")), debug=False, allow_unsafe_werkzeug=True)
\ No newline at end of file
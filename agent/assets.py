@@ -0,0 +1,384 @@
+"""Fingerprinted, precompressed static assets served from memory.
+
+The pages load `style.css` and a few ES modules under `src/`. Each of these
+is copied under a name that contains a hash of its content
+(`/assets/src/main.3f9a0c1b2d.js`), so a browser can cache it for a year
+and still fetch a new copy after a deploy. Imports between modules and the
+references in `index.html` and `home.html` are rewritten to the hashed
+names. Modules are hashed after the modules they import, so a change to
+`ui.js` also renames every module that imports it. Every file is kept in
+memory as-is, gzip-compressed and, when the optional `brotli` package is
+installed, brotli-compressed. Each encoding has its own strong ETag.
+
+The bundle is built on first use, or ahead of time with
+`python assets.py --out build/static`. A prebuilt bundle is only used while
+its recorded source hashes still match the files on disk.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import posixpath
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+log = logging.getLogger("agent.session")
+
+PAGES = ("index.html", "home.html")
+ASSET_GLOBS = ("style.css", "src/**/*.css", "src/**/*.js")
+ASSET_PREFIX = "/assets/"
+MANIFEST = "manifest.json"
+
+IDENTITY = "identity"
+GZIP = "gzip"
+BROTLI = "br"
+# Server preference when the client accepts several encodings equally
+ENCODINGS = (BROTLI, GZIP, IDENTITY)
+_SUFFIXES = {GZIP: ".gz", BROTLI: ".br"}
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+MIME_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+    ".js": "text/javascript; charset=utf-8",
+}
+
+HASH_LENGTH = 10
+MIN_COMPRESS_BYTES = 256
+
+# `from "x"`, `import "x"` and `import("x")` in a module
+_IMPORT_RE = re.compile(r"""(\bfrom\s*|\bimport\s*\(?\s*)(["'])([^"'\n]+)\2""")
+# Any quoted root-relative URL in a page: href, src and inline module imports
+_QUOTED_URL_RE = re.compile(r"""(["'])(/[^"'\s]+)\1""")
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hashed_name(path, digest):
+    """`src/features/agent.js` -> `src/features/agent.<hash>.js`"""
+    stem, dot, suffix = path.rpartition(".")
+    return f"{stem}.{digest[:HASH_LENGTH]}.{suffix}" if dot else f"{path}.{digest[:HASH_LENGTH]}"
+
+
+def compress(data):
+    """The encodings of `data` worth storing: identity, plus gzip and brotli where they are smaller."""
+    variants = {IDENTITY: data}
+    if len(data) < MIN_COMPRESS_BYTES:
+        return variants
+    # mtime=0 keeps the gzip output, and so its ETag, identical across builds
+    candidates = {GZIP: gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        candidates[BROTLI] = brotli.compress(data, quality=11)
+    for encoding, body in candidates.items():
+        if len(body) < len(data):
+            variants[encoding] = body
+    return variants
+
+
+def parse_accept_encoding(header):
+    """Map each coding in an Accept-Encoding header to its q-value."""
+    accepted = {}
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def select_encoding(available, header):
+    """Pick the best of `available` for an Accept-Encoding header, by q-value then server preference."""
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*")
+
+    def quality(encoding):
+        if encoding in accepted:
+            return accepted[encoding]
+        if wildcard is not None:
+            return wildcard
+        # identity is acceptable unless explicitly refused; anything else must be listed
+        return 1.0 if encoding == IDENTITY else 0.0
+
+    best = max((e for e in ENCODINGS if e in available), key=quality)
+    return best if quality(best) > 0 else IDENTITY
+
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison of an If-None-Match header against one entity tag, as RFC 9110 requires."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+
+class Asset:
+    """One file in every stored encoding."""
+
+    __slots__ = ("name", "mimetype", "digest", "immutable", "bodies")
+
+    def __init__(self, name, mimetype, digest, immutable, bodies):
+        self.name = name
+        self.mimetype = mimetype
+        self.digest = digest
+        self.immutable = immutable
+        self.bodies = bodies
+
+    def etag(self, encoding):
+        # Each encoding is a different representation, so each needs its own strong tag
+        suffix = "" if encoding == IDENTITY else f"-{encoding}"
+        return f'"{self.digest[:2 * HASH_LENGTH]}{suffix}"'
+
+    def respond(self, accept_encoding, if_none_match):
+        """Return (status, headers, body) for a GET with these request headers."""
+        encoding = select_encoding(self.bodies, accept_encoding)
+        etag = self.etag(encoding)
+        headers = {
+            "ETag": etag,
+            "Cache-Control": IMMUTABLE if self.immutable else REVALIDATE,
+            "Vary": "Accept-Encoding",
+        }
+        if etag_matches(if_none_match, etag):
+            return 304, headers, b""
+        headers["Content-Type"] = self.mimetype
+        if encoding != IDENTITY:
+            headers["Content-Encoding"] = encoding
+        return 200, headers, self.bodies[encoding]
+
+
+def find_sources(root):
+    """Relative paths of the pages and assets under `root`, pages first."""
+    root = Path(root)
+    pages = [name for name in PAGES if (root / name).is_file()]
+    assets = sorted({path.relative_to(root).as_posix() for pattern in ASSET_GLOBS for path in root.glob(pattern)
+                     if path.is_file()})
+    return pages, assets
+
+
+def module_imports(path, text):
+    """Source paths a module imports by relative or root-relative specifier."""
+    base = posixpath.dirname("/" + path)
+    deps = []
+    for match in _IMPORT_RE.finditer(text):
+        spec = match.group(3)
+        if spec.startswith(("./", "../", "/")):
+            deps.append(posixpath.normpath(posixpath.join(base, spec)).lstrip("/"))
+    return deps
+
+
+def dependency_order(modules):
+    """Order module paths so each comes after the modules it imports. Returns None on an import cycle."""
+    order, state = [], {}
+
+    def visit(path):
+        if state.get(path) == "done":
+            return True
+        if state.get(path) == "visiting":
+            return False
+        state[path] = "visiting"
+        for dep in modules[path]:
+            if dep in modules and not visit(dep):
+                return False
+        state[path] = "done"
+        order.append(path)
+        return True
+
+    for path in sorted(modules):
+        if not visit(path):
+            return None
+    return order
+
+
+def rewrite_imports(path, text, urls):
+    base = posixpath.dirname("/" + path)
+
+    def replace(match):
+        prefix, quote, spec = match.groups()
+        if not spec.startswith(("./", "../", "/")):
+            return match.group(0)
+        target = posixpath.normpath(posixpath.join(base, spec))
+        return f"{prefix}{quote}{urls.get(target, spec)}{quote}"
+
+    return _IMPORT_RE.sub(replace, text)
+
+
+def rewrite_urls(text, urls):
+    return _QUOTED_URL_RE.sub(lambda m: f"{m.group(1)}{urls.get(m.group(2), m.group(2))}{m.group(1)}", text)
+
+
+class AssetBundle:
+    """The hashed assets and rewritten pages, keyed by the name they are served under."""
+
+    def __init__(self, files, sources, built_from):
+        self.files = files
+        self.sources = sources
+        self.built_from = built_from
+        self.seconds = None
+
+    @classmethod
+    def build(cls, root):
+        root = Path(root)
+        pages, asset_paths = find_sources(root)
+        raw = {path: (root / path).read_bytes() for path in pages + asset_paths}
+        urls = {}  # original URL -> hashed URL
+        files = {}
+
+        def add(path, data, immutable):
+            digest = content_hash(data)
+            name = hashed_name(path, digest) if immutable else path
+            mimetype = MIME_TYPES.get(Path(path).suffix, "application/octet-stream")
+            files[name] = Asset(name, mimetype, digest, immutable, compress(data))
+            if immutable:
+                urls["/" + path] = ASSET_PREFIX + name
+
+        scripts = {path: raw[path].decode("utf-8") for path in asset_paths if path.endswith(".js")}
+        order = dependency_order({path: module_imports(path, text) for path, text in scripts.items()})
+        if order is None:
+            # A module in a cycle cannot be hashed after its imports; a module loaded under two URLs
+            # would also run twice, so leave every module at its original URL
+            log.warning("[ASSETS] Import cycle between modules under src/; scripts are served unhashed")
+            order = []
+        for path in asset_paths:
+            if path.endswith(".css"):
+                add(path, raw[path], immutable=True)
+        for path in order:
+            add(path, rewrite_imports(path, scripts[path], urls).encode("utf-8"), immutable=True)
+        for path in pages:
+            add(path, rewrite_urls(raw[path].decode("utf-8"), urls).encode("utf-8"), immutable=False)
+        sources = {path: content_hash(data) for path, data in raw.items()}
+        return cls(files, sources, "memory")
+
+    def write(self, out_dir):
+        """Save the bundle and a manifest of its source hashes to `out_dir`, replacing what was there."""
+        out_dir = Path(out_dir)
+        if out_dir.exists():
+            shutil.rmtree(out_dir)
+        manifest = {"sources": self.sources, "files": {}}
+        for name, asset in self.files.items():
+            target = out_dir / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            for encoding, body in asset.bodies.items():
+                target.with_name(target.name + _SUFFIXES.get(encoding, "")).write_bytes(body)
+            manifest["files"][name] = {
+                "mimetype": asset.mimetype,
+                "digest": asset.digest,
+                "immutable": asset.immutable,
+                "encodings": sorted(asset.bodies),
+            }
+        (out_dir / MANIFEST).write_text(json.dumps(manifest, indent=2, sort_keys=True))
+
+    @classmethod
+    def load(cls, out_dir, root):
+        """Read a bundle written by `write`, or return None if it is missing or its sources changed."""
+        out_dir = Path(out_dir)
+        try:
+            manifest = json.loads((out_dir / MANIFEST).read_text())
+        except (OSError, ValueError):
+            return None
+        pages, asset_paths = find_sources(root)
+        paths = pages + asset_paths
+        if sorted(paths) != sorted(manifest["sources"]):
+            return None
+        for path in paths:
+            if content_hash((Path(root) / path).read_bytes()) != manifest["sources"][path]:
+                return None
+        files = {}
+        for name, entry in manifest["files"].items():
+            target = out_dir / name
+            bodies = {encoding: target.with_name(target.name + _SUFFIXES.get(encoding, "")).read_bytes()
+                      for encoding in entry["encodings"]}
+            files[name] = Asset(name, entry["mimetype"], entry["digest"], entry["immutable"], bodies)
+        return cls(files, manifest["sources"], "prebuilt")
+
+    def stats(self):
+        return {
+            "built_from": self.built_from,
+            "seconds": self.seconds,
+            "brotli": brotli is not None,
+            "files": {
+                name: {
+                    "immutable": asset.immutable,
+                    "bytes": {encoding: len(body) for encoding, body in asset.bodies.items()},
+                }
+                for name, asset in sorted(self.files.items())
+            },
+        }
+
+
+class StaticAssets:
+    """Builds or loads the bundle once, on first use, and looks up files in it."""
+
+    def __init__(self, root, build_dir=None):
+        self.root = Path(root)
+        self.build_dir = Path(build_dir) if build_dir else None
+        self._bundle = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self._bundle is None:
+            with self._lock:
+                if self._bundle is None:
+                    started = time.perf_counter()
+                    bundle = AssetBundle.load(self.build_dir, self.root) if self.build_dir else None
+                    if bundle is None:
+                        if self.build_dir:
+                            log.info("[ASSETS] No current prebuilt bundle in %s; building in memory", self.build_dir)
+                        bundle = AssetBundle.build(self.root)
+                    bundle.seconds = round(time.perf_counter() - started, 4)
+                    log.info("[ASSETS] %d files (%s) ready in %.3fs", len(bundle.files), bundle.built_from, bundle.seconds)
+                    self._bundle = bundle
+        return self._bundle
+
+    def page(self, name):
+        return self.load().files.get(name)
+
+    def asset(self, name):
+        """A fingerprinted asset by its hashed name, or None."""
+        asset = self.load().files.get(name)
+        return asset if asset is not None and asset.immutable else None
+
+    def stats(self):
+        return self.load().stats()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the fingerprinted, precompressed static bundle.")
+    parser.add_argument("--root", default=str(Path(__file__).resolve().parent), help="directory holding the pages")
+    parser.add_argument("--out", default="build/static", help="output directory, replaced if it exists")
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+    bundle = AssetBundle.build(args.root)
+    bundle.write(args.out)
+    for name, entry in bundle.stats()["files"].items():
+        sizes = ", ".join(f"{encoding} {size}" for encoding, size in sorted(entry["bytes"].items()))
+        print(f"{name}: {sizes}")
+    print(f"{len(bundle.files)} files written to {args.out} in {time.perf_counter() - started:.2f}s"
+          f"{'' if brotli is not None else ' (brotli not installed: gzip only)'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Optional Opus codec for client audio in both directions.
+
+Clients that can encode and decode Opus (WebCodecs in the browser) offer it
+in `start_live_session`; everyone else keeps sending and receiving raw PCM.
+The Live API itself only takes and returns PCM, so the server decodes
+incoming Opus before `send_realtime_input` and encodes model audio before
+emitting it.
+
+On the wire, a batch of Opus packets is one binary payload of
+length-prefixed packets (2-byte big-endian length, then the packet), so it
+travels as a single Socket.IO attachment and through the registry relay
+unchanged.
+
+opuslib needs the system libopus; without it every session negotiates PCM.
+"""
+
+import struct
+import threading
+
+PCM = "pcm"
+OPUS = "opus"
+BYTES_PER_SAMPLE = 2
+_LENGTH = struct.Struct(">H")
+
+_opuslib = None
+_opus_checked = False
+_opus_lock = threading.Lock()
+
+
+def _load_opus():
+    global _opuslib, _opus_checked
+    with _opus_lock:
+        if not _opus_checked:
+            try:
+                import opuslib
+                _opuslib = opuslib
+            except Exception:
+                # opuslib raises a bare Exception when libopus itself is missing
+                _opuslib = None
+            _opus_checked = True
+    return _opuslib
+
+
+def opus_available():
+    return _load_opus() is not None
+
+
+def negotiate(offered):
+    """Pick the codec for a session from the list a client offered."""
+    if OPUS in (offered or ()) and opus_available():
+        return OPUS
+    return PCM
+
+
+def pack_packets(packets):
+    return b"".join(_LENGTH.pack(len(packet)) + packet for packet in packets)
+
+
+def unpack_packets(data):
+    packets = []
+    offset = 0
+    while offset + _LENGTH.size <= len(data):
+        (size,) = _LENGTH.unpack_from(data, offset)
+        offset += _LENGTH.size
+        packets.append(bytes(data[offset:offset + size]))
+        offset += size
+    return packets
+
+
+class OpusCodec:
+    """Per-session Opus decoder for client audio and encoder for model audio.
+
+    Opus state carries across packets, so each direction must be driven by
+    one caller at a time; `run_live_session` orders the calls and runs them
+    on a worker pool, and a lock per direction guards the codec state.
+    """
+
+    def __init__(self, in_rate=16000, out_rate=24000, frame_ms=20, bitrate=24000):
+        opuslib = _load_opus()
+        if opuslib is None:
+            raise RuntimeError("Opus requested but opuslib/libopus is not installed")
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.frame_ms = frame_ms
+        # A cancelled call can still be running on the pool when the next one starts
+        self._decode_lock = threading.Lock()
+        self._encode_lock = threading.Lock()
+        self._decoder = opuslib.Decoder(in_rate, 1)
+        self._encoder = opuslib.Encoder(out_rate, 1, opuslib.APPLICATION_VOIP)
+        self._encoder.bitrate = bitrate
+        self._out_frame_bytes = out_rate * frame_ms // 1000 * BYTES_PER_SAMPLE
+        # Largest packet Opus produces is 120 ms
+        self._max_in_samples = in_rate * 120 // 1000
+
+    def decode(self, data):
+        """Length-prefixed Opus packets -> 16-bit PCM at `in_rate`."""
+        with self._decode_lock:
+            return b"".join(self._decoder.decode(packet, self._max_in_samples) for packet in unpack_packets(data))
+
+    def encode(self, pcm):
+        """16-bit PCM at `out_rate` -> length-prefixed Opus packets.
+
+        PCM that does not fill the last frame is padded with silence.
+        `AudioCoalescer` with `align_ms` set to `frame_ms` only hands over
+        such a tail at the end of a turn, so speech is never cut by a gap.
+        """
+        frame_bytes = self._out_frame_bytes
+        remainder = len(pcm) % frame_bytes
+        if remainder:
+            pcm += bytes(frame_bytes - remainder)
+        frame_samples = frame_bytes // BYTES_PER_SAMPLE
+        with self._encode_lock:
+            return pack_packets([
+                self._encoder.encode(pcm[i:i + frame_bytes], frame_samples)
+                for i in range(0, len(pcm), frame_bytes)
+            ])
@@ -0,0 +1,116 @@
+"""Outbound audio stage: coalesces model audio into frames and flushes on barge-in.
+
+The Live API streams model audio as many small `inline_data` parts. Emitting
+each one as its own Socket.IO event costs a frame header, a binary attachment
+and a browser callback per part, so `AudioCoalescer` buffers parts and emits
+them in frames of `frame_ms` of audio. The first part of a turn is emitted
+as soon as it arrives so playback starts without waiting; after that a
+partially filled frame is emitted after at most `max_hold` seconds, and at
+the end of each model turn.
+
+Mid-turn emits are whole multiples of `align_ms` of audio, so an Opus
+encoder downstream never has to pad a frame with silence in the middle of
+speech; the leftover waits for the next part, and only the end of a turn
+emits a frame of any length.
+
+When the model reports that the user interrupted it, buffered audio that has
+not been sent is discarded and the client is told to stop playback.
+"""
+
+import re
+
+_RATE_RE = re.compile(r"rate=(\d+)")
+DEFAULT_SAMPLE_RATE = 24000
+BYTES_PER_SAMPLE = 2
+
+
+def sample_rate_of(mime_type):
+    match = _RATE_RE.search(mime_type or "")
+    return int(match.group(1)) if match else DEFAULT_SAMPLE_RATE
+
+
+class AudioCoalescer:
+    """Per-session buffer between `receiver_loop` and `audio_response` emits.
+
+    Must only be used from the session's event loop. `emit(data, mime_type)`
+    sends one frame and `flush_client()` tells the client to drop whatever it
+    has queued for playback.
+    """
+
+    def __init__(self, loop, emit, flush_client, frame_ms=200, max_hold=0.1, align_ms=None):
+        self.loop = loop
+        self.emit = emit
+        self.flush_client = flush_client
+        self.frame_ms = frame_ms
+        self.max_hold = max_hold
+        self.align_ms = align_ms
+        self._buffer = bytearray()
+        self._mime_type = None
+        self._frame_bytes = 0
+        self._align_bytes = BYTES_PER_SAMPLE
+        self._timer = None
+        self._in_turn = False
+        self.parts_in = 0
+        self.frames_out = 0
+        self.bytes_discarded = 0
+        self.interruptions = 0
+
+    def push(self, data, mime_type):
+        if mime_type != self._mime_type:
+            self.flush()
+            self._mime_type = mime_type
+            rate = sample_rate_of(mime_type)
+            self._frame_bytes = max(BYTES_PER_SAMPLE, rate * self.frame_ms // 1000 * BYTES_PER_SAMPLE)
+            if self.align_ms:
+                self._align_bytes = max(BYTES_PER_SAMPLE, rate * self.align_ms // 1000 * BYTES_PER_SAMPLE)
+        self.parts_in += 1
+        self._buffer += data
+        if not self._in_turn or len(self._buffer) >= self._frame_bytes:
+            # The first part of a turn goes out at once: holding it would only delay the response
+            self._in_turn = True
+            self._emit(self._align_bytes)
+        elif self._timer is None:
+            self._timer = self.loop.call_later(self.max_hold, self._emit, self._align_bytes)
+
+    def flush(self):
+        """End of a turn: emit whatever is buffered, keeping a trailing odd byte for the next frame."""
+        self._in_turn = False
+        self._emit(BYTES_PER_SAMPLE)
+
+    def _emit(self, align):
+        """Emit the largest whole multiple of `align` bytes that is buffered."""
+        self._cancel_timer()
+        size = len(self._buffer) - len(self._buffer) % align
+        if not size:
+            return
+        frame = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        self.frames_out += 1
+        self.emit(frame, self._mime_type)
+
+    def interrupt(self):
+        """Barge-in: drop unsent audio and stop client playback."""
+        self._cancel_timer()
+        self._in_turn = False
+        self.bytes_discarded += len(self._buffer)
+        self._buffer.clear()
+        self.interruptions += 1
+        self.flush_client()
+
+    def close(self):
+        self._cancel_timer()
+        self._buffer.clear()
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def stats(self):
+        return {
+            "parts_in": self.parts_in,
+            "frames_out": self.frames_out,
+            "buffered_bytes": len(self._buffer),
+            "bytes_discarded": self.bytes_discarded,
+            "interruptions": self.interruptions,
+        }
@@ -0,0 +1,132 @@
+"""Local stand-in for the Gemini Live API used by the load-test harness.
+
+`FakeLiveClient` implements the part of `genai.Client` that
+`run_live_session` uses: `client.aio.live.connect(...)` as an async context
+manager yielding a session with `send_realtime_input`,
+`send_client_content` and `receive()`. Responses are synthetic but shaped
+like the real ones (input transcription, audio parts, turn_complete and
+resumption updates), with configurable timing.
+
+Enable it in the server with LIVE_BACKEND=fake; the FAKE_LIVE_* variables
+in `FakeLiveConfig.from_env` tune its behaviour.
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from dataclasses import dataclass
+
+from google.genai import types
+
+
+@dataclass
+class FakeLiveConfig:
+    response_latency: float = 0.3  # seconds from end of user turn to first audio part
+    audio_chunk_bytes: int = 9600  # 200 ms of 24 kHz 16-bit PCM
+    chunks_per_turn: int = 5
+    chunk_interval: float = 0.05  # spacing between audio parts within a turn
+    turn_audio_seconds: float = 2.0  # seconds of 16 kHz user audio that make up one user turn
+    resumption_every: int = 10  # turns between session_resumption_update messages
+    disconnect_after: float = 0.0  # seconds before the fake drops the connection; 0 = never
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            response_latency=float(os.getenv("FAKE_LIVE_LATENCY_MS", "300")) / 1000,
+            audio_chunk_bytes=int(os.getenv("FAKE_LIVE_CHUNK_BYTES", "9600")),
+            chunks_per_turn=int(os.getenv("FAKE_LIVE_CHUNKS_PER_TURN", "5")),
+            chunk_interval=float(os.getenv("FAKE_LIVE_CHUNK_INTERVAL_MS", "50")) / 1000,
+            turn_audio_seconds=float(os.getenv("FAKE_LIVE_TURN_SECONDS", "2.0")),
+            resumption_every=int(os.getenv("FAKE_LIVE_RESUMPTION_EVERY", "10")),
+            disconnect_after=float(os.getenv("FAKE_LIVE_DISCONNECT_AFTER", "0")),
+        )
+
+
+class FakeLiveSession:
+    def __init__(self, config):
+        self.config = config
+        self.connected_at = time.monotonic()
+        self.audio_bytes = 0
+        self.turns = 0
+        self.bytes_received = 0
+        self._turn_requests = asyncio.Queue()
+        self._silence = bytes(config.audio_chunk_bytes)
+
+    def _check_connected(self):
+        if self.config.disconnect_after and time.monotonic() - self.connected_at > self.config.disconnect_after:
+            raise ConnectionResetError("fake Live server dropped the connection")
+
+    async def send_realtime_input(self, audio=None, video=None, **_):
+        self._check_connected()
+        if audio is not None:
+            self.bytes_received += len(audio.data)
+            turn_bytes = int(self.config.turn_audio_seconds * 16000 * 2)
+            turns_before = self.audio_bytes // turn_bytes
+            self.audio_bytes += len(audio.data)
+            for _ in range(self.audio_bytes // turn_bytes - turns_before):
+                self._turn_requests.put_nowait(time.monotonic())
+        if video is not None:
+            self.bytes_received += len(video.data)
+
+    async def send_client_content(self, turns=None, turn_complete=True, **_):
+        self._check_connected()
+        if turn_complete:
+            self._turn_requests.put_nowait(time.monotonic())
+
+    async def receive(self):
+        """Yield one model turn per request, mirroring the SDK's per-turn receive()."""
+        await self._turn_requests.get()
+        self._check_connected()
+        yield types.LiveServerMessage(server_content=types.LiveServerContent(
+            input_transcription=types.Transcription(text="What is this building?"),
+        ))
+        await asyncio.sleep(self.config.response_latency)
+        for i in range(self.config.chunks_per_turn):
+            self._check_connected()
+            yield types.LiveServerMessage(server_content=types.LiveServerContent(
+                model_turn=types.Content(role="model", parts=[types.Part(
+                    inline_data=types.Blob(mime_type="audio/pcm;rate=24000", data=self._silence),
+                )]),
+                output_transcription=types.Transcription(text=" word" if i else "This"),
+            ))
+            await asyncio.sleep(self.config.chunk_interval)
+        self.turns += 1
+        yield types.LiveServerMessage(server_content=types.LiveServerContent(turn_complete=True))
+        if self.config.resumption_every and self.turns % self.config.resumption_every == 0:
+            yield types.LiveServerMessage(session_resumption_update=types.LiveServerSessionResumptionUpdate(
+                new_handle=f"fake-{uuid.uuid4().hex}", resumable=True,
+            ))
+
+
+class _FakeConnection:
+    def __init__(self, config):
+        self.config = config
+
+    async def __aenter__(self):
+        await asyncio.sleep(0.05)  # handshake
+        return FakeLiveSession(self.config)
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class _FakeLive:
+    def __init__(self, config):
+        self.config = config
+
+    def connect(self, model=None, config=None):
+        return _FakeConnection(self.config)
+
+
+class _FakeAio:
+    def __init__(self, config):
+        self.live = _FakeLive(config)
+
+
+class FakeLiveClient:
+    """Drop-in for the `genai.Client` surface used by `run_live_session`."""
+
+    def __init__(self, config=None):
+        self.config = config or FakeLiveConfig.from_env()
+        self.aio = _FakeAio(self.config)
@@ -0,0 +1,256 @@
+"""Load-test driver: N synthetic Socket.IO clients streaming PCM and JPEG.
+
+Each client starts a live session, streams 16 kHz PCM every 500 ms and a
+camera frame every 2 s, and measures end-to-end latency from the audio
+chunk that completes a user turn to the first `audio_response` it gets back.
+Run it against a server started with LIVE_BACKEND=fake, or pass --spawn to
+start one:
+
+    python -m bench.loadtest --spawn --sessions 50 --duration 60
+    python -m bench.loadtest --spawn --ramp 10,25,50,100,200 --p95-slo 1.5 --json report.json
+
+Requires the packages in bench/requirements.txt.
+"""
+
+import argparse
+import io
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import psutil
+import socketio
+from PIL import Image
+
+SAMPLE_RATE = 16000
+AGENT_DIR = Path(__file__).resolve().parent.parent
+
+
+def make_pcm(seconds, freq=220.0, syllable_rate=4.0):
+    """A speech-level tone over a little noise, switched on and off at a syllable rate.
+
+    The gaps matter: the server's voice gate learns its noise floor from the
+    quietest frames of each chunk, so a steady tone would be learned as noise.
+    """
+    samples = int(SAMPLE_RATE * seconds)
+    out = bytearray()
+    for i in range(samples):
+        t = i / SAMPLE_RATE
+        envelope = 1.0 if math.sin(2 * math.pi * syllable_rate * t) > 0 else 0.0
+        value = 0.3 * envelope * math.sin(2 * math.pi * freq * t) + random.uniform(-0.02, 0.02)
+        out += int(value * 32767).to_bytes(2, "little", signed=True)
+    return bytes(out)
+
+
+def make_frames(count=4, size=768):
+    frames = []
+    for _ in range(count):
+        img = Image.effect_noise((size, size), random.uniform(20, 80)).convert("RGB")
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=60)
+        frames.append(buf.getvalue())
+    return frames
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+class SyntheticClient(threading.Thread):
+    def __init__(self, index, args, pcm, frames, stop):
+        super().__init__(name=f"client-{index}", daemon=True)
+        self.args = args
+        self.session_id = f"bench-{os.getpid()}-{index}-{int(time.time())}"
+        self.pcm = pcm
+        self.frames = frames
+        self.stop = stop
+        self.latencies = []
+        self.errors = []
+        self.audio_responses = 0
+        self.started = threading.Event()
+        self._mark = None
+        self.sio = socketio.Client(reconnection=False)
+        self.sio.on("live_session_started", lambda data: self.started.set())
+        self.sio.on("audio_response", self._on_audio)
+        self.sio.on("live_session_error", lambda data: self.errors.append(data.get("error")))
+
+    def _on_audio(self, data):
+        self.audio_responses += 1
+        if self._mark is not None:
+            self.latencies.append(time.perf_counter() - self._mark)
+            self._mark = None
+
+    def run(self):
+        try:
+            # session_id on the handshake mirrors the browser, for load balancer affinity
+            self.sio.connect(f"{self.args.url}?session_id={self.session_id}",
+                             transports=[self.args.transport], wait_timeout=30)
+            self.sio.emit("start_live_session", {"session_id": self.session_id})
+            if not self.started.wait(30):
+                self.errors.append("session did not start")
+                return
+            self._stream()
+        except Exception as e:
+            self.errors.append(f"{type(e).__name__}: {e}")
+        finally:
+            try:
+                self.sio.emit("stop_live_session", {"session_id": self.session_id})
+                # Let in-flight audio land so we never disconnect between a binary event and its attachment
+                time.sleep(1.0)
+                self.sio.disconnect()
+            except Exception:
+                pass
+
+    def _stream(self):
+        chunks_per_turn = max(1, round(self.args.turn_seconds / self.args.audio_interval))
+        next_audio = next_frame = time.perf_counter()
+        sent = frame_index = 0
+        while not self.stop.is_set():
+            now = time.perf_counter()
+            if now >= next_audio:
+                self.sio.emit("send_audio", {"session_id": self.session_id, "audio": self.pcm})
+                sent += 1
+                if sent % chunks_per_turn == 0:
+                    self._mark = time.perf_counter()
+                next_audio += self.args.audio_interval
+            if now >= next_frame:
+                # Repeat each frame a few times so the frame gate sees both static and changing scenes
+                frame = self.frames[(frame_index // 3) % len(self.frames)]
+                self.sio.emit("send_camera_frame", {"session_id": self.session_id, "frame": frame})
+                frame_index += 1
+                next_frame += self.args.frame_interval
+            self.stop.wait(max(0.0, min(next_audio, next_frame) - time.perf_counter()))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn_server(args):
+    port = free_port()
+    env = {
+        **os.environ,
+        "LIVE_BACKEND": "fake",
+        "PORT": str(port),
+        "FAKE_LIVE_TURN_SECONDS": str(args.turn_seconds),
+        "MAX_SESSIONS_PER_LOOP": str(max([args.sessions, *args.ramp]) * 2),
+    }
+    proc = subprocess.Popen([sys.executable, "serve.py"], cwd=AGENT_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return proc, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("server did not start listening within 60s")
+
+
+def run_step(args, sessions, server):
+    pcm = make_pcm(args.audio_interval)
+    frames = make_frames()
+    stop = threading.Event()
+    clients = [SyntheticClient(i, args, pcm, frames, stop) for i in range(sessions)]
+
+    cpu_before = server.cpu_times() if server else None
+    rss_before = server.memory_info().rss if server else None
+    for client in clients:
+        client.start()
+        time.sleep(args.stagger)
+    time.sleep(args.duration)
+    rss_peak = server.memory_info().rss if server else None
+    stop.set()
+    for client in clients:
+        client.join(timeout=10)
+    cpu_after = server.cpu_times() if server else None
+
+    latencies = [lat for client in clients for lat in client.latencies]
+    failed = sum(1 for client in clients if client.errors)
+    result = {
+        "sessions": sessions,
+        "failed_sessions": failed,
+        "turns": len(latencies),
+        "audio_responses": sum(client.audio_responses for client in clients),
+        "p50_s": percentile(latencies, 0.50),
+        "p95_s": percentile(latencies, 0.95),
+        "p99_s": percentile(latencies, 0.99),
+        "errors": sorted({err for client in clients for err in client.errors})[:5],
+    }
+    if server:
+        elapsed = args.duration + args.stagger * sessions
+        cpu = (cpu_after.user + cpu_after.system) - (cpu_before.user + cpu_before.system)
+        result["server_cpu_pct_per_session"] = round(100 * cpu / elapsed / sessions, 3)
+        result["server_rss_mb_per_session"] = round((rss_peak - rss_before) / sessions / 2**20, 3)
+    return result
+
+
+def fmt(value):
+    return "-" if value is None else f"{value * 1000:.0f}ms"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--spawn", action="store_true", help="start serve.py with LIVE_BACKEND=fake on a free port")
+    parser.add_argument("--server-pid", type=int, help="pid of an already running server to sample CPU/memory from")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--ramp", type=lambda v: [int(n) for n in v.split(",")], default=[],
+                        help="comma-separated session counts to step through, e.g. 10,25,50")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to stream at each step")
+    parser.add_argument("--stagger", type=float, default=0.05, help="seconds between client starts")
+    parser.add_argument("--audio-interval", type=float, default=0.5)
+    parser.add_argument("--frame-interval", type=float, default=2.0)
+    parser.add_argument("--turn-seconds", type=float, default=2.0,
+                        help="seconds of audio per user turn; must match the server's FAKE_LIVE_TURN_SECONDS")
+    parser.add_argument("--transport", choices=["websocket", "polling"], default="websocket")
+    parser.add_argument("--p95-slo", type=float, default=1.5, help="p95 latency (s) a step must meet to count")
+    parser.add_argument("--json", help="write the full report to this file")
+    args = parser.parse_args(argv)
+
+    proc = None
+    if args.spawn:
+        proc, args.url = spawn_server(args)
+    pid = proc.pid if proc else args.server_pid
+    server = psutil.Process(pid) if pid else None
+
+    steps = args.ramp or [args.sessions]
+    report = {"url": args.url, "transport": args.transport, "steps": [], "ceiling": 0}
+    try:
+        print(f"{'sessions':>8} {'failed':>6} {'turns':>6} {'p50':>7} {'p95':>7} {'p99':>7} {'cpu%/s':>7} {'MB/s':>6}")
+        for sessions in steps:
+            result = run_step(args, sessions, server)
+            report["steps"].append(result)
+            print(f"{sessions:>8} {result['failed_sessions']:>6} {result['turns']:>6} "
+                  f"{fmt(result['p50_s']):>7} {fmt(result['p95_s']):>7} {fmt(result['p99_s']):>7} "
+                  f"{result.get('server_cpu_pct_per_session', '-'):>7} {result.get('server_rss_mb_per_session', '-'):>6}")
+            ok = (result["failed_sessions"] <= sessions * 0.01 and result["p95_s"] is not None
+                  and result["p95_s"] <= args.p95_slo)
+            if not ok:
+                break
+            report["ceiling"] = sessions
+        print(f"Concurrent-session ceiling at p95 <= {args.p95_slo}s: {report['ceiling']}")
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait(timeout=10)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Cold-start benchmark: how long app.py takes to import, listen, serve and warm up.
+
+Each run starts a fresh `python serve.py` with LIVE_BACKEND=fake and measures,
+from the moment the process is spawned:
+
+- import_s: `import app` alone, in a separate interpreter
+- listen_s: until the port accepts connections
+- first_request_s: until the first `GET /` has been answered
+- ready_s: until `GET /readyz` returns 200
+
+    python -m bench.startup --modes background,lazy,eager --runs 5
+    python -m bench.startup --modes lazy --importtime 15
+
+Leave GOOGLE_CLOUD_PROJECT unset to include default credential discovery,
+which is what a fresh Cloud Run instance pays. Needs only the server's own
+requirements.
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+AGENT_DIR = Path(__file__).resolve().parent.parent
+IMPORT_PROBE = "import time; started = time.perf_counter(); import app; print(time.perf_counter() - started)"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def child_env(mode, port=None):
+    env = {**os.environ, "LIVE_BACKEND": "fake", "STARTUP_MODE": mode}
+    if port is not None:
+        env["PORT"] = str(port)
+    return env
+
+
+def measure_import(mode):
+    out = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=AGENT_DIR, env=child_env(mode),
+                         capture_output=True, text=True, timeout=120, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def http_status(url):
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return None
+
+
+def wait_until(check, proc, deadline):
+    """Poll `check()` until it is true; returns False if the server died or the deadline passed."""
+    while time.perf_counter() < deadline:
+        if check():
+            return True
+        if proc.poll() is not None:
+            return False
+        time.sleep(0.01)
+    return False
+
+
+def can_connect(port):
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=1):
+            return True
+    except OSError:
+        return False
+
+
+def measure_serve(mode, timeout=120.0):
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    deadline = started + timeout
+    proc = subprocess.Popen([sys.executable, "serve.py"], cwd=AGENT_DIR, env=child_env(mode, port),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    result = {"listen_s": None, "first_request_s": None, "ready_s": None}
+    try:
+        phases = (
+            ("listen_s", lambda: can_connect(port)),
+            ("first_request_s", lambda: http_status(base + "/") == 200),
+            ("ready_s", lambda: http_status(base + "/readyz") == 200),
+        )
+        for key, check in phases:
+            if not wait_until(check, proc, deadline):
+                break
+            result[key] = time.perf_counter() - started
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+    return result
+
+
+def import_profile(mode, top):
+    """The `top` modules with the largest cumulative import time, from `python -X importtime`."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"], cwd=AGENT_DIR,
+                         env=child_env(mode), capture_output=True, text=True, timeout=120, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append((int(cumulative) / 1e6, name))
+    return sorted(rows, reverse=True)[:top]
+
+
+def median(values):
+    values = sorted(v for v in values if v is not None)
+    return values[len(values) // 2] if values else None
+
+
+def fmt(value):
+    return "-" if value is None else f"{value * 1000:.0f}ms"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", type=lambda v: v.split(","), default=["background", "lazy", "eager"])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--importtime", type=int, default=0, metavar="N",
+                        help="also print the N slowest imports of each mode")
+    parser.add_argument("--json", help="write the full report to this file")
+    args = parser.parse_args(argv)
+
+    report = {"runs": args.runs, "modes": {}}
+    print(f"{'mode':>10} {'import':>8} {'listen':>8} {'first':>8} {'ready':>8}")
+    for mode in args.modes:
+        runs = []
+        for _ in range(args.runs):
+            runs.append({"import_s": measure_import(mode), **measure_serve(mode)})
+        summary = {key: median(run[key] for run in runs) for key in runs[0]}
+        report["modes"][mode] = {"median": summary, "runs": runs}
+        print(f"{mode:>10} {fmt(summary['import_s']):>8} {fmt(summary['listen_s']):>8} "
+              f"{fmt(summary['first_request_s']):>8} {fmt(summary['ready_s']):>8}")
+        if args.importtime:
+            profile = import_profile(mode, args.importtime)
+            report["modes"][mode]["imports"] = [{"module": name, "cumulative_s": s} for s, name in profile]
+            for seconds, name in profile:
+                print(f"{'':>10} {fmt(seconds):>8}  {name}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Reusable GenAI clients and cached credential validations.
+
+Clients are keyed by (project, location, credential fingerprint) so that
+reconnects and probes reuse one client, and with it the SDK's underlying
+HTTP transport. Entries for an access token expire together with the token.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+
+log = logging.getLogger("agent.auth")
+
+TOKENINFO_URL = "https://oauth2.googleapis.com/tokeninfo"
+# Used when the token lifetime cannot be looked up; gcloud access tokens last an hour
+DEFAULT_TOKEN_LIFETIME = 3000.0
+# Treat tokens as expired slightly early so a cached client never outlives its token
+EXPIRY_MARGIN = 60.0
+
+
+def credential_fingerprint(access_token):
+    """Stable, non-reversible identifier for an access token ("adc" for default credentials)."""
+    if not access_token:
+        return "adc"
+    return hashlib.sha256(access_token.encode("utf-8")).hexdigest()[:16]
+
+
+def token_expires_at(access_token, timeout=3.0):
+    """Return the wall-clock expiry of an OAuth access token, asking Google's tokeninfo endpoint."""
+    # POSTed as a form body: in a query string the token would land in proxy and server access logs
+    request = urllib.request.Request(
+        TOKENINFO_URL,
+        data=urllib.parse.urlencode({"access_token": access_token}).encode("ascii"),
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as resp:
+            expires_in = float(json.loads(resp.read()).get("expires_in", DEFAULT_TOKEN_LIFETIME))
+    except Exception as e:
+        log.warning("[AUTH] Token lifetime lookup failed, assuming %.0fs: %s", DEFAULT_TOKEN_LIFETIME, e)
+        expires_in = DEFAULT_TOKEN_LIFETIME
+    return time.time() + expires_in - EXPIRY_MARGIN
+
+
+class ClientPool:
+    """LRU of GenAI clients plus a cache of successful token validations."""
+
+    def __init__(self, factory, max_entries=64, adc_ttl=3600.0):
+        self.factory = factory  # factory(project, location, access_token_or_None) -> client
+        self.max_entries = max_entries
+        self.adc_ttl = adc_ttl
+        self._clients = OrderedDict()  # key -> (client, expires_at)
+        self._validations = {}  # key -> expires_at
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(project, location, access_token=None):
+        return (project, location, credential_fingerprint(access_token))
+
+    def get(self, project, location, access_token=None, expires_at=None):
+        """Return a pooled client, building one if there is no live entry for this key."""
+        key = self.key(project, location, access_token)
+        now = time.time()
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry and entry[1] > now:
+                self._clients.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self._clients.pop(key, None)
+            self.misses += 1
+        client = self.factory(project, location, access_token)
+        with self._lock:
+            if expires_at is None:
+                fallback = DEFAULT_TOKEN_LIFETIME if access_token else self.adc_ttl
+                expires_at = self._validations.get(key, now + fallback)
+            self._clients[key] = (client, expires_at)
+            self._clients.move_to_end(key)
+            while len(self._clients) > self.max_entries:
+                self._clients.popitem(last=False)
+        return client
+
+    def remember_validation(self, project, location, access_token, expires_at):
+        now = time.time()
+        with self._lock:
+            for key in [k for k, exp in self._validations.items() if exp <= now]:
+                del self._validations[key]
+            self._validations[self.key(project, location, access_token)] = expires_at
+
+    def validated_until(self, project, location, access_token):
+        """Expiry of a cached successful validation of this token, or None if there is none."""
+        key = self.key(project, location, access_token)
+        with self._lock:
+            expires_at = self._validations.get(key)
+            if expires_at is None:
+                return None
+            if expires_at <= time.time():
+                del self._validations[key]
+                self._clients.pop(key, None)
+                return None
+            return expires_at
+
+    def evict(self, access_token=None):
+        """Drop every client and validation made with `access_token`."""
+        fingerprint = credential_fingerprint(access_token)
+        with self._lock:
+            for cache in (self._clients, self._validations):
+                for key in [k for k in cache if k[2] == fingerprint]:
+                    del cache[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "clients": len(self._clients),
+                "validations": len(self._validations),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
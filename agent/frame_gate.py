@@ -0,0 +1,102 @@
+"""Server-side gate that drops near-duplicate camera frames.
+
+Each session keeps a 64-bit difference hash (dHash) of the last frame it
+forwarded. Frames within `threshold` bits of it are dropped, and the minimum
+spacing between forwarded frames widens while the scene is static, halves
+with every forwarded change and drops back to the minimum on a scene cut.
+"""
+
+import io
+import threading
+import time
+
+from PIL import Image
+
+HASH_SIZE = 8
+
+
+def frame_hash(jpeg_bytes):
+    """Return the 64-bit dHash of a JPEG frame, or None if it cannot be decoded."""
+    try:
+        with Image.open(io.BytesIO(jpeg_bytes)) as img:
+            # Let the JPEG decoder downscale via DCT so we never decode the full frame
+            img.draft("L", (HASH_SIZE * 8, HASH_SIZE * 8))
+            small = img.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.BILINEAR)
+            pixels = small.tobytes()
+    except Exception:
+        return None
+    bits = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return bits
+
+
+class FrameGate:
+    """Per-session frame filter with an adaptive effective frame rate."""
+
+    def __init__(self, threshold=5, scene_cut=16, min_interval=1.0, max_interval=8.0):
+        self.threshold = threshold
+        self.scene_cut = scene_cut
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.last_hash = None
+        self.last_forward_time = 0.0
+        self.forwarded = 0
+        self.dropped_duplicate = 0
+        self.dropped_rate = 0
+        self.superseded = 0
+        self._lock = threading.Lock()
+
+    def admit(self, jpeg_bytes, now=None):
+        """Return True if the frame should be forwarded to the Live session."""
+        now = time.monotonic() if now is None else now
+        frame_bits = frame_hash(jpeg_bytes)
+        with self._lock:
+            if frame_bits is None or self.last_hash is None:
+                return self._forward(frame_bits, now)
+
+            distance = bin(frame_bits ^ self.last_hash).count("1")
+            if distance < self.threshold:
+                # Static scene: back off so the next near-identical frame waits longer
+                self.interval = min(self.max_interval, self.interval * 1.5)
+                self.dropped_duplicate += 1
+                return False
+            if distance >= self.scene_cut:
+                # Big change: forward right away at full rate
+                self.interval = self.min_interval
+                return self._forward(frame_bits, now)
+            if now - self.last_forward_time < self.interval:
+                self.dropped_rate += 1
+                return False
+            # The scene is moving: sample it faster, so gradual motion also brings the rate back up
+            self.interval = max(self.min_interval, self.interval / 2)
+            return self._forward(frame_bits, now)
+
+    def _forward(self, frame_bits, now):
+        self.last_hash = frame_bits
+        self.last_forward_time = now
+        self.forwarded += 1
+        return True
+
+    def discard(self):
+        """Record that an admitted frame was replaced by a newer one before it was sent.
+
+        The newer frame was admitted after it, so `last_hash` already
+        describes what will be sent and only the counters change.
+        """
+        with self._lock:
+            self.forwarded -= 1
+            self.superseded += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "forwarded": self.forwarded,
+                "dropped_duplicate": self.dropped_duplicate,
+                "dropped_rate": self.dropped_rate,
+                "superseded": self.superseded,
+                "interval_s": round(self.interval, 2),
+            }
@@ -0,0 +1,182 @@
+"""Server-side normalization of camera and screen-share frames.
+
+Browsers send whatever JPEG their canvas produced: 768x768 camera frames
+with letterbox bars at quality 0.6, and screen captures that can be far
+larger. Each forwarded frame is decoded, cropped to the picture inside any
+black bars, downsized to the longest side the configured media resolution
+can use, and re-encoded until it fits a byte budget. A frame that would not
+come out smaller is sent as it arrived.
+
+Decoding and encoding run in a small process pool so they never hold the
+GIL on the socket handler threads or the session loops. The workers are
+started by a forkserver and only import this module.
+"""
+
+import io
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image
+
+# (longest side in pixels, JPEG byte budget) for each Live API media resolution
+TARGETS = {
+    "LOW": (384, 24 * 1024),
+    "MEDIUM": (768, 64 * 1024),
+    "HIGH": (1536, 192 * 1024),
+}
+
+LETTERBOX_THRESHOLD = 16  # luma at or below this counts as a black bar
+_BAR_LUT = [255 if value > LETTERBOX_THRESHOLD else 0 for value in range(256)]
+
+
+def content_box(img):
+    """Return the box inside black letterbox bars, or None if the frame has none."""
+    box = img.convert("L").point(_BAR_LUT).getbbox()
+    if box is None or box == (0, 0) + img.size:
+        return None
+    return box
+
+
+def normalize_frame(jpeg_bytes, max_side, max_bytes, quality=80, min_quality=40):
+    """Crop, downsize and re-encode a JPEG frame. Runs in a worker process.
+
+    Returns the bytes to send upstream: the re-encoded frame, or
+    `jpeg_bytes` unchanged if re-encoding would not make it smaller.
+    """
+    with Image.open(io.BytesIO(jpeg_bytes)) as img:
+        # Let the JPEG decoder downscale via DCT when the frame is far above the target
+        img.draft("RGB", (max_side, max_side))
+        img = img.convert("RGB")
+    box = content_box(img)
+    if box is not None:
+        img = img.crop(box)
+    if max(img.size) > max_side:
+        img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    while True:
+        out = io.BytesIO()
+        img.save(out, "JPEG", quality=quality, optimize=True)
+        if out.tell() <= max_bytes or quality <= min_quality:
+            break
+        quality -= 10
+    data = out.getvalue()
+    return data if len(data) < len(jpeg_bytes) else jpeg_bytes
+
+
+class FrameNormalizer:
+    """Runs `normalize_frame` on a process pool and hands results back by callback.
+
+    Frames are keyed by session. Each key has at most one frame in flight and
+    one waiting behind it, so the pool queue grows with the number of
+    sessions rather than with any single session's frame rate.
+    """
+
+    def __init__(self, max_side, max_bytes, quality=80, workers=2):
+        self.max_side = max_side
+        self.max_bytes = max_bytes
+        self.quality = quality
+        self.workers = workers
+        self._pool = None
+        self._in_flight = set()
+        self._waiting = {}
+        self._lock = threading.Lock()
+        self.frames = 0
+        self.superseded = 0
+        self.failed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def _get_pool(self):
+        if self._pool is None:
+            # Forking this process could leave a worker holding a lock another thread had taken (logging,
+            # queues), so workers come from a forkserver. Preloading only this module keeps it from
+            # importing the main module.
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload([__name__])
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        return self._pool
+
+    def submit(self, key, jpeg_bytes, callback):
+        """Normalize a frame off-thread and call `callback(data, saved_bytes)` with the result.
+
+        While `key` has a frame in flight the new frame waits for it; video
+        is latest-wins, so a waiting frame replaced by a newer one is handed
+        to its `callback` as `(None, 0)` and never sent. A frame that fails
+        to decode is passed to `callback` unchanged.
+        """
+        replaced = None
+        with self._lock:
+            start = key not in self._in_flight
+            if start:
+                self._in_flight.add(key)
+            else:
+                replaced = self._waiting.get(key)
+                self._waiting[key] = (jpeg_bytes, callback)
+                if replaced is not None:
+                    self.superseded += 1
+        if start:
+            self._start(key, jpeg_bytes, callback)
+        elif replaced is not None:
+            replaced[1](None, 0)
+
+    def _start(self, key, jpeg_bytes, callback):
+        while True:
+            with self._lock:
+                pool = self._get_pool()
+            try:
+                future = pool.submit(normalize_frame, jpeg_bytes, self.max_side, self.max_bytes, self.quality)
+            except Exception:
+                with self._lock:
+                    self.failed += 1
+                    self._pool = None
+                callback(jpeg_bytes, 0)
+                following = self._next(key)
+                if following is None:
+                    return
+                jpeg_bytes, callback = following
+                continue
+            future.add_done_callback(lambda f: self._done(f, pool, key, jpeg_bytes, callback))
+            return
+
+    def _done(self, future, pool, key, jpeg_bytes, callback):
+        try:
+            data = future.result()
+        except Exception as e:
+            data = jpeg_bytes
+            with self._lock:
+                self.failed += 1
+                if isinstance(e, BrokenProcessPool) and self._pool is pool:
+                    # A dead worker breaks the whole pool; start a fresh one for the next frame
+                    self._pool = None
+        with self._lock:
+            self.frames += 1
+            self.bytes_in += len(jpeg_bytes)
+            self.bytes_out += len(data)
+        callback(data, len(jpeg_bytes) - len(data))
+        following = self._next(key)
+        if following is not None:
+            self._start(key, *following)
+
+    def _next(self, key):
+        """Return the frame waiting behind `key`'s finished one, or release the key."""
+        with self._lock:
+            following = self._waiting.pop(key, None)
+            if following is None:
+                self._in_flight.discard(key)
+            return following
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_side": self.max_side,
+                "max_bytes": self.max_bytes,
+                "frames": self.frames,
+                "superseded": self.superseded,
+                "failed": self.failed,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "bytes_saved": self.bytes_in - self.bytes_out,
+                "in_flight": len(self._in_flight),
+                "waiting": len(self._waiting),
+            }
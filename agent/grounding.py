@@ -0,0 +1,213 @@
+"""Retrieval of grounding snippets from a directory of context documents.
+
+Documents (`*.txt` and `*.md`) are split into overlapping passages and
+indexed with BM25 over an in-memory inverted index. A watcher thread polls
+the directory and rebuilds the index off to the side when a file is added,
+removed or modified; searches keep using the old index until the new one is
+swapped in, so a reload never blocks a session.
+
+Sessions query the index with what the user has recently said and push the
+best passages into the conversation instead of carrying the whole corpus in
+the system prompt.
+"""
+
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+log = logging.getLogger("agent.session")
+
+SUFFIXES = (".txt", ".md")
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+STOPWORDS = frozenset("""
+a an and are as at be but by can could did do does for from had has have he her here him his how i if in
+into is it its just me my no not of on or our she so than that the their them then there these they this
+those to too us was we were what when where which who why will with would you your yes okay oh um uh
+""".split())
+
+
+def tokenize(text):
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def chunk_text(text, max_words=120, overlap=30):
+    """Split text into passages of about `max_words`, keeping paragraphs together where possible."""
+    words = []
+    passages = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph_words = paragraph.split()
+        if words and len(words) + len(paragraph_words) > max_words:
+            passages.append(" ".join(words))
+            words = words[-overlap:] if overlap else []
+        words.extend(paragraph_words)
+        while len(words) > max_words:
+            passages.append(" ".join(words[:max_words]))
+            words = words[max_words - overlap:]
+    if words:
+        passages.append(" ".join(words))
+    return passages
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of passages."""
+
+    def __init__(self, passages, k1=1.5, b=0.75):
+        self.passages = passages  # list of (source, text)
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(list)  # term -> [(passage_id, term_frequency)]
+        self.lengths = []
+        for passage_id, (_, text) in enumerate(passages):
+            terms = Counter(tokenize(text))
+            self.lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                self.postings[term].append((passage_id, tf))
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+    def __len__(self):
+        return len(self.passages)
+
+    def search(self, query, k=3):
+        """Return up to `k` (score, passage_id) pairs, best first."""
+        n = len(self.passages)
+        if not n:
+            return []
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for passage_id, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[passage_id] / self.avg_length)
+                scores[passage_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(((score, pid) for pid, score in scores.items()), reverse=True)[:k]
+
+
+class GroundingIndex:
+    """BM25 index over a context directory, rebuilt when the directory changes.
+
+    With `background=True` the first build also runs on the watcher thread
+    and the index is empty until `loaded` is set.
+    """
+
+    def __init__(self, directory, extra_files=(), reload_interval=5.0, max_words=120, overlap=30, background=False):
+        self.directory = Path(directory)
+        self.extra_files = [Path(f) for f in extra_files]
+        self.reload_interval = reload_interval
+        self.max_words = max_words
+        self.overlap = overlap
+        self._index = BM25Index([])
+        self._signature = None
+        self._lock = threading.Lock()
+        self.loaded_at = None
+        self.reloads = 0
+        self.loaded = threading.Event()
+        if not background:
+            self._first_load()
+        if reload_interval or background:
+            threading.Thread(target=self._watch, args=(background,), name="grounding-watch", daemon=True).start()
+
+    def _first_load(self):
+        try:
+            self.reload()
+        finally:
+            self.loaded.set()
+
+    def _files(self):
+        files = [f for f in self.extra_files if f.is_file()]
+        if self.directory.is_dir():
+            files += sorted(f for f in self.directory.rglob("*") if f.suffix in SUFFIXES and f.is_file())
+        return files
+
+    def _current_signature(self):
+        signature = []
+        for f in self._files():
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            signature.append((str(f), st.st_mtime_ns, st.st_size))
+        return tuple(signature)
+
+    def reload(self, force=False):
+        """Rebuild the index if any document changed. Returns True if it was rebuilt."""
+        signature = self._current_signature()
+        if not force and signature == self._signature:
+            return False
+        started = time.perf_counter()
+        passages = []
+        for path, _, _ in signature:
+            try:
+                text = Path(path).read_text(encoding="utf-8", errors="replace")
+            except OSError as e:
+                log.warning("[GROUNDING] Could not read %s: %s", path, e)
+                continue
+            source = Path(path).name
+            passages.extend((source, p) for p in chunk_text(text, self.max_words, self.overlap))
+        index = BM25Index(passages)
+        with self._lock:
+            self._index = index
+            self._signature = signature
+            self.loaded_at = time.time()
+            self.reloads += 1
+        log.info("[GROUNDING] Indexed %d passage(s) from %d file(s) in %.0f ms",
+                 len(passages), len(signature), (time.perf_counter() - started) * 1000)
+        return True
+
+    def _watch(self, load_first):
+        if load_first:
+            try:
+                self._first_load()
+            except Exception as e:
+                log.error("[GROUNDING] Initial load failed: %s", e)
+        if not self.reload_interval:
+            return
+        while True:
+            time.sleep(self.reload_interval)
+            try:
+                self.reload()
+            except Exception as e:
+                log.error("[GROUNDING] Reload failed: %s", e)
+
+    def __len__(self):
+        return len(self._index)
+
+    def search(self, query, k=3, min_score=0.0):
+        """Return up to `k` passages as dicts with `id`, `source`, `text` and `score`."""
+        with self._lock:
+            index = self._index
+            generation = self.reloads
+        results = []
+        for score, passage_id in index.search(query, k):
+            if score < min_score:
+                break
+            source, text = index.passages[passage_id]
+            # Ids change on reload so a session will re-send a passage after the corpus changes
+            results.append({"id": (generation, passage_id), "source": source, "text": text, "score": round(score, 3)})
+        return results
+
+    def stats(self):
+        with self._lock:
+            index = self._index
+            return {
+                "directory": str(self.directory),
+                "files": len(self._signature or ()),
+                "passages": len(index),
+                "terms": len(index.postings),
+                "reloads": self.reloads,
+                "loaded_at": self.loaded_at,
+            }
+
+
+def format_snippets(snippets):
+    """Render passages as a context message for `send_client_content`."""
+    body = "\n\n".join(f"[{s['source']}] {s['text']}" for s in snippets)
+    return (
+        "Reference notes for what the user is asking about. Use them if relevant, "
+        "do not read them out verbatim and do not reply to this message.\n\n" + body
+    )
@@ -0,0 +1,293 @@
+"""Indexed conversation history.
+
+Finished transcript turns are ingested into one SQLite file with an FTS5
+index over their text, so sessions can be listed, read and searched by id,
+time range or words without scanning transcript files. Each session also
+keeps a short extractive summary, rebuilt as turns arrive, that a later
+session with the same id can start from.
+
+Ingestion runs on the transcript writer thread; lookups are indexed queries
+that stay in the millisecond range at hundreds of thousands of turns.
+SQLite builds without FTS5 fall back to LIKE matching.
+"""
+
+import json
+import logging
+import re
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+log = logging.getLogger("agent.transcript")
+
+SUMMARY_RECENT_TURNS = 5
+SUMMARY_TURN_CHARS = 200
+MAX_PAGE_SIZE = 100
+
+_WORD = re.compile(r"\w+")
+_LEGACY_LINE = re.compile(r"^\[(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)\] (\w+): (.*)$")
+
+
+def _iso(ts):
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat(timespec="milliseconds")
+
+
+def parse_time(value):
+    """Parse epoch seconds or an ISO 8601 string; None passes through."""
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        parsed = datetime.fromisoformat(value)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+
+
+def _clip(text, limit=SUMMARY_TURN_CHARS):
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(" ", 1)[0] + "…"
+
+
+def _page(limit, offset):
+    return max(1, min(int(limit), MAX_PAGE_SIZE)), max(0, int(offset))
+
+
+class HistoryStore:
+    """SQLite-backed store of transcript turns with full-text search and per-session summaries."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS turns ("
+            "id INTEGER PRIMARY KEY, session_id TEXT NOT NULL, role TEXT NOT NULL, "
+            "ts REAL NOT NULL, end_ts REAL NOT NULL, text TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS turns_session_ts ON turns(session_id, ts)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS turns_ts ON turns(ts)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, first_ts REAL NOT NULL, last_ts REAL NOT NULL, "
+            "turns INTEGER NOT NULL, summary TEXT NOT NULL DEFAULT '')"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_last_ts ON sessions(last_ts)")
+        try:
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS turns_fts USING fts5("
+                "text, content='turns', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+            )
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS turns_fts_insert AFTER INSERT ON turns BEGIN "
+                "INSERT INTO turns_fts(rowid, text) VALUES (new.id, new.text); END"
+            )
+            self.fts = True
+        except sqlite3.OperationalError:
+            log.warning("[HISTORY] SQLite has no FTS5, text search falls back to LIKE")
+            self.fts = False
+        self.ingested = 0
+
+    def add_turns(self, records):
+        """Ingest transcript records (`ts`, `end_ts`, `session_id`, `role`, `text`) in one transaction."""
+        rows = [
+            (r["session_id"], r["role"], parse_time(r["ts"]), parse_time(r.get("end_ts") or r["ts"]), r["text"])
+            for r in records if r.get("text")
+        ]
+        if not rows:
+            return 0
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO turns (session_id, role, ts, end_ts, text) VALUES (?, ?, ?, ?, ?)", rows
+                )
+                for session_id in {row[0] for row in rows}:
+                    self._refresh_session_locked(session_id)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self.ingested += len(rows)
+        return len(rows)
+
+    def _refresh_session_locked(self, session_id):
+        first_ts, last_ts, count = self._conn.execute(
+            "SELECT MIN(ts), MAX(end_ts), COUNT(*) FROM turns WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        opening = self._conn.execute(
+            "SELECT id, role, text FROM turns WHERE session_id = ? AND role = 'User' ORDER BY ts LIMIT 1",
+            (session_id,),
+        ).fetchone()
+        recent = self._conn.execute(
+            "SELECT id, role, text FROM turns WHERE session_id = ? ORDER BY ts DESC LIMIT ?",
+            (session_id, SUMMARY_RECENT_TURNS),
+        ).fetchall()
+        lines = [f"Conversation started {_iso(first_ts)[:16].replace('T', ' ')} UTC, {count} turns so far."]
+        if opening and opening[0] not in {row[0] for row in recent}:
+            lines.append(f"It opened with the user saying: {_clip(opening[2])}")
+        lines.append("Most recent turns:")
+        lines += [f"{role}: {_clip(text)}" for _, role, text in reversed(recent)]
+        self._conn.execute(
+            "INSERT INTO sessions (session_id, first_ts, last_ts, turns, summary) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET first_ts = excluded.first_ts, last_ts = excluded.last_ts, "
+            "turns = excluded.turns, summary = excluded.summary",
+            (session_id, first_ts, last_ts, count, "\n".join(lines)),
+        )
+
+    def summary(self, session_id):
+        """Return the stored summary for a session, or None if it has no history."""
+        with self._lock:
+            row = self._conn.execute("SELECT summary FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return row[0] if row else None
+
+    def sessions(self, since=None, until=None, limit=20, offset=0):
+        """Sessions active in [since, until], most recently active first."""
+        limit, offset = _page(limit, offset)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT session_id, first_ts, last_ts, turns, summary FROM sessions "
+                "WHERE last_ts >= ? AND first_ts <= ? ORDER BY last_ts DESC LIMIT ? OFFSET ?",
+                (since if since is not None else 0, until if until is not None else 1e18, limit, offset),
+            ).fetchall()
+        return [
+            {"session_id": sid, "first_ts": _iso(first), "last_ts": _iso(last), "turns": turns, "summary": summary}
+            for sid, first, last, turns, summary in rows
+        ]
+
+    def turns(self, session_id, since=None, until=None, limit=50, offset=0):
+        """Turns of one session in time order, optionally limited to [since, until]."""
+        limit, offset = _page(limit, offset)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, session_id, role, ts, end_ts, text FROM turns "
+                "WHERE session_id = ? AND ts >= ? AND ts <= ? ORDER BY ts LIMIT ? OFFSET ?",
+                (session_id, since if since is not None else 0, until if until is not None else 1e18, limit, offset),
+            ).fetchall()
+        return [self._turn(row) for row in rows]
+
+    def search(self, query, session_id=None, since=None, until=None, limit=20, offset=0, order="relevance"):
+        """Turns containing every word of `query`.
+
+        `order="relevance"` ranks by BM25; `order="recent"` returns the
+        newest matches first and stays fast even for very common words.
+        Without FTS5 results are always newest first.
+        """
+        terms = _WORD.findall(query or "")
+        if not terms:
+            return []
+        limit, offset = _page(limit, offset)
+        filters, params = [], []
+        if session_id:
+            filters.append("t.session_id = ?")
+            params.append(session_id)
+        if since is not None:
+            filters.append("t.ts >= ?")
+            params.append(since)
+        if until is not None:
+            filters.append("t.ts <= ?")
+            params.append(until)
+        with self._lock:
+            if self.fts:
+                # Quote every term so user input is never parsed as FTS5 query syntax
+                sql = (
+                    "SELECT t.id, t.session_id, t.role, t.ts, t.end_ts, t.text, "
+                    "snippet(turns_fts, 0, '[', ']', '…', 16) FROM turns_fts JOIN turns t ON t.id = turns_fts.rowid "
+                    "WHERE turns_fts MATCH ?"
+                )
+                params.insert(0, " ".join(f'"{term}"' for term in terms))
+                if session_id:
+                    # A rowid range lets FTS5 skip the doclists of every other session
+                    low, high = self._conn.execute(
+                        "SELECT MIN(id), MAX(id) FROM turns WHERE session_id = ?", (session_id,)
+                    ).fetchone()
+                    if low is None:
+                        return []
+                    filters.append("turns_fts.rowid BETWEEN ? AND ?")
+                    params += [low, high]
+                order_by = "rank" if order == "relevance" else "turns_fts.rowid DESC"
+            else:
+                sql = "SELECT t.id, t.session_id, t.role, t.ts, t.end_ts, t.text, NULL FROM turns t WHERE 1"
+                for term in terms:
+                    filters.insert(0, "t.text LIKE ?")
+                    params.insert(0, f"%{term}%")
+                order_by = "t.id DESC"
+            sql += "".join(f" AND {condition}" for condition in filters) + f" ORDER BY {order_by} LIMIT ? OFFSET ?"
+            rows = self._conn.execute(sql, (*params, limit, offset)).fetchall()
+        return [{**self._turn(row[:6]), "snippet": row[6]} for row in rows]
+
+    @staticmethod
+    def _turn(row):
+        turn_id, session_id, role, ts, end_ts, text = row
+        return {"id": turn_id, "session_id": session_id, "role": role, "ts": _iso(ts), "end_ts": _iso(end_ts), "text": text}
+
+    def is_empty(self):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM turns LIMIT 1").fetchone() is None
+
+    def import_jsonl(self, path, max_bytes=None, batch_size=1000):
+        """Ingest a transcript log written by `TranscriptSink`, up to its first `max_bytes` bytes.
+
+        Returns the number of turns added.
+        """
+        added = 0
+        read = 0
+        batch = []
+        with open(path, "rb") as f:
+            for line in f:
+                read += len(line)
+                if max_bytes is not None and read > max_bytes:
+                    break
+                try:
+                    batch.append(json.loads(line))
+                except ValueError:
+                    continue
+                if len(batch) >= batch_size:
+                    added += self.add_turns(batch)
+                    batch = []
+        return added + self.add_turns(batch)
+
+    def import_legacy_transcript(self, path):
+        """Ingest a pre-JSONL `transcript_<session_id>.txt` file. Returns the number of turns added.
+
+        Lines look like `[YYYY-mm-dd HH:MM:SS] Role: text` in server local
+        time, one per transcription fragment; consecutive fragments from the
+        same speaker are joined into one turn.
+        """
+        path = Path(path)
+        session_id = path.stem[len("transcript_"):]
+        turns = []
+        for line in path.read_text(encoding="utf-8", errors="replace").splitlines():
+            match = _LEGACY_LINE.match(line)
+            if match is None:
+                if turns and line:
+                    turns[-1]["text"] += "\n" + line
+                continue
+            ts = datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S").timestamp()
+            role, text = match.group(2), match.group(3)
+            if turns and turns[-1]["role"] == role:
+                turns[-1]["text"] += text
+                turns[-1]["end_ts"] = ts
+            else:
+                turns.append({"session_id": session_id, "role": role, "ts": ts, "end_ts": ts, "text": text})
+        for turn in turns:
+            turn["text"] = turn["text"].strip()
+        return self.add_turns(turns)
+
+    def stats(self):
+        with self._lock:
+            turns = self._conn.execute("SELECT COUNT(*) FROM turns").fetchone()[0]
+            sessions = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return {
+            "path": str(self.path),
+            "turns": turns,
+            "sessions": sessions,
+            "fts": self.fts,
+            "ingested": self.ingested,
+            "file_bytes": self.path.stat().st_size if self.path.exists() else 0,
+        }
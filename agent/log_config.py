@@ -0,0 +1,139 @@
+"""Logging setup: per-subsystem levels, JSON records and off-thread output.
+
+Records are handed to a queue as-is and a `QueueListener` thread does all
+message formatting and stream I/O, so a log call on a session's event loop
+costs a level check and a queue put. Per-chunk traffic should go through
+`sampled_debug`, which rate-limits events per key.
+
+Environment:
+    LOG_LEVEL     default level for everything (INFO)
+    LOG_LEVELS    per-subsystem overrides, e.g. "audio=WARNING,session=DEBUG"
+    LOG_FORMAT    "json" (default) or "text"
+    LOG_SAMPLE_RATE  sampled events allowed per second per key (1)
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+SUBSYSTEMS = ("session", "audio", "video", "transcript", "auth")
+
+# Attributes every LogRecord has; anything else came in via `extra=` and is emitted as a field
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def get_logger(subsystem):
+    """Logger for one subsystem, named agent.<subsystem>."""
+    return logging.getLogger(f"agent.{subsystem}")
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        data = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED and not key.startswith("_"):
+                data[key] = value
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread."""
+
+    def prepare(self, record):
+        return record
+
+
+class RateSampler:
+    """Token bucket per key: allows `rate` events per second, with a burst of one second's worth."""
+
+    def __init__(self, rate=1.0):
+        self.rate = rate
+        self._buckets = {}  # key -> [tokens, last_time, suppressed]
+        self._lock = threading.Lock()
+
+    def allow(self, key):
+        """Return (allowed, suppressed_since_last_allowed)."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.rate, now, 0]
+            bucket[0] = min(self.rate, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] >= 1.0:
+                bucket[0] -= 1.0
+                suppressed, bucket[2] = bucket[2], 0
+                return True, suppressed
+            bucket[2] += 1
+            return False, 0
+
+    def forget(self, key_prefix):
+        with self._lock:
+            for key in [k for k in self._buckets if k[0] == key_prefix]:
+                del self._buckets[key]
+
+
+_sampler = RateSampler(float(os.getenv("LOG_SAMPLE_RATE", "1")))
+_listener = None
+
+
+def sampled_debug(logger, key, msg, *args, session_id=None):
+    """Debug log for per-chunk traffic, rate-limited per (session_id, key)."""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    allowed, suppressed = _sampler.allow((session_id, key))
+    if allowed:
+        logger.debug(msg, *args, extra={"session_id": session_id, "suppressed": suppressed})
+
+
+def forget_session(session_id):
+    """Drop a finished session's sampling state."""
+    _sampler.forget(session_id)
+
+
+def _parse_levels(spec):
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging():
+    """Install the queue-based pipeline on the root logger. Safe to call more than once."""
+    global _listener
+    if _listener is not None:
+        return
+    if os.getenv("LOG_FORMAT", "json").lower() == "text":
+        formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s")
+    else:
+        formatter = JsonFormatter()
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(formatter)
+
+    records = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_DeferredQueueHandler(records))
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    for name, level in _parse_levels(os.getenv("LOG_LEVELS", "")).items():
+        logging.getLogger(f"agent.{name}" if name in SUBSYSTEMS else name).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(records, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
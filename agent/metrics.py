@@ -0,0 +1,179 @@
+"""Lightweight in-process metrics with Prometheus text and JSON exposition.
+
+Recording is a dict lookup, a bisect and a few integer updates under an
+uncontended lock, cheap enough to leave on in production. Aggregate series
+are exported to Prometheus; per-session series are only kept for the JSON
+snapshot so session ids never become Prometheus labels.
+"""
+
+import bisect
+import collections
+import threading
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DURATION_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0)
+BYTE_BUCKETS = (0, 1024, 4096, 16384, 32768, 65536, 131072, 262144, 524288)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimate a quantile by linear interpolation within the matching bucket."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= target and bucket_count:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (target - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class Metrics:
+    """Registry of histograms, labelled counters and callback gauges."""
+
+    def __init__(self, prefix="agent", max_sessions=1000):
+        self.prefix = prefix
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._help = {}
+        self._histograms = {}  # name -> Histogram
+        self._counters = {}  # name -> {label_tuple: value}
+        self._gauges = {}  # name -> callback returning {label_tuple: value}
+        self._labelnames = {}
+        # session_id -> {"histograms": {...}, "counters": {...}}, least recently updated first
+        self._sessions = collections.OrderedDict()
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self._help[name] = help_text
+        self._histograms[name] = Histogram(buckets)
+
+    def counter(self, name, help_text, labelnames=()):
+        self._help[name] = help_text
+        self._labelnames[name] = tuple(labelnames)
+        self._counters[name] = {}
+
+    def gauge(self, name, help_text, callback, labelnames=()):
+        """Register a gauge whose values are read from `callback()` at scrape time."""
+        self._help[name] = help_text
+        self._labelnames[name] = tuple(labelnames)
+        self._gauges[name] = callback
+
+    def observe(self, name, value, session_id=None):
+        with self._lock:
+            hist = self._histograms[name]
+            hist.observe(value)
+            if session_id is not None:
+                per_session = self._session(session_id)["histograms"]
+                if name not in per_session:
+                    per_session[name] = Histogram(hist.buckets)
+                per_session[name].observe(value)
+
+    def inc(self, name, amount=1, session_id=None, **labels):
+        key = tuple(labels[label] for label in self._labelnames[name])
+        with self._lock:
+            series = self._counters[name]
+            series[key] = series.get(key, 0) + amount
+            if session_id is not None:
+                per_session = self._session(session_id)["counters"].setdefault(name, {})
+                per_session[key] = per_session.get(key, 0) + amount
+
+    def _session(self, session_id):
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            entry = self._sessions[session_id] = {"histograms": {}, "counters": {}}
+            # Backstop for sessions whose entry is never dropped: forget the least recently updated
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(session_id)
+        return entry
+
+    def drop_session(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _label_str(self, name, key):
+        if not key:
+            return ""
+        pairs = ",".join(f'{label}="{value}"' for label, value in zip(self._labelnames[name], key))
+        return "{" + pairs + "}"
+
+    def render_prometheus(self):
+        lines = []
+        with self._lock:
+            for name, hist in self._histograms.items():
+                full = f"{self.prefix}_{name}"
+                lines.append(f"# HELP {full} {self._help[name]}")
+                lines.append(f"# TYPE {full} histogram")
+                cumulative = 0
+                for bound, bucket_count in zip(hist.buckets, hist.counts):
+                    cumulative += bucket_count
+                    lines.append(f'{full}_bucket{{le="{bound}"}} {cumulative}')
+                lines.append(f'{full}_bucket{{le="+Inf"}} {hist.count}')
+                lines.append(f"{full}_sum {hist.sum}")
+                lines.append(f"{full}_count {hist.count}")
+            for name, series in self._counters.items():
+                full = f"{self.prefix}_{name}"
+                lines.append(f"# HELP {full} {self._help[name]}")
+                lines.append(f"# TYPE {full} counter")
+                for key, value in series.items():
+                    lines.append(f"{full}{self._label_str(name, key)} {value}")
+            gauges = list(self._gauges.items())
+        for name, callback in gauges:
+            full = f"{self.prefix}_{name}"
+            lines.append(f"# HELP {full} {self._help[name]}")
+            lines.append(f"# TYPE {full} gauge")
+            for key, value in callback().items():
+                lines.append(f"{full}{self._label_str(name, key)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def _counters_dict(self, name, series):
+        labelnames = self._labelnames[name]
+        if not labelnames:
+            return series.get((), 0)
+        return {"/".join(map(str, key)): value for key, value in series.items()}
+
+    def snapshot(self):
+        with self._lock:
+            data = {
+                "histograms": {name: hist.to_dict() for name, hist in self._histograms.items()},
+                "counters": {name: self._counters_dict(name, series) for name, series in self._counters.items()},
+                "sessions": {
+                    session_id: {
+                        "histograms": {n: h.to_dict() for n, h in entry["histograms"].items()},
+                        "counters": {n: self._counters_dict(n, s) for n, s in entry["counters"].items()},
+                    }
+                    for session_id, entry in self._sessions.items()
+                },
+            }
+            gauges = list(self._gauges.items())
+        data["gauges"] = {}
+        for name, callback in gauges:
+            values = callback()
+            data["gauges"][name] = values.get((), 0) if not self._labelnames[name] else {
+                "/".join(map(str, key)): value for key, value in values.items()
+            }
+        return data
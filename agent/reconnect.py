@@ -0,0 +1,37 @@
+"""Backoff policy for re-establishing a dropped Live API connection.
+
+Delays grow exponentially from `base` up to `cap` with full jitter, so a
+burst of sessions dropped by the same upstream reset does not reconnect in
+lockstep. Instead of a fixed number of attempts, retries stop once the
+total time spent trying would exceed `budget` seconds.
+"""
+
+import random
+import time
+
+
+class Backoff:
+    def __init__(self, base=0.05, cap=5.0, budget=60.0, rng=random.random, clock=time.monotonic):
+        self.base = base
+        self.cap = cap
+        self.budget = budget
+        self._rng = rng
+        self._clock = clock
+        self.attempt = 0
+        self._started = None
+
+    def next_delay(self):
+        """Seconds to wait before the next attempt, or None once the budget is spent."""
+        now = self._clock()
+        if self._started is None:
+            self._started = now
+        delay = self._rng() * min(self.cap, self.base * 2 ** self.attempt)
+        if now - self._started + delay > self.budget:
+            return None
+        self.attempt += 1
+        return delay
+
+    def reset(self):
+        """Start over after a connection has proven stable."""
+        self.attempt = 0
+        self._started = None
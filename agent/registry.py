@@ -0,0 +1,224 @@
+"""Shared session registry for running several worker processes.
+
+Each live session is owned by exactly one worker, recorded as a lease in
+the registry. A worker that receives an event for a session it does not own
+relays the event to the owner over the registry's message channel.
+
+The registry also holds each browser's profile (credentials, name, custom
+instructions), so whichever worker serves a REST call or hosts the session
+sees what the browser saved through any other worker.
+
+`LocalRegistry` keeps everything in-process and is what a single worker (and
+the tests) use; `RedisRegistry` shares leases and relays across processes
+and hosts.
+"""
+
+import json
+import logging
+import threading
+import time
+
+log = logging.getLogger("agent.session")
+
+
+def encode_message(message):
+    """Serialize a relay message; binary `data` is appended raw after a JSON header."""
+    data = message.get("data")
+    header = {k: v for k, v in message.items() if k != "data"}
+    if isinstance(data, (bytes, bytearray)):
+        header["binary"] = True
+        return json.dumps(header).encode("utf-8") + b"\n" + bytes(data)
+    header["data"] = data
+    return json.dumps(header).encode("utf-8") + b"\n"
+
+
+def decode_message(payload):
+    header, _, body = payload.partition(b"\n")
+    message = json.loads(header)
+    if message.pop("binary", False):
+        message["data"] = body
+    return message
+
+
+class SessionRegistry:
+    """Interface for session ownership leases and worker-to-worker relay."""
+
+    def claim(self, session_id, worker_id, ttl):
+        """Take the lease for `session_id` if it is free; return the worker that owns it."""
+        raise NotImplementedError
+
+    def owner(self, session_id):
+        raise NotImplementedError
+
+    def renew(self, session_ids, worker_id, ttl):
+        """Extend this worker's leases on `session_ids`."""
+        raise NotImplementedError
+
+    def release(self, session_id, worker_id):
+        raise NotImplementedError
+
+    def relay(self, worker_id, message):
+        """Deliver `message` to the relay handler registered by `worker_id`."""
+        raise NotImplementedError
+
+    def subscribe(self, worker_id, handler):
+        """Call `handler(message)` for every message relayed to `worker_id`."""
+        raise NotImplementedError
+
+    def save_profile(self, client_id, profile, ttl):
+        """Store a browser's profile, a JSON-serializable dict, for `ttl` seconds."""
+        raise NotImplementedError
+
+    def load_profile(self, client_id):
+        """Return the profile saved for `client_id`, or None."""
+        raise NotImplementedError
+
+    def delete_profile(self, client_id):
+        raise NotImplementedError
+
+
+class LocalRegistry(SessionRegistry):
+    """In-process registry. Registries created with the same `backend` dict see each other."""
+
+    def __init__(self, backend=None):
+        self._backend = backend if backend is not None else {}
+        self._backend.setdefault("leases", {})  # session_id -> (worker_id, expires_at)
+        self._backend.setdefault("handlers", {})  # worker_id -> handler
+        self._backend.setdefault("profiles", {})  # client_id -> (profile JSON, expires_at)
+        self._backend.setdefault("lock", threading.Lock())
+        self._lock = self._backend["lock"]
+
+    def claim(self, session_id, worker_id, ttl):
+        now = time.monotonic()
+        with self._lock:
+            lease = self._backend["leases"].get(session_id)
+            if lease and lease[1] > now and lease[0] != worker_id:
+                return lease[0]
+            self._backend["leases"][session_id] = (worker_id, now + ttl)
+            return worker_id
+
+    def owner(self, session_id):
+        with self._lock:
+            lease = self._backend["leases"].get(session_id)
+        if lease and lease[1] > time.monotonic():
+            return lease[0]
+        return None
+
+    def renew(self, session_ids, worker_id, ttl):
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            leases = self._backend["leases"]
+            for session_id in session_ids:
+                if leases.get(session_id, (worker_id,))[0] == worker_id:
+                    leases[session_id] = (worker_id, expires_at)
+
+    def release(self, session_id, worker_id):
+        with self._lock:
+            lease = self._backend["leases"].get(session_id)
+            if lease and lease[0] == worker_id:
+                del self._backend["leases"][session_id]
+
+    def relay(self, worker_id, message):
+        handler = self._backend["handlers"].get(worker_id)
+        if handler is None:
+            log.warning("[REGISTRY] No relay handler for worker %s", worker_id)
+            return
+        # Round-trip through the wire format so local runs exercise the same encoding
+        handler(decode_message(encode_message(message)))
+
+    def subscribe(self, worker_id, handler):
+        self._backend["handlers"][worker_id] = handler
+
+    def save_profile(self, client_id, profile, ttl):
+        # Stored serialized, like Redis, so callers never share a mutable dict
+        with self._lock:
+            self._backend["profiles"][client_id] = (json.dumps(profile), time.monotonic() + ttl)
+
+    def load_profile(self, client_id):
+        with self._lock:
+            entry = self._backend["profiles"].get(client_id)
+        if entry and entry[1] > time.monotonic():
+            return json.loads(entry[0])
+        return None
+
+    def delete_profile(self, client_id):
+        with self._lock:
+            self._backend["profiles"].pop(client_id, None)
+
+
+class RedisRegistry(SessionRegistry):
+    """Registry backed by Redis keys for leases and pub/sub channels for relay."""
+
+    KEY_PREFIX = "agent:session-owner:"
+    CHANNEL_PREFIX = "agent:worker:"
+    PROFILE_PREFIX = "agent:profile:"
+
+    # Only release/renew a lease if this worker still holds it
+    _RELEASE = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+    _RENEW = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('pexpire', KEYS[1], ARGV[2]) end return 0"
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("REGISTRY_URL points at Redis but the 'redis' package is not installed") from e
+        self._redis = redis.Redis.from_url(url)
+        self._release = self._redis.register_script(self._RELEASE)
+        self._renew = self._redis.register_script(self._RENEW)
+
+    def claim(self, session_id, worker_id, ttl):
+        key = self.KEY_PREFIX + session_id
+        for _ in range(2):
+            if self._redis.set(key, worker_id, nx=True, px=int(ttl * 1000)):
+                return worker_id
+            owner = self._redis.get(key)
+            if owner is not None:
+                return owner.decode("utf-8")
+            # The lease expired between SET and GET; try to take it once more
+        return self.owner(session_id) or worker_id
+
+    def owner(self, session_id):
+        owner = self._redis.get(self.KEY_PREFIX + session_id)
+        return owner.decode("utf-8") if owner else None
+
+    def renew(self, session_ids, worker_id, ttl):
+        for session_id in session_ids:
+            self._renew(keys=[self.KEY_PREFIX + session_id], args=[worker_id, int(ttl * 1000)])
+
+    def release(self, session_id, worker_id):
+        self._release(keys=[self.KEY_PREFIX + session_id], args=[worker_id])
+
+    def relay(self, worker_id, message):
+        self._redis.publish(self.CHANNEL_PREFIX + worker_id, encode_message(message))
+
+    def subscribe(self, worker_id, handler):
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.CHANNEL_PREFIX + worker_id)
+
+        def listen():
+            for item in pubsub.listen():
+                try:
+                    handler(decode_message(item["data"]))
+                except Exception as e:
+                    log.error("[REGISTRY] Relay handler failed: %s", e)
+
+        threading.Thread(target=listen, name="registry-relay", daemon=True).start()
+
+    def save_profile(self, client_id, profile, ttl):
+        self._redis.set(self.PROFILE_PREFIX + client_id, json.dumps(profile), px=int(ttl * 1000))
+
+    def load_profile(self, client_id):
+        profile = self._redis.get(self.PROFILE_PREFIX + client_id)
+        return json.loads(profile) if profile else None
+
+    def delete_profile(self, client_id):
+        self._redis.delete(self.PROFILE_PREFIX + client_id)
+
+
+def create_registry(url=None):
+    """Build the registry for REGISTRY_URL: empty or 'local' for in-process, 'redis://...' for Redis."""
+    if not url or url == "local":
+        return LocalRegistry()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisRegistry(url)
+    raise ValueError(f"Unsupported REGISTRY_URL: {url}")
@@ -0,0 +1,12 @@
+"""Development server entry point: `python serve.py`.
+
+The frame normalizer's worker processes re-run the main script as
+`__mp_main__` when they start. This script only imports `app` under the
+`__main__` guard, so they pay nothing for it; running `app.py` itself as the
+main script would load the whole server in every worker.
+"""
+
+if __name__ == "__main__":
+    import app
+
+    app.main()
@@ -0,0 +1,110 @@
+"""Shared asyncio engine that hosts every live session coroutine.
+
+Instead of a thread and event loop per session, a small fixed pool of
+long-lived loops runs all sessions. Each session is pinned to one loop by
+hashing its session_id, so everything a session touches stays on one thread.
+"""
+
+import asyncio
+import logging
+import threading
+import zlib
+
+log = logging.getLogger("agent.session")
+
+
+class EngineFull(Exception):
+    """Raised when the loop a session shards to has no free session slots."""
+
+
+class _LoopShard:
+    def __init__(self, index):
+        self.index = index
+        self.loop = asyncio.new_event_loop()
+        self.sessions = set()
+        self.thread = threading.Thread(
+            target=self._run, name=f"session-loop-{index}", daemon=True
+        )
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+
+class SessionEngine:
+    """A fixed pool of event loops with a per-loop session cap.
+
+    Socket handlers never touch a loop directly: `submit` schedules a session
+    coroutine and `call_soon` runs a callback on the session's loop, both via
+    the loop's thread-safe call queue.
+    """
+
+    def __init__(self, num_loops=1, max_sessions_per_loop=100):
+        self.num_loops = max(1, int(num_loops))
+        self.max_sessions_per_loop = max(1, int(max_sessions_per_loop))
+        self._shards = [_LoopShard(i) for i in range(self.num_loops)]
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            for shard in self._shards:
+                shard.thread.start()
+            self._started = True
+            log.info(
+                "[ENGINE] Started %d session loop(s), %d sessions per loop",
+                self.num_loops, self.max_sessions_per_loop,
+            )
+
+    def _shard_for(self, session_id):
+        return self._shards[zlib.crc32(session_id.encode("utf-8")) % self.num_loops]
+
+    def submit(self, session_id, coro_factory):
+        """Run `coro_factory()` on the session's loop and return a concurrent Future.
+
+        Raises EngineFull if that loop is already hosting its maximum number of sessions.
+        """
+        self.start()
+        shard = self._shard_for(session_id)
+        with self._lock:
+            if session_id not in shard.sessions and len(shard.sessions) >= self.max_sessions_per_loop:
+                raise EngineFull(f"session loop {shard.index} is full")
+            shard.sessions.add(session_id)
+
+        def release(future):
+            with self._lock:
+                shard.sessions.discard(session_id)
+            if not future.cancelled() and future.exception() is not None:
+                log.error("[ENGINE] Session crashed: %r", future.exception(), extra={"session_id": session_id})
+
+        future = asyncio.run_coroutine_threadsafe(coro_factory(), shard.loop)
+        future.add_done_callback(release)
+        return future
+
+    def call_soon(self, session_id, callback, *args):
+        """Schedule a plain callback on the session's loop from any thread.
+
+        This is the only way other threads reach a session loop; a call that
+        races with the loop shutting down is dropped.
+        """
+        loop = self._shard_for(session_id).loop
+        if not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(callback, *args)
+            except RuntimeError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            loops = [
+                {"loop": shard.index, "sessions": len(shard.sessions)}
+                for shard in self._shards
+            ]
+        return {
+            "loops": loops,
+            "max_sessions_per_loop": self.max_sessions_per_loop,
+            "active_sessions": sum(entry["sessions"] for entry in loops),
+            "capacity": self.num_loops * self.max_sessions_per_loop,
+        }
@@ -0,0 +1,220 @@
+"""Bounded key-value stores for per-session state.
+
+`MemoryStore` is an LRU with an idle TTL, `SqliteStore` keeps everything in a
+single SQLite file, and `TieredStore` puts the former in front of the latter.
+All stores expire idle entries and report their size through `stats()`.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+
+class SessionStore:
+    """Interface shared by every session-state backend."""
+
+    def get(self, key, default=None):
+        raise NotImplementedError
+
+    def set(self, key, value):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def expire(self):
+        """Drop every entry idle for longer than the TTL; return how many were removed."""
+        raise NotImplementedError
+
+    def stats(self):
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+
+class MemoryStore(SessionStore):
+    """In-process LRU store. Entries expire after `ttl` seconds without access."""
+
+    def __init__(self, max_entries=10000, ttl=3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value, last_access), least recently used first
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            if now - entry[1] > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                return default
+            self._entries[key] = (entry[0], now)
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value):
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = (value, now)
+            self._entries.move_to_end(key)
+            self._expire_locked(now)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def items(self):
+        """Snapshot of the live (unexpired) entries."""
+        now = time.monotonic()
+        with self._lock:
+            return [(k, v) for k, (v, seen) in self._entries.items() if now - seen <= self.ttl]
+
+    def expire(self):
+        with self._lock:
+            return self._expire_locked(time.monotonic())
+
+    def _expire_locked(self, now):
+        # Entries are kept in access order, so expired ones are always at the front
+        removed = 0
+        while self._entries:
+            key, (_, seen) = next(iter(self._entries.items()))
+            if now - seen <= self.ttl:
+                break
+            del self._entries[key]
+            removed += 1
+        self.expirations += removed
+        return removed
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class SqliteStore(SessionStore):
+    """Single-file on-disk store. Values are stored as JSON."""
+
+    SWEEP_INTERVAL = 60.0
+
+    def __init__(self, path, ttl=7200.0):
+        self.path = Path(path)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_state ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, updated REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS session_state_updated ON session_state(updated)")
+        self._last_sweep = 0.0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM session_state WHERE key = ? AND updated >= ?",
+                (key, time.time() - self.ttl),
+            ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO session_state (key, value, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated = excluded.updated",
+                (key, json.dumps(value), now),
+            )
+            if now - self._last_sweep > self.SWEEP_INTERVAL:
+                self._expire_locked(now)
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM session_state WHERE key = ?", (key,))
+
+    def expire(self):
+        with self._lock:
+            return self._expire_locked(time.time())
+
+    def _expire_locked(self, now):
+        self._last_sweep = now
+        removed = self._conn.execute(
+            "DELETE FROM session_state WHERE updated < ?", (now - self.ttl,)
+        ).rowcount
+        self.expirations += removed
+        return removed
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM session_state").fetchone()[0]
+        return {
+            "backend": "sqlite",
+            "path": str(self.path),
+            "entries": entries,
+            "file_bytes": self.path.stat().st_size if self.path.exists() else 0,
+            "ttl_s": self.ttl,
+            "expirations": self.expirations,
+        }
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM session_state").fetchone()[0]
+
+
+class TieredStore(SessionStore):
+    """Memory tier in front of a durable tier; reads fall through, writes go to both."""
+
+    def __init__(self, memory, disk):
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key, default=None):
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        value = self.disk.get(key)
+        if value is None:
+            return default
+        self.memory.set(key, value)
+        return value
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        self.disk.set(key, value)
+
+    def delete(self, key):
+        self.memory.delete(key)
+        self.disk.delete(key)
+
+    def expire(self):
+        return self.memory.expire() + self.disk.expire()
+
+    def stats(self):
+        return {"memory": self.memory.stats(), "disk": self.disk.stats()}
+
+    def __len__(self):
+        return len(self.disk)
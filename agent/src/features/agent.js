@@ -22,6 +22,9 @@ let audioWorklet = null;
 let mediaStream = null;
 let sessionId = localStorage.getItem('support_bot_session_id') || `session-${Date.now()}`;
 localStorage.setItem('support_bot_session_id', sessionId);
+// Stable per browser, unlike sessionId; keys the profile (credentials, name) that every server worker reads
+const clientId = localStorage.getItem('support_bot_client_id') || newClientId();
+localStorage.setItem('support_bot_client_id', clientId);
 
 let isRecording = false;
 let isConnected = false;
@@ -33,6 +36,16 @@ let isPlayingAudio = false;
 let playbackAudioContext = null;
 let currentAudioSource = null;
 
+// Audio codec negotiated with the server at start_live_session: 'opus' or 'pcm'
+let audioCodec = 'pcm';
+const codecSupport = detectAudioCodecs();
+let micEncoder = null;
+let micPackets = [];
+let micTimestamp = 0;
+let playbackDecoder = null;
+let decodeChain = Promise.resolve();
+let playbackGeneration = 0;
+
 let cameraStream = null;
 let screenStream = null;
 let cameraInterval = null;
@@ -50,6 +63,11 @@ let messagesContainer, userInput, sendButton, voiceButton, cameraButton;
 let screenShareButton, cameraVideo, cameraContainer, userNameInput;
 let setNameButton, currentUserNameDisplay, clearAllButton, uploadButton;
 
+function newClientId() {
+    const bytes = crypto.getRandomValues(new Uint8Array(16));
+    return 'client-' + Array.from(bytes, (b) => b.toString(16).padStart(2, '0')).join('');
+}
+
 function clearSessionState() {
     conversationHistory = [];
     lastCameraFrame = null;
@@ -131,7 +149,7 @@ export function initGenMediaChat() {
 
 async function loadCurrentUserName() {
     try {
-        const response = await fetch('/api/get-user-name');
+        const response = await fetch('/api/get-user-name', { headers: { 'X-Client-Id': clientId } });
         const data = await response.json();
         if (data.name && currentUserNameDisplay) {
             currentUserNameDisplay.textContent = data.name;
@@ -152,7 +170,7 @@ async function setUserName() {
     try {
         const response = await fetch('/api/set-user-name', {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
+            headers: { 'Content-Type': 'application/json', 'X-Client-Id': clientId },
             body: JSON.stringify({ name })
         });
 
@@ -310,9 +328,13 @@ function initSocket() {
     if (socket?.connected) return;
     if (socket) socket.close();
 
+    // WebSocket carries audio and frames as binary frames. The client only moves on to the
+    // next transport when the first fails if tryAllTransports is set (socket.io-client 4.8+).
+    // session_id lets a load balancer route every socket of a session to the same worker.
     socket = io({
-        transports: ['polling'],
-        upgrade: false,
+        transports: ['websocket', 'polling'],
+        tryAllTransports: true,
+        query: { session_id: sessionId },
         reconnection: true,
         reconnectionDelay: 1000,
         reconnectionDelayMax: 3000,
@@ -348,9 +370,14 @@ function initSocket() {
         sessionStartPending = false;
         updateConnectionStatus('Live', 'active');
         if (data.user_name) currentUserName = data.user_name;
+        audioCodec = data.codec || 'pcm';
         clearTranscript();
     });
 
+    socket.on('live_session_queued', (data) => {
+        updateConnectionStatus(`Waiting for a free slot (#${data.position})`, 'warning');
+    });
+
     socket.on('live_session_ended', () => {
         isConnected = false;
         updateConnectionStatus('Disconnected', 'inactive');
@@ -370,6 +397,9 @@ function initSocket() {
 
     socket.on('audio_response', playAudioResponse);
 
+    // The user barged in: drop queued model audio and stop what is playing
+    socket.on('audio_flush', stopAudioPlayback);
+
     socket.on('text_response', (data) => {
         if (data.text) appendTranscript(data.text);
     });
@@ -428,7 +458,7 @@ async function waitForConnection(timeout = 15000) {
 function requestSessionStart() {
     if (sessionStartPending) return false;
     sessionStartPending = true;
-    socket.emit('start_live_session', { session_id: sessionId });
+    codecSupport.then((codecs) => socket.emit('start_live_session', { session_id: sessionId, client_id: clientId, codecs }));
     return true;
 }
 
@@ -532,25 +562,27 @@ async function startVoice() {
         processor.onaudioprocess = (e) => {
             if (!isRecording || !isConnected) return;
             const inputData = e.inputBuffer.getChannelData(0);
-            const int16Array = new Int16Array(inputData.length);
-            for (let i = 0; i < inputData.length; i++) {
-                const s = Math.max(-1, Math.min(1, inputData[i]));
-                int16Array[i] = s < 0 ? s * 0x8000 : s * 0x7FFF;
+            if (audioCodec === 'opus') {
+                encodeMicAudio(inputData);
+            } else {
+                const int16Array = new Int16Array(inputData.length);
+                for (let i = 0; i < inputData.length; i++) {
+                    const s = Math.max(-1, Math.min(1, inputData[i]));
+                    int16Array[i] = s < 0 ? s * 0x8000 : s * 0x7FFF;
+                }
+                audioBuffer.push(...int16Array);
             }
 
-            audioBuffer.push(...int16Array);
-
             const now = Date.now();
-            if (now - lastSendTime >= SEND_INTERVAL_MS && audioBuffer.length > 0) {
-                // Convert accumulated samples to Int16Array, then base64-encode
+            if (now - lastSendTime >= SEND_INTERVAL_MS && micPackets.length > 0) {
+                // Send accumulated Opus packets, length-prefixed, as one binary attachment
+                socket.emit('send_audio', { session_id: sessionId, audio: packOpusPackets(micPackets), codec: 'opus' });
+                micPackets = [];
+                lastSendTime = now;
+            } else if (now - lastSendTime >= SEND_INTERVAL_MS && audioBuffer.length > 0) {
+                // Send accumulated samples as a raw PCM binary attachment
                 const samples = new Int16Array(audioBuffer);
-                const bytes = new Uint8Array(samples.buffer);
-                let binary = '';
-                for (let i = 0; i < bytes.length; i++) {
-                    binary += String.fromCharCode(bytes[i]);
-                }
-                const base64Audio = btoa(binary);
-                socket.emit('send_audio', { session_id: sessionId, audio: base64Audio });
+                socket.emit('send_audio', { session_id: sessionId, audio: samples.buffer });
                 audioBuffer = [];
                 lastSendTime = now;
             }
@@ -573,6 +605,7 @@ async function startVoice() {
 
 function stopVoice() {
     if (audioWorklet) { audioWorklet.disconnect(); audioWorklet = null; }
+    if (micEncoder) { micEncoder.close(); micEncoder = null; micPackets = []; }
     if (audioContext) { audioContext.close(); audioContext = null; }
     if (mediaStream) { mediaStream.getTracks().forEach(track => track.stop()); mediaStream = null; }
 
@@ -632,16 +665,7 @@ function sendCameraFrame() {
     if (ar > 1) { dh = 768/ar; oy = (768-dh)/2; } else { dw = 768*ar; ox = (768-dw)/2; }
     ctx.drawImage(cameraVideo, ox, oy, dw, dh);
 
-    canvas.toBlob((blob) => {
-        const reader = new FileReader();
-        reader.onloadend = () => {
-            const base64 = reader.result.split(',')[1];
-            lastCameraFrame = `data:image/jpeg;base64,${base64}`;
-            socket.emit('send_camera_frame', { session_id: sessionId, frame: base64 });
-            setTimeout(() => { isProcessingFrame = false; }, 50);
-        };
-        reader.readAsDataURL(blob);
-    }, 'image/jpeg', 0.6);
+    canvas.toBlob((blob) => sendFrameBlob(blob), 'image/jpeg', 0.6);
 }
 
 async function toggleScreenShare() {
@@ -694,24 +718,131 @@ function sendScreenFrame(screenVideo) {
     if (ar > 1) { dh = 768/ar; oy = (768-dh)/2; } else { dw = 768*ar; ox = (768-dw)/2; }
     ctx.drawImage(screenVideo, ox, oy, dw, dh);
 
-    canvas.toBlob((blob) => {
-        const reader = new FileReader();
-        reader.onloadend = () => {
-            const base64 = reader.result.split(',')[1];
-            lastCameraFrame = `data:image/jpeg;base64,${base64}`;
-            socket.emit('send_camera_frame', { session_id: sessionId, frame: base64 });
-            setTimeout(() => { isProcessingFrame = false; }, 50);
-        };
-        reader.readAsDataURL(blob);
-    }, 'image/jpeg', 0.6);
+    canvas.toBlob((blob) => sendFrameBlob(blob), 'image/jpeg', 0.6);
+}
+
+async function sendFrameBlob(blob) {
+    try {
+        lastCameraFrame = blob;
+        const frame = await blob.arrayBuffer();
+        socket.emit('send_camera_frame', { session_id: sessionId, frame });
+    } finally {
+        setTimeout(() => { isProcessingFrame = false; }, 50);
+    }
+}
+
+async function detectAudioCodecs() {
+    if (!('AudioEncoder' in window) || !('AudioDecoder' in window)) return ['pcm'];
+    try {
+        const enc = await AudioEncoder.isConfigSupported({ codec: 'opus', sampleRate: 16000, numberOfChannels: 1 });
+        const dec = await AudioDecoder.isConfigSupported({ codec: 'opus', sampleRate: 24000, numberOfChannels: 1 });
+        return enc.supported && dec.supported ? ['opus', 'pcm'] : ['pcm'];
+    } catch (error) {
+        return ['pcm'];
+    }
+}
+
+function packOpusPackets(packets) {
+    const total = packets.reduce((sum, p) => sum + 2 + p.byteLength, 0);
+    const out = new Uint8Array(total);
+    const view = new DataView(out.buffer);
+    let offset = 0;
+    for (const packet of packets) {
+        view.setUint16(offset, packet.byteLength);
+        out.set(packet, offset + 2);
+        offset += 2 + packet.byteLength;
+    }
+    return out.buffer;
+}
+
+function unpackOpusPackets(buffer) {
+    const bytes = new Uint8Array(buffer);
+    const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+    const packets = [];
+    let offset = 0;
+    while (offset + 2 <= bytes.length) {
+        const size = view.getUint16(offset);
+        packets.push(bytes.subarray(offset + 2, offset + 2 + size));
+        offset += 2 + size;
+    }
+    return packets;
+}
+
+function encodeMicAudio(samples) {
+    if (!micEncoder) {
+        micEncoder = new AudioEncoder({
+            output: (chunk) => {
+                const packet = new Uint8Array(chunk.byteLength);
+                chunk.copyTo(packet);
+                micPackets.push(packet);
+            },
+            error: (error) => console.error('Opus encode error:', error)
+        });
+        micEncoder.configure({ codec: 'opus', sampleRate: 16000, numberOfChannels: 1, bitrate: 24000 });
+    }
+    const audioData = new AudioData({
+        format: 'f32', sampleRate: 16000, numberOfFrames: samples.length, numberOfChannels: 1,
+        timestamp: micTimestamp, data: new Float32Array(samples)
+    });
+    micTimestamp += Math.round(samples.length * 1e6 / 16000);
+    micEncoder.encode(audioData);
+    audioData.close();
+}
+
+async function decodeOpusResponse(buffer) {
+    const frames = [];
+    if (!playbackDecoder || playbackDecoder.state === 'closed') {
+        playbackDecoder = new AudioDecoder({
+            output: (audioData) => {
+                const pcm = new Float32Array(audioData.numberOfFrames);
+                audioData.copyTo(pcm, { planeIndex: 0, format: 'f32-planar' });
+                audioData.close();
+                playbackDecoder.frames.push(pcm);
+            },
+            error: (error) => console.error('Opus decode error:', error)
+        });
+        playbackDecoder.configure({ codec: 'opus', sampleRate: 24000, numberOfChannels: 1 });
+    }
+    playbackDecoder.frames = frames;
+    let timestamp = 0;
+    for (const packet of unpackOpusPackets(buffer)) {
+        playbackDecoder.decode(new EncodedAudioChunk({ type: 'key', timestamp, data: packet }));
+        timestamp += 20000;
+    }
+    await playbackDecoder.flush();
+    const pcm = new Float32Array(frames.reduce((sum, f) => sum + f.length, 0));
+    let offset = 0;
+    for (const f of frames) { pcm.set(f, offset); offset += f.length; }
+    return pcm;
 }
 
 function playAudioResponse(data) {
     if (!data.audio) return;
+    if (data.codec === 'opus') {
+        // Decode in arrival order; anything still decoding when the user barges in is dropped
+        const generation = playbackGeneration;
+        decodeChain = decodeChain.then(() => decodeOpusResponse(data.audio)).then((pcm) => {
+            if (generation !== playbackGeneration) return;
+            audioQueue.push({ pcm });
+            if (!isPlayingAudio) playNextInQueue();
+        }).catch((error) => console.error('Opus decode error:', error));
+        return;
+    }
     audioQueue.push(data);
     if (!isPlayingAudio) playNextInQueue();
 }
 
+function stopAudioPlayback() {
+    playbackGeneration++;
+    audioQueue = [];
+    isPlayingAudio = false;
+    if (currentAudioSource) {
+        currentAudioSource.onended = null;
+        try { currentAudioSource.stop(); } catch (e) { /* already stopped */ }
+        currentAudioSource = null;
+    }
+}
+
 async function playNextInQueue() {
     if (audioQueue.length === 0) { isPlayingAudio = false; return; }
     isPlayingAudio = true;
@@ -723,11 +854,13 @@ async function playNextInQueue() {
         }
         if (playbackAudioContext.state === 'suspended') await playbackAudioContext.resume();
 
-        const bytes = Uint8Array.from(atob(data.audio), c => c.charCodeAt(0));
-        const int16 = new Int16Array(bytes.buffer);
-        const float32 = new Float32Array(int16.length);
-        for (let i = 0; i < int16.length; i++) {
-            float32[i] = int16[i] / (int16[i] < 0 ? 32768 : 32767);
+        let float32 = data.pcm;
+        if (!float32) {
+            const int16 = new Int16Array(data.audio);
+            float32 = new Float32Array(int16.length);
+            for (let i = 0; i < int16.length; i++) {
+                float32[i] = int16[i] / (int16[i] < 0 ? 32768 : 32767);
+            }
         }
 
         const buf = playbackAudioContext.createBuffer(1, float32.length, 24000);
@@ -0,0 +1,89 @@
+"""Deferred imports and background warm-up for fast cold starts.
+
+Importing the GenAI SDK and discovering default credentials (which may probe
+the metadata server) takes long enough to be noticeable on a scale-to-zero
+host, where the first visitor waits for it. `LazyModule` stands in for a
+module and imports it on first attribute access, and `Warmup` runs the slow
+steps once on a background thread, recording how long each took, so
+readiness can be reported while the server already accepts connections.
+"""
+
+import importlib
+import logging
+import threading
+import time
+
+log = logging.getLogger("agent.session")
+
+BACKGROUND = "background"
+LAZY = "lazy"
+EAGER = "eager"
+MODES = (BACKGROUND, LAZY, EAGER)
+
+
+class LazyModule:
+    """Proxy that imports `name` the first time one of its attributes is used."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def load(self):
+        """Import the module now if it has not been imported yet, and return it."""
+        if self._module is None:
+            # import_module serializes concurrent first imports on the module's import lock
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+
+class Warmup:
+    """Named warm-up steps that run once, in order."""
+
+    def __init__(self):
+        self._steps = []
+        self._results = {}
+        self._lock = threading.Lock()
+        self.ready = threading.Event()
+        self.started_at = None
+        self.finished_at = None
+
+    def add(self, name, fn):
+        self._steps.append((name, fn))
+
+    def run(self):
+        """Run every step on the calling thread. A failing step is recorded and skipped."""
+        self.started_at = time.monotonic()
+        for name, fn in self._steps:
+            started = time.perf_counter()
+            try:
+                fn()
+                result = {"ok": True}
+            except Exception as e:
+                log.warning("[STARTUP] Warm-up step %s failed: %s: %s", name, type(e).__name__, e)
+                result = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            result["seconds"] = round(time.perf_counter() - started, 4)
+            with self._lock:
+                self._results[name] = result
+        self.finished_at = time.monotonic()
+        self.ready.set()
+        log.info("[STARTUP] Warm-up finished in %.2fs", self.finished_at - self.started_at)
+
+    def start(self):
+        threading.Thread(target=self.run, name="warmup", daemon=True).start()
+
+    def skip(self):
+        """Mark the server ready without running anything; steps then happen on first use."""
+        self.ready.set()
+
+    def status(self):
+        with self._lock:
+            steps = dict(self._results)
+        return {
+            "ready": self.ready.is_set(),
+            "steps": steps,
+            "pending": [name for name, _ in self._steps if name not in steps] if self.started_at is not None else [],
+            "seconds": round(self.finished_at - self.started_at, 4) if self.finished_at is not None else None,
+        }
@@ -0,0 +1,197 @@
+"""Admission control and lifetime tracking for live sessions on one worker.
+
+`SessionSupervisor` hands out a fixed number of session slots. A session
+that arrives while every slot is taken waits in a bounded FIFO queue and is
+started as soon as a slot frees up; past the queue it is refused. For every
+admitted session it records the socket that owns it and when media last
+arrived, so `reap` can report sessions that went idle or whose browser went
+away without sending `stop_live_session`. Each running session is reported
+once; it keeps its slot until the caller has stopped it and calls `release`.
+
+The supervisor only keeps the books. Starting and stopping sessions is done
+by the callbacks and reap results it hands back to the caller.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+STARTED = "started"
+QUEUED = "queued"
+FULL = "full"
+RESTARTING = "restarting"
+
+
+class _Slot:
+    __slots__ = ("sid", "admitted_at", "last_media_at", "orphaned_at", "reaped")
+
+    def __init__(self, sid, now):
+        self.sid = sid
+        self.admitted_at = now
+        self.last_media_at = now
+        self.orphaned_at = None
+        self.reaped = False
+
+
+class SessionSupervisor:
+    def __init__(self, max_sessions=200, max_waiting=50, wait_timeout=30.0,
+                 idle_timeout=300.0, orphan_timeout=30.0, clock=time.monotonic):
+        self.max_sessions = max_sessions
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self.idle_timeout = idle_timeout
+        self.orphan_timeout = orphan_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._slots = {}  # session_id -> _Slot
+        self._waiting = OrderedDict()  # session_id -> (sid, start, enqueued_at)
+        self._retries = {}  # session_id -> (sid, retry, requested_at) for sessions whose slot is still held
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.reaped = {"idle": 0, "orphaned": 0, "wait_timeout": 0}
+
+    def admit(self, session_id, sid, start, retry=None):
+        """Start a session now, queue it, or refuse it. Returns (STARTED|QUEUED|FULL|RESTARTING, queue_position).
+
+        `start()` is called without the lock held, immediately for STARTED or
+        later from `release` once a queued session gets a slot.
+
+        RESTARTING means the session still holds a slot from a run that is
+        ending. Nothing is started; `retry()`, if given, is called once
+        `release` frees that slot, so the caller can admit the session again.
+        """
+        with self._lock:
+            if session_id in self._slots:
+                if retry is not None:
+                    self._retries[session_id] = (sid, retry, self._clock())
+                return RESTARTING, 0
+            if session_id in self._waiting:
+                self._waiting[session_id] = (sid, start, self._waiting[session_id][2])
+                return QUEUED, list(self._waiting).index(session_id) + 1
+            if len(self._slots) < self.max_sessions:
+                self._slots[session_id] = _Slot(sid, self._clock())
+                self.admitted += 1
+                outcome = STARTED
+            elif len(self._waiting) < self.max_waiting:
+                self._waiting[session_id] = (sid, start, self._clock())
+                self.queued += 1
+                return QUEUED, len(self._waiting)
+            else:
+                self.rejected += 1
+                return FULL, 0
+        start()
+        return outcome, 0
+
+    def release(self, session_id):
+        """Free a session's slot, start the next queued session and retry a restart of this one."""
+        start = None
+        with self._lock:
+            if self._slots.pop(session_id, None) is None:
+                return
+            retry = self._retries.pop(session_id, None)
+            if self._waiting:
+                next_id, (sid, start, _) = self._waiting.popitem(last=False)
+                self._slots[next_id] = _Slot(sid, self._clock())
+                self.admitted += 1
+        if start is not None:
+            start()
+        if retry is not None:
+            retry[1]()
+
+    def cancel(self, session_id):
+        """Drop a session from the wait queue or a pending restart. Returns True if it was waiting."""
+        with self._lock:
+            waiting = self._waiting.pop(session_id, None) is not None
+            restarting = self._retries.pop(session_id, None) is not None
+            return waiting or restarting
+
+    def touch(self, session_id):
+        """Record inbound media for a session."""
+        slot = self._slots.get(session_id)
+        if slot is not None:
+            slot.last_media_at = self._clock()
+
+    def attach(self, session_id, sid):
+        """A socket (re)attached to the session; it is no longer orphaned."""
+        with self._lock:
+            slot = self._slots.get(session_id)
+            if slot is not None:
+                slot.sid = sid
+                slot.orphaned_at = None
+
+    def detach(self, sid, session_id=None):
+        """The socket `sid` disconnected. Marks its sessions orphaned and drops its queued sessions.
+
+        Returns the ids of sessions that were waiting or restarting and have been dropped.
+        """
+        now = self._clock()
+        with self._lock:
+            for sess_id, slot in self._slots.items():
+                if slot.sid == sid and session_id in (None, sess_id) and slot.orphaned_at is None:
+                    slot.orphaned_at = now
+            dropped = []
+            for queue in (self._waiting, self._retries):
+                gone = [sess_id for sess_id, entry in queue.items() if entry[0] == sid]
+                for sess_id in gone:
+                    del queue[sess_id]
+                dropped += gone
+        return dropped
+
+    def reap(self):
+        """Collect sessions past their limits.
+
+        Returns (expired, waiters): `expired` is a list of (session_id, sid,
+        reason) for running sessions that should be stopped, with reason
+        "idle" or "orphaned"; `waiters` is a list of (session_id, sid) that
+        gave up waiting for a slot or for a restart. Running sessions keep
+        their slot until the caller stops them and calls `release`, but are
+        only reported by the first pass that finds them expired.
+        """
+        now = self._clock()
+        expired = []
+        with self._lock:
+            for session_id, slot in self._slots.items():
+                if slot.reaped:
+                    continue
+                if slot.orphaned_at is not None and now - slot.orphaned_at >= self.orphan_timeout:
+                    expired.append((session_id, slot.sid, "orphaned"))
+                    slot.reaped = True
+                elif self.idle_timeout and now - slot.last_media_at >= self.idle_timeout:
+                    expired.append((session_id, slot.sid, "idle"))
+                    slot.reaped = True
+            waiters = []
+            for queue in (self._waiting, self._retries):
+                gone = [(session_id, entry[0]) for session_id, entry in queue.items() if now - entry[2] >= self.wait_timeout]
+                for session_id, _ in gone:
+                    del queue[session_id]
+                waiters += gone
+            for _, _, reason in expired:
+                self.reaped[reason] += 1
+            self.reaped["wait_timeout"] += len(waiters)
+        return expired, waiters
+
+    def stats(self):
+        now = self._clock()
+        with self._lock:
+            sessions = {
+                session_id: {
+                    "sid": slot.sid,
+                    "age_s": round(now - slot.admitted_at, 1),
+                    "idle_s": round(now - slot.last_media_at, 1),
+                    "orphaned_s": None if slot.orphaned_at is None else round(now - slot.orphaned_at, 1),
+                }
+                for session_id, slot in self._slots.items()
+            }
+            return {
+                "slots_used": len(self._slots),
+                "slots_total": self.max_sessions,
+                "waiting": len(self._waiting),
+                "restarting": len(self._retries),
+                "wait_queue_size": self.max_waiting,
+                "admitted": self.admitted,
+                "queued": self.queued,
+                "rejected": self.rejected,
+                "reaped": dict(self.reaped),
+                "sessions": sessions,
+            }
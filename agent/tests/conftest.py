@@ -0,0 +1,41 @@
+import importlib
+import sys
+from pathlib import Path
+
+import pytest
+
+# The server's modules live at the top level of agent/, next to app.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+class FakeClock:
+    """A monotonic clock that only moves when told to."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture(scope="session")
+def app_module(tmp_path_factory):
+    """The server module, imported once against the fake Live API (LIVE_BACKEND=fake)."""
+    with pytest.MonkeyPatch.context() as mp:
+        # data/ is relative to the working directory; keep it out of the checkout
+        mp.chdir(tmp_path_factory.mktemp("server"))
+        mp.setenv("LIVE_BACKEND", "fake")
+        mp.setenv("STARTUP_MODE", "lazy")
+        mp.setenv("FAKE_LIVE_LATENCY_MS", "20")
+        mp.setenv("FAKE_LIVE_CHUNK_INTERVAL_MS", "5")
+        mp.setenv("FAKE_LIVE_DISCONNECT_AFTER", "1")
+        mp.setenv("RECONNECT_BASE_DELAY", "0.01")
+        yield importlib.import_module("app")
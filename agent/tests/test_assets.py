@@ -0,0 +1,111 @@
+import gzip
+
+import pytest
+
+import assets
+from assets import BROTLI, GZIP, IDENTITY, IMMUTABLE, REVALIDATE, AssetBundle, StaticAssets, select_encoding
+
+UI = "export function showToast(text) { console.log(text); }\n" * 20
+AGENT = "import { showToast } from '../ui.js';\nexport function initGenMediaChat() { showToast('hi'); }\n" * 10
+MAIN = "import { initGenMediaChat } from './features/agent.js';\nimport { showToast } from './ui.js';\n" * 10
+PAGE = ('<link rel="stylesheet" href="/style.css">\n<script src="https://cdn.example.com/x.js"></script>\n'
+        '<script type="module" src="/src/main.js"></script>\n' * 10)
+
+
+@pytest.fixture
+def site(tmp_path):
+    (tmp_path / "src" / "features").mkdir(parents=True)
+    (tmp_path / "index.html").write_text(PAGE)
+    (tmp_path / "style.css").write_text("body { color: black; }\n" * 30)
+    (tmp_path / "src" / "ui.js").write_text(UI)
+    (tmp_path / "src" / "main.js").write_text(MAIN)
+    (tmp_path / "src" / "features" / "agent.js").write_text(AGENT)
+    return tmp_path
+
+
+def hashed(bundle, path):
+    stem, suffix = path.rsplit(".", 1)
+    [name] = [name for name in bundle.files if name.startswith(stem + ".") and name.endswith("." + suffix)
+              and name != path]
+    return name
+
+
+def text(bundle, name):
+    return bundle.files[name].bodies[IDENTITY].decode()
+
+
+def test_references_and_imports_point_at_hashed_names(site):
+    bundle = AssetBundle.build(site)
+    ui, agent, main = (hashed(bundle, p) for p in ("src/ui.js", "src/features/agent.js", "src/main.js"))
+    page = text(bundle, "index.html")
+    assert f'href="/assets/{hashed(bundle, "style.css")}"' in page
+    assert f'src="/assets/{main}"' in page
+    assert "https://cdn.example.com/x.js" in page
+    assert f"from '/assets/{agent}'" in text(bundle, main)
+    assert f"from '/assets/{ui}'" in text(bundle, agent)
+    assert bundle.files[main].immutable and not bundle.files["index.html"].immutable
+
+
+def test_a_change_renames_the_module_and_everything_that_imports_it(site):
+    before = AssetBundle.build(site)
+    (site / "src" / "ui.js").write_text(UI + "// changed\n")
+    after = AssetBundle.build(site)
+    for path in ("src/ui.js", "src/features/agent.js", "src/main.js"):
+        assert hashed(before, path) != hashed(after, path)
+    assert hashed(before, "style.css") == hashed(after, "style.css")
+
+
+def test_import_cycle_leaves_scripts_unhashed(site):
+    (site / "src" / "ui.js").write_text("import { x } from './main.js';\n" + UI)
+    bundle = AssetBundle.build(site)
+    assert not any(name.endswith(".js") for name in bundle.files)
+    assert 'src="/src/main.js"' in text(bundle, "index.html")
+
+
+def test_precompressed_bodies_decode_to_the_original(site):
+    bundle = AssetBundle.build(site)
+    asset = bundle.files["index.html"]
+    assert gzip.decompress(asset.bodies[GZIP]) == asset.bodies[IDENTITY]
+    assert (BROTLI in asset.bodies) == (assets.brotli is not None)
+
+
+def test_prebuilt_bundle_is_used_only_while_sources_match(site, tmp_path_factory):
+    out = tmp_path_factory.mktemp("build")
+    AssetBundle.build(site).write(out)
+    loaded = AssetBundle.load(out, site)
+    assert loaded.built_from == "prebuilt"
+    assert loaded.files.keys() == AssetBundle.build(site).files.keys()
+    (site / "style.css").write_text("body { color: red; }\n")
+    assert AssetBundle.load(out, site) is None
+    static = StaticAssets(site, out)
+    assert static.load().built_from == "memory"
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, IDENTITY),
+    ("gzip, deflate, br", BROTLI),
+    ("gzip", GZIP),
+    ("br;q=0.5, gzip", GZIP),
+    ("br;q=0, gzip;q=0", IDENTITY),
+    ("*", BROTLI),
+    ("identity;q=0, *;q=0", IDENTITY),
+])
+def test_select_encoding(header, expected):
+    assert select_encoding({IDENTITY: b"", GZIP: b"", BROTLI: b""}, header) == expected
+
+
+def test_respond_negotiates_and_revalidates(site):
+    static = StaticAssets(site)
+    page = static.page("index.html")
+    status, headers, body = page.respond("gzip", None)
+    assert (status, headers["Content-Encoding"], headers["Vary"]) == (200, "gzip", "Accept-Encoding")
+    assert headers["Cache-Control"] == REVALIDATE
+    assert gzip.decompress(body) == page.bodies[IDENTITY]
+    assert page.respond("gzip", f'W/{headers["ETag"]}')[0] == 304
+    # Each encoding has its own tag, so a gzip tag does not validate the identity body
+    assert page.respond(None, headers["ETag"])[0] == 200
+
+    name = hashed(static.load(), "src/main.js")
+    assert static.asset(name).respond(None, None)[1]["Cache-Control"] == IMMUTABLE
+    assert static.asset("index.html") is None
+    assert static.asset("src/main.js") is None
@@ -0,0 +1,34 @@
+import pytest
+
+import audio_codec
+from audio_codec import OPUS, PCM, negotiate, pack_packets, unpack_packets
+
+
+def test_packets_round_trip():
+    packets = [b"", b"\x01", bytes(range(256)) * 4]
+    assert unpack_packets(pack_packets(packets)) == packets
+
+
+def test_packed_packets_are_length_prefixed():
+    assert pack_packets([b"ab", b"c"]) == b"\x00\x02ab\x00\x01c"
+
+
+def test_unpack_accepts_memoryview_and_ignores_a_truncated_prefix():
+    data = memoryview(pack_packets([b"abc"]) + b"\x00")
+    assert unpack_packets(data) == [b"abc"]
+
+
+def test_negotiates_pcm_without_libopus(monkeypatch):
+    monkeypatch.setattr(audio_codec, "opus_available", lambda: False)
+    assert negotiate([OPUS, PCM]) == PCM
+    monkeypatch.setattr(audio_codec, "opus_available", lambda: True)
+    assert negotiate([OPUS, PCM]) == OPUS
+    assert negotiate(None) == PCM
+
+
+def test_encode_pads_only_the_tail_frame():
+    pytest.importorskip("opuslib")
+    codec = audio_codec.OpusCodec(out_rate=24000, frame_ms=20)
+    frame = 24000 * 20 // 1000 * 2
+    assert len(unpack_packets(codec.encode(bytes(frame * 3)))) == 3
+    assert len(unpack_packets(codec.encode(bytes(frame * 3 + 10)))) == 4
@@ -0,0 +1,132 @@
+from audio_out import AudioCoalescer, sample_rate_of
+
+MIME = "audio/pcm;rate=24000"
+MS = 48  # bytes per millisecond of 16-bit audio at 24 kHz
+
+
+class FakeLoop:
+    """Holds `call_later` timers until the test fires them."""
+
+    def __init__(self):
+        self.timers = []
+
+    def call_later(self, delay, callback, *args):
+        timer = Timer(callback, args)
+        self.timers.append(timer)
+        return timer
+
+    def fire(self):
+        timers, self.timers = self.timers, []
+        for timer in timers:
+            if not timer.cancelled:
+                timer.callback(*timer.args)
+
+
+class Timer:
+    def __init__(self, callback, args):
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+def coalescer(**kwargs):
+    loop = FakeLoop()
+    frames = []
+    flushes = []
+    audio = AudioCoalescer(loop, lambda data, mime: frames.append(data), lambda: flushes.append(True), **kwargs)
+    return audio, loop, frames, flushes
+
+
+def test_sample_rate_comes_from_the_mime_type():
+    assert sample_rate_of("audio/pcm;rate=16000") == 16000
+    assert sample_rate_of(None) == 24000
+
+
+def test_held_audio_is_emitted_in_whole_aligned_frames():
+    audio, loop, frames, _ = coalescer(frame_ms=200, align_ms=20)
+    audio.push(bytes(50 * MS), MIME)
+    loop.fire()
+    assert [len(frame) for frame in frames] == [40 * MS]
+    assert audio.stats()["buffered_bytes"] == 10 * MS
+
+    audio.push(bytes(15 * MS), MIME)
+    loop.fire()
+    assert [len(frame) for frame in frames[1:]] == [20 * MS]
+    assert audio.stats()["buffered_bytes"] == 5 * MS
+
+
+def test_full_frame_keeps_the_unaligned_tail():
+    audio, loop, frames, _ = coalescer(frame_ms=200, align_ms=20)
+    audio.push(bytes(210 * MS + 6), MIME)
+    assert [len(frame) for frame in frames] == [200 * MS]
+    assert audio.stats()["buffered_bytes"] == 10 * MS + 6
+
+
+def test_end_of_turn_emits_the_partial_frame():
+    audio, loop, frames, _ = coalescer(frame_ms=200, align_ms=20)
+    audio.push(bytes(7 * MS), MIME)
+    loop.fire()
+    assert frames == []
+    audio.flush()
+    assert [len(frame) for frame in frames] == [7 * MS]
+
+
+def test_first_part_of_a_turn_is_sent_at_once_and_later_parts_are_held():
+    audio, loop, frames, _ = coalescer(frame_ms=200, max_hold=0.1)
+    audio.push(bytes(40 * MS), MIME)
+    assert [len(frame) for frame in frames] == [40 * MS]
+    audio.push(bytes(40 * MS), MIME)
+    audio.push(bytes(40 * MS), MIME)
+    assert len(frames) == 1
+    assert len(loop.timers) == 1
+    loop.fire()
+    assert [len(frame) for frame in frames[1:]] == [80 * MS]
+
+
+def test_parts_filling_a_frame_are_sent_without_waiting():
+    audio, loop, frames, _ = coalescer(frame_ms=100)
+    audio.push(bytes(20 * MS), MIME)
+    for _ in range(5):
+        audio.push(bytes(20 * MS), MIME)
+    assert [len(frame) for frame in frames] == [20 * MS, 100 * MS]
+    loop.fire()
+    assert len(frames) == 2
+
+
+def test_end_of_turn_flushes_and_the_next_turn_starts_at_once():
+    audio, loop, frames, _ = coalescer(frame_ms=200)
+    audio.push(bytes(20 * MS), MIME)
+    audio.push(bytes(30 * MS), MIME)
+    audio.flush()
+    assert [len(frame) for frame in frames] == [20 * MS, 30 * MS]
+    loop.fire()
+    audio.push(bytes(20 * MS), MIME)
+    assert [len(frame) for frame in frames[2:]] == [20 * MS]
+
+
+def test_interrupt_discards_buffered_audio_and_flushes_the_client():
+    audio, loop, frames, flushes = coalescer(frame_ms=200)
+    audio.push(bytes(20 * MS), MIME)
+    audio.push(bytes(30 * MS), MIME)
+    audio.interrupt()
+    loop.fire()
+    assert len(frames) == 1
+    assert flushes == [True]
+    stats = audio.stats()
+    assert (stats["bytes_discarded"], stats["interruptions"], stats["buffered_bytes"]) == (30 * MS, 1, 0)
+    # The model's next answer is a new turn
+    audio.push(bytes(20 * MS), MIME)
+    assert len(frames) == 2
+
+
+def test_odd_trailing_byte_is_carried_into_the_next_frame():
+    audio, loop, frames, _ = coalescer(frame_ms=200)
+    audio.push(b"\x01\x02\x03", MIME)
+    audio.flush()
+    assert frames == [b"\x01\x02"]
+    audio.push(b"\x04", MIME)
+    audio.flush()
+    assert frames == [b"\x01\x02", b"\x03\x04"]
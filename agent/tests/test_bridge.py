@@ -0,0 +1,58 @@
+import time
+
+import pytest
+
+from audio_codec import OPUS, PCM
+
+
+class InlineEngine:
+    """Runs `call_soon` callbacks straight away instead of on a session loop."""
+
+    def call_soon(self, session_id, callback, *args):
+        callback(*args)
+
+
+@pytest.fixture
+def bridge(app_module):
+    return app_module.SessionBridge(InlineEngine(), "bridge-test")
+
+
+def audio(data, codec=PCM, t=None):
+    return {"type": "audio", "data": data, "codec": codec, "t": time.perf_counter() if t is None else t}
+
+
+def test_take_audio_stops_at_the_byte_budget(bridge):
+    for size in (100, 100, 100):
+        bridge.put_nowait(audio(bytes(size)))
+    taken = bridge.take_audio(PCM, 250)
+    assert [len(item["data"]) for item in taken] == [100, 100]
+    assert len(bridge.lanes["audio"]) == 1
+
+
+def test_take_audio_stops_at_a_codec_change(bridge):
+    bridge.put_nowait(audio(b"a"))
+    bridge.put_nowait(audio(b"b", OPUS))
+    bridge.put_nowait(audio(b"c"))
+    assert [item["data"] for item in bridge.take_audio(PCM, 1000)] == [b"a"]
+    assert [item["data"] for item in bridge.lanes["audio"]] == [b"b", b"c"]
+
+
+def test_requeue_failed_retries_once_then_gives_up(bridge):
+    first, second = audio(b"1"), audio(b"2")
+    bridge.put_nowait(audio(b"3"))
+    assert bridge.requeue_failed([first, second], max_attempts=2) == []
+    # Requeued items go back ahead of what arrived meanwhile, in their original order
+    assert [item["data"] for item in bridge.lanes["audio"]] == [b"1", b"2", b"3"]
+
+    bridge.lanes["audio"].clear()
+    assert bridge.requeue_failed([first, second], max_attempts=2) == [first, second]
+    assert not bridge.lanes["audio"]
+
+
+def test_expire_drops_only_old_items_from_the_head(bridge):
+    now = time.perf_counter()
+    for age in (30, 20, 1):
+        bridge.put_nowait(audio(b"x", t=now - age))
+    assert bridge.expire("audio", 10) == 2
+    assert len(bridge.lanes["audio"]) == 1
+    assert bridge.expire("text", 10) == 0
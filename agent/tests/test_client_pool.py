@@ -0,0 +1,99 @@
+import io
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import client_pool
+from client_pool import DEFAULT_TOKEN_LIFETIME, EXPIRY_MARGIN, ClientPool, token_expires_at
+
+
+@pytest.fixture
+def pool(monkeypatch, clock):
+    monkeypatch.setattr(client_pool, "time", SimpleNamespace(time=clock))
+    built = []
+
+    def factory(project, location, access_token):
+        built.append((project, location, access_token))
+        return object()
+
+    pool = ClientPool(factory, max_entries=2, adc_ttl=600)
+    pool.built = built
+    return pool
+
+
+def test_clients_are_reused_until_their_token_expires(pool, clock):
+    first = pool.get("p", "us", "tok", expires_at=clock() + 100)
+    assert pool.get("p", "us", "tok") is first
+    clock.advance(101)
+    assert pool.get("p", "us", "tok") is not first
+    assert len(pool.built) == 2
+    assert (pool.stats()["hits"], pool.stats()["misses"]) == (1, 2)
+
+
+def test_default_credential_clients_expire_after_the_adc_ttl(pool, clock):
+    first = pool.get("p", "us")
+    clock.advance(599)
+    assert pool.get("p", "us") is first
+    clock.advance(2)
+    assert pool.get("p", "us") is not first
+
+
+def test_least_recently_used_client_is_dropped_past_max_entries(pool):
+    a = pool.get("a", "us")
+    pool.get("b", "us")
+    pool.get("a", "us")
+    pool.get("c", "us")
+    assert pool.stats()["clients"] == 2
+    assert pool.get("a", "us") is a
+    pool.get("b", "us")
+    assert len(pool.built) == 4
+
+
+def test_logout_evicts_the_tokens_clients_and_validations(pool, clock):
+    client = pool.get("p", "us", "tok", expires_at=clock() + 100)
+    other = pool.get("p", "us", "other", expires_at=clock() + 100)
+    pool.remember_validation("p", "us", "tok", clock() + 100)
+    pool.evict("tok")
+    assert pool.validated_until("p", "us", "tok") is None
+    assert pool.get("p", "us", "tok") is not client
+    assert pool.get("p", "us", "other") is other
+
+
+def test_validation_is_cached_until_the_token_expires(pool, clock):
+    assert pool.validated_until("p", "us", "tok") is None
+    pool.remember_validation("p", "us", "tok", clock() + 100)
+    assert pool.validated_until("p", "us", "tok") == clock() + 100
+    # A validation for one project does not vouch for another
+    assert pool.validated_until("q", "us", "tok") is None
+    # A client built later inherits the validation's expiry
+    client = pool.get("p", "us", "tok")
+    clock.advance(101)
+    assert pool.validated_until("p", "us", "tok") is None
+    assert pool.get("p", "us", "tok") is not client
+
+
+def test_token_lifetime_is_looked_up_without_the_token_in_the_url(monkeypatch, clock):
+    monkeypatch.setattr(client_pool, "time", SimpleNamespace(time=clock))
+    requests = []
+
+    def urlopen(request, timeout):
+        requests.append(request)
+        return io.BytesIO(json.dumps({"expires_in": "1800"}).encode())
+
+    monkeypatch.setattr(client_pool.urllib.request, "urlopen", urlopen)
+    assert token_expires_at("secret-token") == clock() + 1800 - EXPIRY_MARGIN
+    request = requests[0]
+    assert request.get_method() == "POST"
+    assert "secret-token" not in request.full_url
+    assert request.data == b"access_token=secret-token"
+
+
+def test_token_lifetime_falls_back_when_tokeninfo_fails(monkeypatch, clock):
+    monkeypatch.setattr(client_pool, "time", SimpleNamespace(time=clock))
+
+    def urlopen(request, timeout):
+        raise OSError("offline")
+
+    monkeypatch.setattr(client_pool.urllib.request, "urlopen", urlopen)
+    assert token_expires_at("tok") == clock() + DEFAULT_TOKEN_LIFETIME - EXPIRY_MARGIN
@@ -0,0 +1,83 @@
+import io
+
+import pytest
+from PIL import Image
+
+import frame_gate
+from frame_gate import FrameGate, frame_hash
+
+
+def jpeg(pattern):
+    img = Image.new("L", (64, 64))
+    img.putdata([pattern(x, y) % 256 for y in range(64) for x in range(64)])
+    out = io.BytesIO()
+    img.convert("RGB").save(out, "JPEG", quality=90)
+    return out.getvalue()
+
+
+@pytest.fixture
+def hashes(monkeypatch):
+    """Frames are their own hash: `admit(n)` sees hash n."""
+    monkeypatch.setattr(frame_gate, "frame_hash", lambda value: value)
+
+
+def bits(count):
+    return (1 << count) - 1
+
+
+def test_hash_is_stable_and_tells_scenes_apart():
+    gradient = jpeg(lambda x, y: x * 4)
+    assert frame_hash(gradient) == frame_hash(gradient)
+    mirrored = jpeg(lambda x, y: 255 - x * 4)
+    assert bin(frame_hash(gradient) ^ frame_hash(mirrored)).count("1") >= 16
+
+
+def test_undecodable_frame_has_no_hash():
+    assert frame_hash(b"not a jpeg") is None
+
+
+def test_drops_near_duplicates_and_backs_off(hashes):
+    gate = FrameGate(threshold=5, min_interval=1.0, max_interval=8.0)
+    assert gate.admit(0, now=0.0)
+    assert not gate.admit(bits(2), now=1.0)
+    assert not gate.admit(bits(2), now=2.0)
+    assert gate.stats()["dropped_duplicate"] == 2
+    assert gate.interval == pytest.approx(2.25)
+
+
+def test_moderate_change_waits_for_the_interval_then_speeds_up(hashes):
+    gate = FrameGate(threshold=5, scene_cut=16, min_interval=1.0, max_interval=8.0)
+    gate.admit(0, now=0.0)
+    gate.interval = 8.0
+    assert not gate.admit(bits(8), now=4.0)
+    assert gate.stats()["dropped_rate"] == 1
+    assert gate.admit(bits(8), now=8.5)
+    assert gate.interval == 4.0
+    assert gate.admit(0, now=13.0)
+    assert gate.interval == 2.0
+
+
+def test_scene_cut_is_forwarded_at_once_and_resets_the_interval(hashes):
+    gate = FrameGate(threshold=5, scene_cut=16, min_interval=1.0, max_interval=8.0)
+    gate.admit(0, now=0.0)
+    gate.interval = 8.0
+    assert gate.admit(bits(20), now=0.1)
+    assert gate.interval == 1.0
+
+
+def test_undecodable_frames_are_forwarded(hashes):
+    gate = FrameGate()
+    gate.admit(0, now=0.0)
+    assert gate.admit(None, now=0.1)
+
+
+def test_discarded_frame_is_not_counted_as_forwarded(hashes):
+    gate = FrameGate(scene_cut=16)
+    gate.admit(0, now=0.0)
+    gate.admit(bits(20), now=0.1)
+    gate.discard()
+    stats = gate.stats()
+    assert stats["forwarded"] == 1
+    assert stats["superseded"] == 1
+    # The newer frame that replaced it is what the gate compares against
+    assert not gate.admit(bits(20), now=0.2)
@@ -0,0 +1,80 @@
+import io
+from concurrent.futures import Future
+
+import pytest
+from PIL import Image
+
+from frame_normalize import FrameNormalizer, normalize_frame
+
+
+class HeldPool:
+    """Executor stand-in whose futures finish only when the test says so."""
+
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, fn, jpeg_bytes, *args):
+        future = Future()
+        self.jobs.append((future, jpeg_bytes))
+        return future
+
+    def finish(self, index=0, result=None):
+        future, jpeg_bytes = self.jobs.pop(index)
+        future.set_result(jpeg_bytes if result is None else result)
+
+
+@pytest.fixture
+def normalizer():
+    normalizer = FrameNormalizer(max_side=384, max_bytes=24 * 1024)
+    normalizer._pool = HeldPool()
+    return normalizer
+
+
+def collect(results, name):
+    return lambda data, saved: results.append((name, data))
+
+
+def test_letterboxed_frame_is_cropped_and_downsized():
+    img = Image.new("RGB", (1200, 1200))
+    img.paste((200, 120, 40), (0, 150, 1200, 1050))
+    out = io.BytesIO()
+    img.save(out, "JPEG", quality=95)
+    with Image.open(io.BytesIO(normalize_frame(out.getvalue(), 384, 24 * 1024))) as result:
+        assert max(result.size) == 384
+        assert result.size[0] > result.size[1]
+
+
+def test_one_frame_per_session_in_flight_and_latest_waiting_wins(normalizer):
+    pool = normalizer._pool
+    results = []
+    normalizer.submit("a", b"1", collect(results, "1"))
+    normalizer.submit("a", b"2", collect(results, "2"))
+    normalizer.submit("a", b"3", collect(results, "3"))
+    assert len(pool.jobs) == 1
+    assert results == [("2", None)]
+
+    pool.finish()
+    assert results[1:] == [("1", b"1")]
+    assert [job[1] for job in pool.jobs] == [b"3"]
+    pool.finish()
+    assert results[2:] == [("3", b"3")]
+    stats = normalizer.stats()
+    assert stats["superseded"] == 1
+    assert stats["in_flight"] == 0
+
+
+def test_sessions_do_not_wait_on_each_other(normalizer):
+    results = []
+    for session in range(20):
+        normalizer.submit(session, b"frame", collect(results, session))
+    assert len(normalizer._pool.jobs) == 20
+    assert results == []
+
+
+def test_failed_normalization_sends_the_original(normalizer):
+    results = []
+    normalizer.submit("a", b"raw", collect(results, "a"))
+    future, _ = normalizer._pool.jobs.pop()
+    future.set_exception(ValueError("bad jpeg"))
+    assert results == [("a", b"raw")]
+    assert normalizer.stats()["failed"] == 1
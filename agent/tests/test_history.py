@@ -0,0 +1,108 @@
+import json
+
+import pytest
+
+from history import HistoryStore, parse_time
+
+T0 = 1_700_000_000.0
+
+
+def turn(session_id, role, text, at):
+    return {"session_id": session_id, "role": role, "ts": T0 + at, "end_ts": T0 + at + 1, "text": text}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(tmp_path / "history.db")
+    store.add_turns([
+        turn("rome", "User", "What is this building?", 0),
+        turn("rome", "Assistant", "This is the Pantheon, a Roman temple.", 5),
+        turn("rome", "User", "When was the Pantheon built?", 10),
+        turn("paris", "User", "Tell me about this cathedral.", 100),
+        turn("paris", "Assistant", "Notre-Dame is a Gothic cathedral.", 105),
+        turn("paris", "User", "", 110),
+    ])
+    return store
+
+
+def test_parse_time_accepts_epoch_and_iso():
+    assert parse_time(None) is None
+    assert parse_time("1700000000") == T0
+    assert parse_time("2023-11-14T22:13:20Z") == T0
+    with pytest.raises(ValueError):
+        parse_time("yesterday")
+
+
+def test_empty_turns_are_not_stored(store):
+    assert store.stats()["turns"] == 5
+    assert not store.is_empty()
+
+
+def test_search_matches_every_word(store):
+    results = store.search("pantheon built")
+    assert [r["text"] for r in results] == ["When was the Pantheon built?"]
+    assert "[Pantheon]" in results[0]["snippet"]
+
+
+def test_search_treats_fts_syntax_as_plain_words(store):
+    assert store.search('cathedral OR "NEAR(') == []
+    assert store.search("cathedral AND") == []
+    assert store.search("*") == []
+
+
+def test_search_by_session_time_and_recency(store):
+    assert {r["session_id"] for r in store.search("this", session_id="paris")} == {"paris"}
+    assert store.search("this", session_id="unknown") == []
+    recent = store.search("pantheon", order="recent")
+    assert [r["text"] for r in recent] == ["When was the Pantheon built?", "This is the Pantheon, a Roman temple."]
+    assert [r["session_id"] for r in store.search("this", since=T0 + 50)] == ["paris"]
+
+
+def test_search_pages_with_limit_and_offset(store):
+    first = store.search("pantheon", order="recent", limit=1)
+    second = store.search("pantheon", order="recent", limit=1, offset=1)
+    assert len(first) == len(second) == 1
+    assert first[0]["id"] != second[0]["id"]
+
+
+def test_like_fallback_without_fts5(store):
+    store.fts = False
+    assert [r["text"] for r in store.search("cathedral notre")] == ["Notre-Dame is a Gothic cathedral."]
+
+
+def test_summary_has_the_opening_question_and_latest_turns(store):
+    more = [turn("rome", "User" if i % 2 else "Assistant", f"follow-up {i}", 20 + i) for i in range(6)]
+    store.add_turns(more)
+    summary = store.summary("rome")
+    assert "9 turns so far" in summary
+    assert "It opened with the user saying: What is this building?" in summary
+    assert summary.splitlines()[-5:] == [f"{'User' if i % 2 else 'Assistant'}: follow-up {i}" for i in range(1, 6)]
+    assert store.summary("unknown") is None
+
+
+def test_sessions_and_turns_by_time_range(store):
+    assert [s["session_id"] for s in store.sessions()] == ["paris", "rome"]
+    assert [s["session_id"] for s in store.sessions(until=T0 + 50)] == ["rome"]
+    turns = store.turns("rome", since=T0 + 5)
+    assert [t["role"] for t in turns] == ["Assistant", "User"]
+
+
+def test_import_jsonl_stops_at_max_bytes(tmp_path):
+    log = tmp_path / "transcripts.jsonl"
+    lines = [json.dumps(turn("s", "User", f"line {i}", i)) + "\n" for i in range(3)]
+    log.write_text("".join(lines) + "not json\n")
+    store = HistoryStore(tmp_path / "history.db")
+    assert store.import_jsonl(log, max_bytes=len(lines[0]) + len(lines[1])) == 2
+    assert store.import_jsonl(log) == 3
+
+
+def test_import_legacy_transcript_joins_fragments(tmp_path):
+    legacy = tmp_path / "transcript_old-session.txt"
+    legacy.write_text(
+        "[2024-01-01 10:00:00] User: What is\n"
+        "[2024-01-01 10:00:01] User:  that tower?\n"
+        "[2024-01-01 10:00:03] Assistant: The Eiffel Tower.\n"
+    )
+    store = HistoryStore(tmp_path / "history.db")
+    assert store.import_legacy_transcript(legacy) == 2
+    assert [t["text"] for t in store.turns("old-session")] == ["What is that tower?", "The Eiffel Tower."]
@@ -0,0 +1,72 @@
+"""End-to-end sessions through the Socket.IO handlers against the fake Live API (LIVE_BACKEND=fake)."""
+
+import time
+
+import pytest
+
+
+@pytest.fixture
+def client(app_module):
+    client = app_module.socketio.test_client(app_module.app)
+    yield client
+    client.disconnect()
+
+
+def wait_for(client, event, timeout=10.0):
+    """Return the args of the next `event`, skipping everything else."""
+    seen = []
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        for message in client.get_received():
+            if message["name"] == event:
+                return message["args"][0] if message["args"] else None
+            seen.append(message["name"])
+        time.sleep(0.01)
+    raise AssertionError(f"no {event} within {timeout}s; received {seen}")
+
+
+def test_session_answers_reconnects_and_stops(app_module, client):
+    client.emit("start_live_session", {"session_id": "e2e"})
+    assert wait_for(client, "live_session_started")["status"] == "connected"
+
+    client.emit("send_text_message", {"session_id": "e2e", "text": "What is this building?"})
+    assert wait_for(client, "input_transcription")["text"]
+    assert len(wait_for(client, "audio_response")["audio"]) > 0
+
+    # The fake upstream drops every connection after a second; the session resumes on its own
+    time.sleep(1.2)
+    client.emit("send_text_message", {"session_id": "e2e", "text": "Tell me more."})
+    assert wait_for(client, "live_session_started")["status"] == "resumed"
+    assert len(wait_for(client, "audio_response")["audio"]) > 0
+    assert app_module.metrics.snapshot()["counters"]["reconnects_total"] >= 1
+
+    client.emit("stop_live_session", {"session_id": "e2e"})
+    wait_for(client, "live_session_stopped")
+    deadline = time.monotonic() + 5
+    while ("e2e" in app_module.bridges or "e2e" in app_module.live_sessions) and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert "e2e" not in app_module.bridges
+    assert "e2e" not in app_module.live_sessions
+    assert "e2e" not in app_module.metrics.snapshot()["sessions"]
+
+
+def test_media_for_unknown_sessions_leaves_no_per_session_state(app_module, client):
+    for i in range(50):
+        client.emit("send_audio", {"session_id": f"ghost-{i}", "audio": b"\x01\x00" * 8000})
+        client.emit("send_text_message", {"session_id": f"ghost-{i}", "text": "hello"})
+    sessions = app_module.metrics.snapshot()["sessions"]
+    assert not any(session_id.startswith("ghost-") for session_id in sessions)
+    assert app_module.session_states.get("ghost-0") is None
+
+
+def test_start_right_after_stop_launches_a_new_run(app_module, client):
+    client.emit("start_live_session", {"session_id": "restart"})
+    assert wait_for(client, "live_session_started")["status"] == "connected"
+    # The second start can arrive while the first run still holds its slot
+    client.emit("stop_live_session", {"session_id": "restart"})
+    client.emit("start_live_session", {"session_id": "restart"})
+    assert wait_for(client, "live_session_started")["status"] == "connected"
+    assert app_module.session_supervisor.stats()["slots_used"] == 1
+
+    client.emit("stop_live_session", {"session_id": "restart"})
+    wait_for(client, "live_session_stopped")
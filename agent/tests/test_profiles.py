@@ -0,0 +1,47 @@
+"""Per-browser profiles behind the REST API, as seen by two workers sharing one registry."""
+
+import pytest
+
+from registry import LocalRegistry
+
+
+@pytest.fixture
+def http(app_module):
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def other_worker(app_module):
+    """A second worker's view of the registry this process uses."""
+    return LocalRegistry(app_module.session_registry._backend)
+
+
+def headers(client_id):
+    return {"X-Client-Id": client_id}
+
+
+def test_validated_token_is_visible_to_the_worker_that_hosts_the_session(app_module, http, other_worker, monkeypatch):
+    monkeypatch.setattr(app_module.client_pool, "validated_until", lambda *args: 4102444800.0)
+    response = http.post("/api/validate-token", headers=headers("client-a"),
+                         json={"projectId": "proj", "location": "us-central1", "accessToken": "tok-a"})
+    assert response.get_json() == {"valid": True, "project": "proj", "cached": True}
+    oauth = other_worker.load_profile("client-a")["oauth"]
+    assert oauth["access_token"] == "tok-a" and oauth["project_id"] == "proj"
+    # Another browser is not signed in by it
+    assert http.get("/api/auth-status", headers=headers("client-b")).get_json()["authenticated"] is False
+
+    http.post("/api/logout", headers=headers("client-a"))
+    assert other_worker.load_profile("client-a")["oauth"] is None
+
+
+def test_name_and_instructions_are_per_browser(app_module, http, other_worker):
+    http.post("/api/set-user-name", headers=headers("client-c"), json={"name": "Ada"})
+    http.post("/api/set-system-instructions", headers=headers("client-c"), json={"instructions": " Be brief. "})
+    assert http.get("/api/get-user-name", headers=headers("client-c")).get_json() == {"name": "Ada"}
+    assert http.get("/api/get-user-name", headers=headers("client-d")).get_json() == {"name": "User"}
+
+    profile = other_worker.load_profile("client-c")
+    prompt = app_module.get_live_system_prompt(profile=app_module.load_profile("client-c"))
+    assert profile["instructions"] == "Be brief."
+    assert "User's name: Ada" in prompt and "Be brief." in prompt
+    assert "Ada" not in app_module.get_live_system_prompt(profile=app_module.load_profile("client-d"))
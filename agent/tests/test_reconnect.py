@@ -0,0 +1,33 @@
+from reconnect import Backoff
+
+
+def test_delays_grow_exponentially_up_to_the_cap(clock):
+    backoff = Backoff(base=0.1, cap=1.0, budget=60, rng=lambda: 1.0, clock=clock)
+    assert [backoff.next_delay() for _ in range(6)] == [0.1, 0.2, 0.4, 0.8, 1.0, 1.0]
+    assert backoff.attempt == 6
+
+
+def test_jitter_scales_the_delay(clock):
+    backoff = Backoff(base=1.0, cap=10.0, budget=60, rng=lambda: 0.25, clock=clock)
+    assert backoff.next_delay() == 0.25
+    assert backoff.next_delay() == 0.5
+
+
+def test_gives_up_once_the_budget_would_be_exceeded(clock):
+    backoff = Backoff(base=1.0, cap=4.0, budget=10, rng=lambda: 1.0, clock=clock)
+    assert backoff.next_delay() == 1.0
+    clock.advance(7)
+    assert backoff.next_delay() == 2.0
+    clock.advance(2)
+    # 9s spent plus a 4s delay is past the 10s budget
+    assert backoff.next_delay() is None
+
+
+def test_reset_starts_a_fresh_budget(clock):
+    backoff = Backoff(base=1.0, cap=4.0, budget=5, rng=lambda: 1.0, clock=clock)
+    backoff.next_delay()
+    clock.advance(10)
+    assert backoff.next_delay() is None
+    backoff.reset()
+    assert backoff.attempt == 0
+    assert backoff.next_delay() == 1.0
@@ -0,0 +1,126 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import registry
+from registry import LocalRegistry, create_registry, decode_message, encode_message
+
+
+@pytest.fixture
+def redis_registries(monkeypatch):
+    """Two RedisRegistry instances, as two workers would have, sharing one fake Redis server."""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # fakeredis runs the lease scripts with it
+    import redis
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis.Redis, "from_url", lambda url: fakeredis.FakeRedis(server=server))
+    return create_registry("redis://localhost:6379/0"), create_registry("redis://localhost:6379/0")
+
+
+def test_messages_round_trip_text_and_binary():
+    text = {"type": "text", "session_id": "s", "data": "hello"}
+    audio = {"type": "audio", "session_id": "s", "data": b"\x00\n\xff", "codec": "pcm"}
+    assert decode_message(encode_message(text)) == text
+    assert decode_message(encode_message(audio)) == audio
+
+
+def test_create_registry_picks_the_backend():
+    assert isinstance(create_registry(None), LocalRegistry)
+    assert isinstance(create_registry("local"), LocalRegistry)
+    with pytest.raises(ValueError):
+        create_registry("memcached://host")
+
+
+def test_local_lease_is_exclusive_until_released():
+    backend = {}
+    first, second = LocalRegistry(backend), LocalRegistry(backend)
+    assert first.claim("s", "w1", ttl=30) == "w1"
+    assert second.claim("s", "w2", ttl=30) == "w1"
+    assert second.owner("s") == "w1"
+    second.release("s", "w2")
+    assert first.owner("s") == "w1"
+    first.release("s", "w1")
+    assert second.claim("s", "w2", ttl=30) == "w2"
+
+
+def test_local_lease_expires_unless_renewed(monkeypatch, clock):
+    monkeypatch.setattr(registry, "time", SimpleNamespace(monotonic=clock))
+    local = LocalRegistry()
+    local.claim("kept", "w1", ttl=30)
+    local.claim("lost", "w1", ttl=30)
+    clock.advance(20)
+    local.renew(["kept"], "w1", ttl=30)
+    local.renew(["kept"], "w2", ttl=300)
+    clock.advance(20)
+    assert local.owner("kept") == "w1"
+    assert local.owner("lost") is None
+    assert local.claim("lost", "w2", ttl=30) == "w2"
+
+
+def test_local_relay_reaches_the_owner_only():
+    backend = {}
+    received = []
+    LocalRegistry(backend).subscribe("w1", received.append)
+    LocalRegistry(backend).relay("w1", {"type": "stop", "session_id": "s"})
+    LocalRegistry(backend).relay("w-unknown", {"type": "stop", "session_id": "s"})
+    assert received == [{"type": "stop", "session_id": "s", "data": None}]
+
+
+def test_redis_lease_is_exclusive_until_released(redis_registries):
+    first, second = redis_registries
+    assert first.claim("s", "w1", ttl=30) == "w1"
+    assert second.claim("s", "w2", ttl=30) == "w1"
+    second.release("s", "w2")
+    assert first.owner("s") == "w1"
+    first.release("s", "w1")
+    assert second.owner("s") is None
+    assert second.claim("s", "w2", ttl=30) == "w2"
+
+
+def test_redis_lease_expires_unless_renewed(redis_registries):
+    first, second = redis_registries
+    first.claim("kept", "w1", ttl=0.2)
+    first.claim("lost", "w1", ttl=0.2)
+    second.renew(["kept"], "w2", ttl=30)
+    first.renew(["kept"], "w1", ttl=30)
+    time.sleep(0.3)
+    assert second.owner("kept") == "w1"
+    assert second.owner("lost") is None
+
+
+def test_redis_relay_delivers_binary_media(redis_registries):
+    owner, other = redis_registries
+    received = threading.Event()
+    messages = []
+    owner.subscribe("w1", lambda message: (messages.append(message), received.set()))
+    message = {"type": "audio", "session_id": "s", "data": b"\x01\x02", "codec": "pcm"}
+    deadline = time.monotonic() + 5
+    # The listener thread subscribes asynchronously; publish until it is there
+    while not received.is_set() and time.monotonic() < deadline:
+        other.relay("w1", message)
+        received.wait(0.05)
+    assert messages[0] == message
+
+
+def test_local_profiles_are_shared_and_expire(monkeypatch, clock):
+    monkeypatch.setattr(registry, "time", SimpleNamespace(monotonic=clock))
+    backend = {}
+    first, second = LocalRegistry(backend), LocalRegistry(backend)
+    profile = {"name": "Ada", "oauth": None}
+    first.save_profile("client-1", profile, ttl=60)
+    profile["name"] = "changed after saving"
+    assert second.load_profile("client-1") == {"name": "Ada", "oauth": None}
+    assert second.load_profile("client-2") is None
+    clock.advance(61)
+    assert second.load_profile("client-1") is None
+
+
+def test_redis_profiles_are_shared_between_workers(redis_registries):
+    first, second = redis_registries
+    first.save_profile("client-1", {"name": "Ada"}, ttl=60)
+    assert second.load_profile("client-1") == {"name": "Ada"}
+    second.delete_profile("client-1")
+    assert first.load_profile("client-1") is None
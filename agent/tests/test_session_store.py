@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+import pytest
+
+import session_store
+from session_store import MemoryStore, SqliteStore, TieredStore
+
+
+@pytest.fixture
+def frozen_time(monkeypatch, clock):
+    """Drive both of the stores' clocks from the fake clock."""
+    monkeypatch.setattr(session_store, "time", SimpleNamespace(monotonic=clock, time=clock))
+    return clock
+
+
+@pytest.fixture
+def sqlite_store(tmp_path, frozen_time):
+    return SqliteStore(tmp_path / "sessions.db", ttl=60)
+
+
+def test_memory_store_evicts_least_recently_used(frozen_time):
+    store = MemoryStore(max_entries=2, ttl=60)
+    store.set("a", 1)
+    store.set("b", 2)
+    assert store.get("a") == 1
+    store.set("c", 3)
+    assert store.get("b") is None
+    assert (store.get("a"), store.get("c")) == (1, 3)
+    assert store.stats()["evictions"] == 1
+
+
+def test_memory_store_expires_idle_entries(frozen_time):
+    store = MemoryStore(ttl=60)
+    store.set("idle", 1)
+    store.set("busy", 2)
+    frozen_time.advance(40)
+    store.get("busy")
+    frozen_time.advance(40)
+    assert store.get("idle", "gone") == "gone"
+    assert store.items() == [("busy", 2)]
+    frozen_time.advance(61)
+    assert store.expire() == 1
+    assert len(store) == 0
+
+
+def test_sqlite_store_round_trips_json_and_survives_reopening(tmp_path, frozen_time):
+    store = SqliteStore(tmp_path / "sessions.db", ttl=60)
+    store.set("s1", {"handle": "abc", "n": 1})
+    store.delete("missing")
+    reopened = SqliteStore(tmp_path / "sessions.db", ttl=60)
+    assert reopened.get("s1") == {"handle": "abc", "n": 1}
+    reopened.delete("s1")
+    assert reopened.get("s1", "gone") == "gone"
+
+
+def test_sqlite_store_expires_entries_past_the_ttl(sqlite_store, frozen_time):
+    sqlite_store.set("old", 1)
+    frozen_time.advance(30)
+    sqlite_store.set("new", 2)
+    frozen_time.advance(40)
+    assert sqlite_store.get("old") is None
+    assert sqlite_store.get("new") == 2
+    assert sqlite_store.expire() == 1
+    assert len(sqlite_store) == 1
+
+
+def test_tiered_store_reads_through_and_writes_both(sqlite_store, frozen_time):
+    memory = MemoryStore(max_entries=1, ttl=60)
+    store = TieredStore(memory, sqlite_store)
+    store.set("a", "1")
+    store.set("b", "2")
+    # "a" fell out of the memory tier but is still on disk, and is promoted again
+    assert memory.get("a") is None
+    assert store.get("a") == "1"
+    assert memory.get("a") == "1"
+    store.delete("a")
+    assert store.get("a", "gone") == "gone"
+    assert len(store) == 1
@@ -0,0 +1,117 @@
+from supervisor import FULL, QUEUED, RESTARTING, STARTED, SessionSupervisor
+
+
+def make_supervisor(clock, **kwargs):
+    options = {"max_sessions": 2, "max_waiting": 1, "wait_timeout": 30, "idle_timeout": 300, "orphan_timeout": 30}
+    return SessionSupervisor(clock=clock, **{**options, **kwargs})
+
+
+def test_admits_until_full_then_queues_then_refuses(clock):
+    supervisor = make_supervisor(clock)
+    started = []
+    assert supervisor.admit("a", "sid-a", lambda: started.append("a")) == (STARTED, 0)
+    assert supervisor.admit("b", "sid-b", lambda: started.append("b")) == (STARTED, 0)
+    assert supervisor.admit("c", "sid-c", lambda: started.append("c")) == (QUEUED, 1)
+    assert supervisor.admit("d", "sid-d", lambda: started.append("d")) == (FULL, 0)
+    assert started == ["a", "b"]
+    stats = supervisor.stats()
+    assert (stats["admitted"], stats["queued"], stats["rejected"]) == (2, 1, 1)
+
+
+def test_admitting_a_session_that_holds_its_slot_retries_after_release(clock):
+    supervisor = make_supervisor(clock)
+    started, retried = [], []
+    supervisor.admit("a", "sid-1", lambda: started.append("a"))
+    assert supervisor.admit("a", "sid-2", lambda: started.append("a"), retry=lambda: retried.append("a")) == (RESTARTING, 0)
+    assert started == ["a"]
+    assert supervisor.stats()["restarting"] == 1
+    supervisor.release("a")
+    assert retried == ["a"]
+    assert supervisor.admit("a", "sid-2", lambda: started.append("a")) == (STARTED, 0)
+    assert started == ["a", "a"]
+
+
+def test_pending_restart_can_be_cancelled_or_dropped_with_its_socket(clock):
+    supervisor = make_supervisor(clock)
+    retried = []
+    supervisor.admit("a", "sid-1", lambda: None)
+    supervisor.admit("b", "sid-2", lambda: None)
+    supervisor.admit("a", "sid-3", lambda: None, retry=lambda: retried.append("a"))
+    supervisor.admit("b", "sid-4", lambda: None, retry=lambda: retried.append("b"))
+    assert supervisor.cancel("a")
+    assert supervisor.detach("sid-4") == ["b"]
+    supervisor.release("a")
+    supervisor.release("b")
+    assert retried == []
+
+
+def test_release_starts_the_next_waiting_session(clock):
+    supervisor = make_supervisor(clock, max_sessions=1, max_waiting=2)
+    started = []
+    supervisor.admit("a", "sid-a", lambda: started.append("a"))
+    supervisor.admit("b", "sid-b", lambda: started.append("b"))
+    supervisor.admit("c", "sid-c", lambda: started.append("c"))
+    supervisor.release("a")
+    assert started == ["a", "b"]
+    assert supervisor.stats()["slots_used"] == 1
+    assert supervisor.stats()["waiting"] == 1
+
+
+def test_cancel_removes_a_waiting_session(clock):
+    supervisor = make_supervisor(clock, max_sessions=1)
+    started = []
+    supervisor.admit("a", "sid-a", lambda: None)
+    supervisor.admit("b", "sid-b", lambda: started.append("b"))
+    assert supervisor.cancel("b")
+    assert not supervisor.cancel("b")
+    supervisor.release("a")
+    assert started == []
+
+
+def test_reaps_idle_sessions_but_not_ones_receiving_media(clock):
+    supervisor = make_supervisor(clock)
+    supervisor.admit("idle", "sid-1", lambda: None)
+    supervisor.admit("busy", "sid-2", lambda: None)
+    clock.advance(200)
+    supervisor.touch("busy")
+    clock.advance(100)
+    expired, waiters = supervisor.reap()
+    assert expired == [("idle", "sid-1", "idle")]
+    assert waiters == []
+    # Still holding its slot while it stops, but not reported again
+    clock.advance(10)
+    assert supervisor.reap() == ([], [])
+    assert supervisor.stats()["reaped"]["idle"] == 1
+
+
+def test_orphaned_session_is_reaped_unless_a_socket_reattaches(clock):
+    supervisor = make_supervisor(clock)
+    supervisor.admit("gone", "sid-1", lambda: None)
+    supervisor.admit("back", "sid-2", lambda: None)
+    supervisor.detach("sid-1")
+    supervisor.detach("sid-2")
+    clock.advance(10)
+    supervisor.attach("back", "sid-3")
+    clock.advance(25)
+    expired, _ = supervisor.reap()
+    assert expired == [("gone", "sid-1", "orphaned")]
+
+
+def test_detach_drops_sessions_the_socket_was_waiting_for(clock):
+    supervisor = make_supervisor(clock, max_sessions=1)
+    supervisor.admit("a", "sid-a", lambda: None)
+    supervisor.admit("b", "sid-b", lambda: None)
+    assert supervisor.detach("sid-b") == ["b"]
+    assert supervisor.stats()["waiting"] == 0
+
+
+def test_waiters_give_up_after_the_wait_timeout(clock):
+    supervisor = make_supervisor(clock, max_sessions=1)
+    started = []
+    supervisor.admit("a", "sid-a", lambda: None)
+    supervisor.admit("b", "sid-b", lambda: started.append("b"))
+    clock.advance(31)
+    assert supervisor.reap() == ([], [("b", "sid-b")])
+    supervisor.release("a")
+    assert started == []
+    assert supervisor.stats()["reaped"]["wait_timeout"] == 1
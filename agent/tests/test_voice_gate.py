@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from voice_gate import HANGOVER, KEEPALIVE, SPEECH, SUPPRESSED, VoiceGate, frame_levels
+
+CHUNK_SAMPLES = 8000  # 500 ms at 16 kHz, as the browser sends
+
+
+def pcm(amplitude, samples=CHUNK_SAMPLES, seed=0):
+    """Gaussian noise at `amplitude` of full scale."""
+    noise = np.random.default_rng(seed).normal(0, amplitude, samples)
+    return (np.clip(noise, -1, 1) * 32767).astype("<i2").tobytes()
+
+
+def tone(amplitude, samples=CHUNK_SAMPLES):
+    t = np.arange(samples) / 16000
+    return (np.sin(2 * np.pi * 220 * t) * amplitude * 32767).astype("<i2").tobytes()
+
+
+def settle(gate, room, chunks=20):
+    for i in range(chunks):
+        gate.process(room, now=i * 0.5)
+    return chunks * 0.5
+
+
+def test_frame_levels_are_per_20ms_frame():
+    levels = frame_levels(tone(0.5, samples=800))
+    assert len(levels) == 2
+    assert levels == pytest.approx([-9.0, -9.0], abs=0.5)
+    assert len(frame_levels(b"\x00\x00" * 100)) == 0
+
+
+def test_quiet_room_is_suppressed_and_speech_is_forwarded():
+    gate = VoiceGate(hangover_ms=0, preroll_ms=0)
+    now = settle(gate, pcm(0.001))
+    assert gate.process(pcm(0.001, seed=1), now=now) == (SUPPRESSED, None)
+    speech = tone(0.3)
+    assert gate.process(speech, now=now + 0.5) == (SPEECH, speech)
+
+
+def test_hangover_then_preroll_on_the_next_onset():
+    gate = VoiceGate(hangover_ms=1000, preroll_ms=100)
+    now = settle(gate, pcm(0.001))
+    gate.process(tone(0.3), now=now)
+    quiet = pcm(0.001, seed=2)
+    assert gate.process(quiet, now=now + 0.5)[0] == HANGOVER
+    assert gate.process(quiet, now=now + 1.0)[0] == HANGOVER
+    assert gate.process(quiet, now=now + 1.5)[0] == SUPPRESSED
+    decision, data = gate.process(tone(0.3), now=now + 2.0)
+    assert decision == SPEECH
+    # 100 ms of the suppressed audio leads in the speech
+    assert len(data) == 3200 + CHUNK_SAMPLES * 2
+    assert data[:3200] == quiet[-3200:]
+
+
+def test_keepalive_sends_silence_while_suppressed():
+    gate = VoiceGate(hangover_ms=0, preroll_ms=0, keepalive=5.0)
+    now = settle(gate, pcm(0.001))
+    decision, data = gate.process(pcm(0.001, seed=3), now=now + 10)
+    assert decision == KEEPALIVE
+    assert data == bytes(len(data))
+
+
+def test_speech_from_the_first_chunk_is_forwarded():
+    gate = VoiceGate()
+    assert gate.process(tone(0.3), now=0.0)[0] == SPEECH
+    assert gate.stats()["noise_floor_db"] == pytest.approx(-60.0, abs=3)
+
+
+def test_floor_follows_a_louder_room_up_slowly():
+    gate = VoiceGate(hangover_ms=0, preroll_ms=0)
+    room = pcm(0.02)
+    decisions = [gate.process(room, now=i * 0.5)[0] for i in range(40)]
+    # Forwarded while the floor climbs from -60 dBFS to the room, then suppressed
+    assert decisions[0] == SPEECH
+    assert decisions[-1] == SUPPRESSED
+    stats = gate.stats()
+    assert stats["bytes_saved"] == stats["bytes_in"] - stats["bytes_forwarded"] > 0
@@ -0,0 +1,152 @@
+"""Asynchronous, batched transcript writer.
+
+Transcription fragments are buffered in memory per session and coalesced
+into whole turns when the model signals `turn_complete`. Finished turns are
+handed to a background thread that appends them to a JSONL file in batches
+and rotates the file by size and age, so the session loop never blocks on
+file I/O. The same thread ingests each batch into the indexed history
+store when one is attached.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+log = logging.getLogger("agent.transcript")
+_STOP = object()
+
+
+def _iso(ts):
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat(timespec="milliseconds")
+
+
+class TranscriptSink:
+    """Buffers transcript fragments into turns and writes them off-thread as JSONL."""
+
+    def __init__(self, directory, max_bytes=10 * 1024 * 1024, max_age=3600.0,
+                 flush_interval=1.0, batch_size=200, history=None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / "transcripts.jsonl"
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.history = history
+        self._pending = {}  # session_id -> list of open turns, oldest first
+        self._lock = threading.Lock()
+        self._records = queue.Queue()
+        self._file = None
+        self._opened_at = 0.0
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name="transcript-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def add(self, session_id, role, text):
+        """Buffer one transcription fragment. Never touches the filesystem."""
+        if not text:
+            return
+        now = time.time()
+        with self._lock:
+            turns = self._pending.setdefault(session_id, [])
+            if turns and turns[-1]["role"] == role:
+                turns[-1]["fragments"].append(text)
+                turns[-1]["end"] = now
+            else:
+                turns.append({"role": role, "fragments": [text], "start": now, "end": now})
+
+    def end_turn(self, session_id):
+        """Coalesce a session's buffered fragments into turn records and queue them for writing."""
+        with self._lock:
+            turns = self._pending.pop(session_id, None)
+        for turn in turns or ():
+            text = "".join(turn["fragments"]).strip()
+            if text:
+                self._records.put({
+                    "ts": _iso(turn["start"]),
+                    "end_ts": _iso(turn["end"]),
+                    "session_id": session_id,
+                    "role": turn["role"],
+                    "text": text,
+                })
+
+    def close(self):
+        """Flush every open turn and stop the writer. Safe to call more than once."""
+        if self._closed:
+            return
+        self._closed = True
+        with self._lock:
+            session_ids = list(self._pending)
+        for session_id in session_ids:
+            self.end_turn(session_id)
+        self._records.put(_STOP)
+        self._writer.join(timeout=10)
+
+    def _run(self):
+        while True:
+            batch = []
+            try:
+                record = self._records.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            stop = record is _STOP
+            if not stop:
+                batch.append(record)
+            while len(batch) < self.batch_size:
+                try:
+                    record = self._records.get_nowait()
+                except queue.Empty:
+                    break
+                if record is _STOP:
+                    stop = True
+                    break
+                batch.append(record)
+            if batch:
+                self._write(batch)
+            if stop:
+                if self._file:
+                    self._file.close()
+                    self._file = None
+                return
+
+    def _write(self, batch):
+        try:
+            self._maybe_rotate()
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+                self._opened_at = time.time()
+            self._file.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in batch))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except Exception as e:
+            log.error("[TRANSCRIPT] Failed to write %d turn(s): %s", len(batch), e)
+        if self.history is not None:
+            try:
+                self.history.add_turns(batch)
+            except Exception as e:
+                log.error("[TRANSCRIPT] Failed to index %d turn(s): %s", len(batch), e)
+
+    def _maybe_rotate(self):
+        if not self.path.exists():
+            return
+        age = time.time() - self._opened_at if self._opened_at else 0.0
+        if self.path.stat().st_size < self.max_bytes and age < self.max_age:
+            return
+        if self._file:
+            self._file.close()
+            self._file = None
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+        rotated = self.directory / f"transcripts-{stamp}.jsonl"
+        counter = 1
+        while rotated.exists():
+            rotated = self.directory / f"transcripts-{stamp}-{counter}.jsonl"
+            counter += 1
+        self.path.rename(rotated)
+        log.info("[TRANSCRIPT] Rotated transcript log to %s", rotated.name)
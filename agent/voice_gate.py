@@ -0,0 +1,117 @@
+"""Server-side voice activity gate for client microphone audio.
+
+The browser streams 16 kHz PCM every 500 ms whether or not anyone is
+talking. Each chunk is split into 20 ms frames and their energy is compared
+with a per-session noise floor; a chunk with enough frames above the floor
+is speech. The floor starts at a fixed, quiet level and adapts to the room,
+falling quickly and rising slowly. Speech is forwarded together with a short
+pre-roll of the audio just before it, and forwarding continues for a
+hangover period after the last speech so the Live API's own activity
+detection still hears the trailing silence it needs to end the turn
+(`silence_duration_ms`) and the lead-in it keeps before the start of speech
+(`prefix_padding_ms`). Longer silences are suppressed, optionally with a
+short block of digital silence every `keepalive` seconds.
+"""
+
+import threading
+import time
+
+from startup import LazyModule
+
+# Imported on the first chunk (or by the warm-up) rather than at server start
+np = LazyModule("numpy")
+
+SAMPLE_RATE = 16000
+BYTES_PER_SAMPLE = 2
+FRAME_MS = 20
+_FRAME_SAMPLES = SAMPLE_RATE * FRAME_MS // 1000
+_FULL_SCALE = 32768.0
+
+SPEECH = "speech"
+HANGOVER = "hangover"
+SUPPRESSED = "suppressed"
+KEEPALIVE = "keepalive"
+
+
+def frame_levels(pcm):
+    """Return the level in dBFS of each whole 20 ms frame of 16-bit PCM."""
+    samples = np.frombuffer(pcm, dtype="<i2", count=len(pcm) // BYTES_PER_SAMPLE)
+    usable = len(samples) - len(samples) % _FRAME_SAMPLES
+    if not usable:
+        return np.empty(0)
+    frames = samples[:usable].reshape(-1, _FRAME_SAMPLES).astype(np.float32) / _FULL_SCALE
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-6))
+
+
+class VoiceGate:
+    """Per-session speech detector with an adaptive noise floor."""
+
+    def __init__(self, margin_db=10.0, min_speech_frames=2, hangover_ms=600, preroll_ms=300,
+                 keepalive=0.0, floor_db=-70.0, floor_rise=0.05, floor_fall=0.5, initial_floor_db=-60.0):
+        self.margin_db = margin_db
+        self.min_speech_frames = min_speech_frames
+        self.hangover_ms = hangover_ms
+        self.preroll_bytes = SAMPLE_RATE * BYTES_PER_SAMPLE * preroll_ms // 1000
+        self.keepalive = keepalive
+        self.min_floor_db = floor_db
+        # The floor follows quiet stretches quickly and loud ones slowly, so speech barely lifts it
+        self.floor_rise = floor_rise
+        self.floor_fall = floor_fall
+        # Start from a quiet-room floor rather than the first chunk, which may already be speech.
+        # A louder room is then forwarded for a few seconds while the floor rises to meet it.
+        self.noise_floor_db = max(floor_db, initial_floor_db)
+        self.hangover_left_ms = 0
+        self.last_forward_time = 0.0
+        self._preroll = b""
+        self._lock = threading.Lock()
+        self.decisions = dict.fromkeys((SPEECH, HANGOVER, SUPPRESSED, KEEPALIVE), 0)
+        self.bytes_in = 0
+        self.bytes_forwarded = 0
+
+    def process(self, pcm, now=None):
+        """Classify a chunk. Returns (decision, data), where data is the bytes to send upstream or None."""
+        now = time.monotonic() if now is None else now
+        levels = frame_levels(pcm)
+        chunk_ms = len(pcm) * 1000 // (SAMPLE_RATE * BYTES_PER_SAMPLE)
+        with self._lock:
+            self.bytes_in += len(pcm)
+            if not len(levels):
+                return self._forward(pcm, SPEECH, now)
+            quiet = float(np.percentile(levels, 10))
+            threshold = self.noise_floor_db + self.margin_db
+            is_speech = int(np.count_nonzero(levels > threshold)) >= self.min_speech_frames
+
+            rate = self.floor_fall if quiet < self.noise_floor_db else self.floor_rise
+            self.noise_floor_db = max(self.min_floor_db, self.noise_floor_db + rate * (quiet - self.noise_floor_db))
+
+            if is_speech:
+                # Lead in with the tail of the audio suppressed just before, so onsets are not clipped
+                data, self._preroll = self._preroll + pcm, b""
+                self.hangover_left_ms = self.hangover_ms
+                return self._forward(data, SPEECH, now)
+            if self.hangover_left_ms > 0:
+                self.hangover_left_ms -= chunk_ms
+                return self._forward(pcm, HANGOVER, now)
+            self._preroll = (self._preroll + pcm)[-self.preroll_bytes:] if self.preroll_bytes else b""
+            if self.keepalive and now - self.last_forward_time >= self.keepalive:
+                return self._forward(bytes(_FRAME_SAMPLES * BYTES_PER_SAMPLE), KEEPALIVE, now)
+            self.decisions[SUPPRESSED] += 1
+            return SUPPRESSED, None
+
+    def _forward(self, data, decision, now):
+        self.decisions[decision] += 1
+        self.bytes_forwarded += len(data)
+        self.last_forward_time = now
+        return decision, data
+
+    def stats(self):
+        with self._lock:
+            return {
+                "decisions": dict(self.decisions),
+                "bytes_in": self.bytes_in,
+                "bytes_forwarded": self.bytes_forwarded,
+                "bytes_saved": self.bytes_in - self.bytes_forwarded,
+                "noise_floor_db": round(self.noise_floor_db, 1),
+                "in_hangover": self.hangover_left_ms > 0,
+            }